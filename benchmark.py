@@ -0,0 +1,344 @@
+"""
+게임 상태별 프레임 비용 벤치마크
+
+SDL dummy 비디오/오디오 드라이버로 창 없이 main_game()을 돌리면서,
+스크립트 입력으로 각 상태(타이틀, 캐릭터 선택, 챕터 1~3 플레이, 대시, 일시정지 ...)에 들어가
+프레임마다 입력 / 업데이트 / 그리기 / flip 시간을 잽니다. 게임 화면은 전체 flip 렌더러와
+바뀐 영역만 보내는 dirty 렌더러(_dirty 시나리오)로 각각 재서 나란히 보여 줍니다.
+
+    python benchmark.py                              # 결과를 benchmark.json에 저장
+    python benchmark.py --baseline old.json          # 이전 결과와 비교, 느려진 상태가 있으면 종료 코드 1
+    python benchmark.py --compare old.json new.json  # 저장된 두 결과만 비교
+
+1차 실행에서 시간을, 2차 실행에서 tracemalloc으로 프레임당 메모리 할당량을 잽니다.
+(tracemalloc은 느려서 시간 측정과 따로 돕니다) 한 프레임 예산을 넘긴 히치 수도 함께 남깁니다.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import game
+
+PHASES = ("events", "update", "draw", "flip")
+WARMUP_FRAMES = 30        # 상태에 들어간 직후 프레임은 버립니다. (캐시 채우기 등)
+DEFAULT_FRAMES = 300      # 상태마다 재는 프레임 수
+DEFAULT_THRESHOLD = 0.20  # p95가 이 비율 이상 느려지면 회귀
+MIN_REGRESSION_MS = 0.10  # 이보다 작은 차이는 측정 오차로 봅니다.
+
+
+class Scenario:
+    def __init__(self, name, state, chapter=None, dash=False, renderer="full"):
+        self.name = name
+        self.state = state
+        self.chapter = chapter
+        self.dash = dash
+        self.renderer = renderer
+
+
+SCENARIOS = [
+    Scenario("title", "TITLE_SCREEN"),
+    Scenario("character_select", "CHARACTER_SELECT"),
+    Scenario("chapter_select", "CHAPTER_SELECT"),
+    Scenario("playing_ch1", "PLAYING", chapter=1),
+    Scenario("dash_ch1", "PLAYING", chapter=1, dash=True),
+    Scenario("paused", "PAUSED", chapter=1),
+    Scenario("relay_prompt", "RELAY_PROMPT", chapter=1),
+    Scenario("game_over", "GAME_OVER"),
+    Scenario("playing_ch2", "PLAYING", chapter=2),
+    Scenario("playing_ch3", "PLAYING", chapter=3),
+    Scenario("playing_ch1_dirty", "PLAYING", chapter=1, renderer="dirty"),
+    Scenario("dash_ch1_dirty", "PLAYING", chapter=1, dash=True, renderer="dirty"),
+    Scenario("playing_ch3_dirty", "PLAYING", chapter=3, renderer="dirty"),
+]
+
+
+def key_event(key):
+    return pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="")
+
+
+def click_event(pos):
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class BenchmarkDriver:
+    """
+    main_game()의 driver. 목표 상태가 아니면 그 상태로 가는 입력을 넣고,
+    목표 상태에서는 프레임 시간을 모읍니다. 모든 시나리오를 두 번(시간 / 메모리) 돌고 끝냅니다.
+    """
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.passes = ["time", "alloc"]
+        self.index = 0
+        self.frame_count = 0
+        self.in_state = 0
+        self.begin_state = None
+        self.alloc_start = 0
+        self.blocks_start = 0
+        self.samples = {s.name: {phase: [] for phase in PHASES + ("frame",)} for s in SCENARIOS}
+        self.blocks = {s.name: [] for s in SCENARIOS}
+        self.alloc = {s.name: [] for s in SCENARIOS}
+        self.hitches = {s.name: 0 for s in SCENARIOS}
+        self.run_hitches = 0
+        self.run_frames = 0
+
+    @property
+    def scenario(self):
+        return SCENARIOS[self.index]
+
+    @property
+    def renderer(self):
+        """main_game()이 게임 화면을 그릴 렌더러 (game.GAMEPLAY_RENDERERS)"""
+        return self.scenario.renderer
+
+    def in_target(self, game_state, world):
+        scenario = self.scenario
+        if game_state != scenario.state:
+            return False
+        if scenario.chapter is not None and game_state == "PLAYING":
+            return world is not None and world.chapter == scenario.chapter
+        return True
+
+    def begin_frame(self, game_state, world, frame_ms, events):
+        self.frame_count += 1
+        self.begin_state = game_state if self.in_target(game_state, world) else None
+        game.max_unlocked_chapter = 3
+        self.steer(game_state, world, events)
+        if self.passes[0] == "alloc":
+            tracemalloc.reset_peak()
+            self.alloc_start = tracemalloc.get_traced_memory()[0]
+        self.blocks_start = sys.getallocatedblocks()
+        # 프레임마다 정확히 한 틱씩 진행시켜 상태끼리 비교할 수 있게 합니다.
+        return game.SIM_STEP_MS
+
+    def steer(self, game_state, world, events):
+        """현재 상태에서 목표 상태로 가는 입력을 events에 넣습니다."""
+        scenario = self.scenario
+        target = scenario.state
+        if self.begin_state is not None:
+            if game_state == "PLAYING":
+                self.keep_running(world, events)
+            return
+
+        if game_state == "TITLE_SCREEN":
+            events.append(key_event(pygame.K_RETURN))
+        elif game_state == "CHARACTER_SELECT":
+            # 스페이스로 고르고 오른쪽으로 옮기기를 번갈아 -> 두 명이 차면 챕터 선택으로
+            events.append(key_event(pygame.K_SPACE if self.frame_count % 2 else pygame.K_RIGHT))
+        elif game_state == "CHAPTER_SELECT":
+            events.append(click_event(game.chapter_buttons[scenario.chapter or 1].center))
+        elif game_state == "CONFIRM_START":
+            events.append(key_event(pygame.K_RETURN))
+        elif game_state == "PLAYING":
+            wrong_chapter = scenario.chapter is not None and world.chapter != scenario.chapter
+            if target == "PAUSED" and not wrong_chapter:
+                events.append(key_event(pygame.K_p))
+            else:
+                # 이 판을 끝내야 목표로 갈 수 있습니다. 구멍으로 떨어뜨립니다.
+                world.current_player.rect.top = game.GROUND_Y + 1
+        elif game_state == "PAUSED":
+            events.append(key_event(pygame.K_p))
+        elif game_state == "RELAY_PROMPT":
+            if target == "PLAYING" and world.chapter == scenario.chapter:
+                events.append(key_event(pygame.K_RETURN))
+            else:
+                events.append(key_event(pygame.K_RIGHT))
+                events.append(key_event(pygame.K_RETURN))
+        elif game_state in ("GAME_OVER", "GAME_CLEAR", "HIDDEN_CREDIT"):
+            events.append(key_event(pygame.K_RETURN))
+
+    def keep_running(self, world, events):
+        """측정 중인 판이 끝나지 않도록 무적(또는 대시)을 유지하고, 구멍 앞에서는 점프합니다."""
+        player = world.current_player
+        if self.scenario.dash:
+            if player.current_effect_color != game.YELLOW:
+                player.apply_effect(game.YELLOW, world.now)
+            player.effect_start_time = world.now
+        elif not player.effect_active:
+            player.apply_effect(game.CYAN, world.now, is_big=True)
+        else:
+            player.effect_start_time = world.now
+        ahead = pygame.Rect(player.rect.right, game.GROUND_Y - 10, 160, 20)
+        if not player.is_jumping and world.pit_group.query(ahead):
+            events.append(key_event(pygame.K_UP))
+
+    def end_frame(self, game_state, profiler):
+        if self.passes[0] == "time":
+            self.run_frames += 1
+            self.run_hitches += game.HITCH_MONITOR.last_was_hitch
+        if self.begin_state is None or game_state != self.begin_state:
+            self.in_state = 0
+            return True
+        self.in_state += 1
+        if self.in_state <= WARMUP_FRAMES:
+            return True
+
+        name = self.scenario.name
+        if self.passes[0] == "time":
+            samples = self.samples[name]
+            groups = profiler.grouped()
+            for phase in PHASES:
+                samples[phase].append(groups.get(phase, 0.0))
+            samples["frame"].append(profiler.total_ms())
+            self.blocks[name].append(sys.getallocatedblocks() - self.blocks_start)
+            self.hitches[name] += game.HITCH_MONITOR.last_was_hitch
+        else:
+            current, peak = tracemalloc.get_traced_memory()
+            self.alloc[name].append(max(peak - self.alloc_start, 0) / 1024)
+
+        if self.in_state >= WARMUP_FRAMES + self.frames:
+            self.in_state = 0
+            self.index += 1
+            if self.index == len(SCENARIOS):
+                self.index = 0
+                self.passes.pop(0)
+                if not self.passes:
+                    return False
+                tracemalloc.start()
+            print(f"[벤치마크] {self.passes[0]} / {self.scenario.name}")
+        return True
+
+    def results(self):
+        states = {}
+        for scenario in SCENARIOS:
+            name = scenario.name
+            entry = {}
+            for phase, values in self.samples[name].items():
+                if values:
+                    entry[phase] = {
+                        "p50": round(percentile(values, 0.50), 4),
+                        "p95": round(percentile(values, 0.95), 4),
+                        "p99": round(percentile(values, 0.99), 4),
+                    }
+            if self.blocks[name]:
+                entry["net_blocks_per_frame"] = round(sum(self.blocks[name]) / len(self.blocks[name]), 2)
+            if self.alloc[name]:
+                entry["alloc_kib_per_frame"] = round(sum(self.alloc[name]) / len(self.alloc[name]), 2)
+            entry["hitches"] = self.hitches[name]
+            states[name] = entry
+        return states
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=game.BASE_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(frames):
+    driver = BenchmarkDriver(frames)
+    print(f"[벤치마크] time / {driver.scenario.name}")
+    started = time.perf_counter()
+    try:
+        game.main_game(render_fps=0, driver=driver)
+    except SystemExit:
+        pass
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return {
+        "revision": git_revision(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "pygame": pygame.version.ver,
+        "frames_per_state": frames,
+        "wall_seconds": round(time.perf_counter() - started, 1),
+        "hitches": {
+            "budget_ms": round(game.HITCH_MONITOR.budget_ms, 2),
+            "frames": driver.run_frames,
+            "count": driver.run_hitches,
+        },
+        "states": driver.results(),
+    }
+
+
+def compare(old, new, threshold):
+    """상태/구간별 p95를 비교해 출력하고, 회귀한 항목 목록을 돌려줍니다."""
+    regressions = []
+    if "hitches" in old and "hitches" in new:
+        print(f"히치: {old['hitches']['count']} -> {new['hitches']['count']} "
+              f"(예산 {new['hitches']['budget_ms']} ms, {new['hitches']['frames']} 프레임)")
+    print(f"{'상태':<18}{'구간':<8}{'이전 p95':>10}{'현재 p95':>10}{'변화':>9}")
+    for name, entry in new["states"].items():
+        old_entry = old["states"].get(name)
+        if not old_entry:
+            continue
+        for phase in PHASES + ("frame",):
+            if phase not in entry or phase not in old_entry:
+                continue
+            before, after = old_entry[phase]["p95"], entry[phase]["p95"]
+            change = (after - before) / before if before > 0 else 0.0
+            regressed = after - before > MIN_REGRESSION_MS and change > threshold
+            mark = "  <- 회귀" if regressed else ""
+            print(f"{name:<18}{phase:<8}{before:>10.3f}{after:>10.3f}{change:>+9.1%}{mark}")
+            if regressed:
+                regressions.append((name, phase))
+    return regressions
+
+
+def print_renderer_comparison(result):
+    """같은 장면을 전체 flip 렌더러와 dirty 렌더러로 잰 결과를 나란히 보여 줍니다."""
+    for name, entry in result["states"].items():
+        full = result["states"].get(name.removesuffix("_dirty"))
+        if not name.endswith("_dirty") or not full or "frame" not in entry or "frame" not in full:
+            continue
+        print(f"  렌더러 {name.removesuffix('_dirty'):<12} full p50 {full['frame']['p50']:.3f} ms "
+              f"(그리기 {full['draw']['p50']:.3f} + flip {full['flip']['p50']:.3f}) / "
+              f"dirty p50 {entry['frame']['p50']:.3f} ms "
+              f"(그리기 {entry['draw']['p50']:.3f} + flip {entry['flip']['p50']:.3f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="게임 상태별 프레임 비용 벤치마크")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES, help="상태마다 잴 프레임 수")
+    parser.add_argument("--out", default="benchmark.json", help="결과 JSON 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="저장된 두 결과만 비교")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="회귀로 볼 p95 증가 비율")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f:
+            old = json.load(f)
+        with open(args.compare[1], encoding="utf-8") as f:
+            new = json.load(f)
+    else:
+        new = run(args.frames)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(new, f, ensure_ascii=False, indent=2)
+        print(f"[벤치마크] 저장: {args.out} ({new['wall_seconds']} 초)")
+        for name, entry in new["states"].items():
+            if "frame" in entry:
+                print(f"  {name:<18} p50 {entry['frame']['p50']:.3f} ms / p95 {entry['frame']['p95']:.3f} ms / "
+                      f"p99 {entry['frame']['p99']:.3f} ms / 할당 {entry.get('alloc_kib_per_frame', 0):.1f} KiB / "
+                      f"히치 {entry['hitches']}")
+        print(f"  히치 {new['hitches']['count']} / {new['hitches']['frames']} 프레임")
+        print_renderer_comparison(new)
+        if not args.baseline:
+            return 0
+        with open(args.baseline, encoding="utf-8") as f:
+            old = json.load(f)
+
+    regressions = compare(old, new, args.threshold)
+    if regressions:
+        print(f"[벤치마크] 회귀 {len(regressions)}건 (기준 +{args.threshold:.0%})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
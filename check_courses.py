@@ -0,0 +1,63 @@
+"""
+생성된 코스를 한꺼번에 풀이 가능성 검사
+
+seed 여러 개로 챕터 코스를 만들고(고치기 전 그대로) game.check_course()로
+점프/2단 점프/슬라이드만으로 끝까지 갈 수 있는지 확인합니다. 코스 생성 규칙을 바꾼 뒤
+막히는 코스가 얼마나 나오는지, 검사에 시간이 얼마나 드는지 보는 용도입니다.
+
+    python check_courses.py                       # 챕터 1~3, seed 0~199
+    python check_courses.py --chapter 3 --seeds 1000
+    python check_courses.py --high-jump           # 높은 점프 스킬(A/D)을 쓴다고 보고 검사
+"""
+import os
+import sys
+import time
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import game
+
+SHOW_FAILURES = 10  # 챕터마다 보여줄 막히는 seed 수
+
+
+def check_chapter(chapter, seeds, jump_strength):
+    failures = []
+    times = []
+    for seed in seeds:
+        course = game.generate_course(chapter, seed, validate=False)
+        start = time.perf_counter()
+        ok, fail_tick = game.check_course(course, chapter, jump_strength)
+        times.append(time.perf_counter() - start)
+        if not ok:
+            failures.append((seed, fail_tick * game.SIM_STEP_MS / 1000.0))
+    return failures, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="생성된 코스 풀이 가능성 검사")
+    parser.add_argument("--chapter", type=int, choices=(1, 2, 3), help="검사할 챕터 (기본: 전부)")
+    parser.add_argument("--seeds", type=int, default=200, help="챕터마다 검사할 seed 수")
+    parser.add_argument("--start", type=int, default=0, help="첫 seed")
+    parser.add_argument("--high-jump", action="store_true", help="HIGH_JUMP_STRENGTH로 검사")
+    args = parser.parse_args()
+
+    if game.np is None:
+        print("NumPy가 없어 검사할 수 없습니다. (pip install numpy)")
+        return 1
+    jump_strength = game.HIGH_JUMP_STRENGTH if args.high_jump else game.JUMP_STRENGTH
+    seeds = range(args.start, args.start + args.seeds)
+    chapters = (args.chapter,) if args.chapter else (1, 2, 3)
+    for chapter in chapters:
+        failures, times = check_chapter(chapter, seeds, jump_strength)
+        times.sort()
+        print(f"챕터 {chapter}: {len(failures)}/{len(times)}개 막힘 ({len(failures) / len(times):.1%}), "
+              f"검사 평균 {sum(times) / len(times) * 1000:.0f} ms / 최대 {times[-1] * 1000:.0f} ms")
+        for seed, seconds in failures[:SHOW_FAILURES]:
+            print(f"    seed {seed}: {seconds:.1f}초 지점")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""
+챕터 난이도 몬테카를로 분석
+
+창 없이 World를 직접 돌려, 규칙 기반 봇이 챕터를 수천 번 플레이하게 합니다.
+판들은 CPU 코어 수만큼의 프로세스에 나눠 돌리고, 결과를 모아
+죽은 시각 분포, 등급 분포(F/D/C/B/A/A+), 가장 많이 죽인 패턴을 보여줍니다.
+
+    python difficulty.py --runs 2000                       # 챕터 1~3, 2000판씩
+    python difficulty.py --chapter 2 --speeds 6,9,11       # 속도 곡선을 바꿔서 비교
+    python difficulty.py --weights 0.4,0.3,0.3 --out after.json
+
+봇은 사람처럼 타이밍이 조금씩 흔들리고(--jitter), 가끔 장애물을 놓칩니다(--miss).
+스킬은 쓰지 않고, 아이템은 지나가다 먹으면 씁니다.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import game
+
+ROSTER = ("A", "B")
+GRADES = ("F", "D", "C", "B", "A (Fail)", "A", "A+")
+BATCH_RUNS = 25           # 프로세스 하나가 한 번에 맡는 판 수
+HISTOGRAM_BUCKET_S = 5    # 죽은 시각 분포를 묶는 간격(초)
+TOP_KILLERS = 8
+LOOKAHEAD_TICKS = 40      # 봇이 현재 점프 궤적을 미리 따라가 보는 틱 수
+
+
+class HeuristicBot:
+    """
+    화면 앞쪽의 장애물/구멍만 보고 점프/슬라이드를 정하는 봇입니다.
+    - 서서 부딪히는데 슬라이드로 피할 수 있는 장애물: 가까워지면 슬라이드
+    - 그 밖의 장애물: 넘는 데 필요한 시간만큼 앞에서 점프
+    - 구멍: 가장자리에서 점프
+    - 공중에서 지금 궤적대로면 부딪히거나 구멍에 떨어질 때: (꼭대기 근처에서) 2단 점프
+    jitter(틱)만큼 점프 시점이 흔들리고, miss 확률로 장애물 하나를 통째로 놓칩니다.
+    """
+
+    def __init__(self, rng, jitter=2.0, miss=0.02):
+        self.rng = rng
+        self.jitter = jitter
+        self.miss = miss
+        self.plans = {}  # spawn_id -> (놓쳤는지, 점프 시점 흔들림). 장애물마다 한 번만 정합니다.
+        self.windows = {}
+
+    def plan(self, sprite):
+        plan = self.plans.get(sprite.spawn_id)
+        if plan is None:
+            plan = (self.rng.random() < self.miss, self.rng.gauss(0.0, self.jitter))
+            self.plans[sprite.spawn_id] = plan
+        return plan
+
+    def decide(self, world):
+        player = world.current_player
+        if player.is_dead or player.is_reviving:
+            return game.NO_INPUT
+        speed = max(1.0, world.camera_x - world.prev_camera_x)
+        rect = player.rect
+        feet = rect.bottom
+        reach = rect.right + speed * LOOKAHEAD_TICKS
+        obstacles = sorted((o for o in world.obstacle_group if o.rect.right > rect.left and o.rect.left < reach),
+                           key=lambda o: o.rect.left)
+        pits = [p for p in world.pit_group if p.rect.right > rect.left and p.rect.left < reach]
+        platforms = [p for p in world.platform_group if p.rect.right > rect.left and p.rect.left < reach]
+
+        jump = slide = False
+        for obstacle in obstacles:
+            missed, jitter = self.plan(obstacle)
+            if missed:
+                continue
+            ticks_to = (obstacle.rect.left - rect.right) / speed
+            if obstacle.rect.bottom > feet - game.PLAYER_HEIGHT and obstacle.rect.bottom <= feet - game.SLIDE_HEIGHT:
+                # 슬라이드로 지나가는 장애물
+                slide = slide or ticks_to < 6 + jitter
+                continue
+            if obstacle.rect.top >= feet or obstacle.rect.bottom <= feet - game.PLAYER_HEIGHT:
+                continue  # 발 아래(다른 높이의 발판 위)이거나 머리 위
+            if not player.is_jumping:
+                # 점프 궤적이 장애물 높이보다 높은 구간 [first, last] 안에 장애물을 지나가도록 점프 시점을 고릅니다.
+                # 구간보다 오래 걸리면(느린 속도의 tall_jump 등) 높이가 되자마자 들어가고, 나머지는 2단 점프로 넘습니다.
+                first, last = self.jump_window(feet - obstacle.rect.top)
+                overlap_ticks = (obstacle.rect.width + rect.width) / speed
+                if overlap_ticks <= last - first:
+                    lead = (first + last) / 2 - overlap_ticks / 2
+                else:
+                    lead = first + 0.5
+                jump = jump or ticks_to <= max(1.0, lead) + jitter
+            break
+
+        if not player.is_jumping and not jump:
+            for pit in pits:
+                missed, jitter = self.plan(pit)
+                if not missed and (pit.rect.left - rect.right) / speed <= 1 + abs(jitter) * 0.5:
+                    jump = True
+
+        if player.is_jumping and player.double_jumps < player.max_jumps:
+            # 2단 점프는 지금 궤적대로면 부딪힐 때만 씁니다. 지금 뛰는 것이 나중에(1틱 뒤 ~ 부딪히기 전) 뛰는 어떤 경우보다
+            # 더 오래 버틸 때만 뛰고, 아니면 기다립니다. (같으면 기다려서 가장 늦게 뜀)
+            def hit(jump_after=None):
+                ticks = self.ticks_until_hit(rect, player.vel_y, speed, obstacles, pits, platforms, jump_after)
+                return LOOKAHEAD_TICKS if ticks is None else ticks
+            now = hit()
+            if now < LOOKAHEAD_TICKS:
+                best_later = max((hit(later) for later in range(1, now)), default=now)
+                jump = hit(0) > best_later
+        return game.InputFrame(jump=jump, slide=slide and not jump)
+
+    def jump_window(self, height):
+        """바닥에서 점프했을 때 발이 height 이상 올라가 있는 틱 범위 (처음, 마지막)"""
+        window = self.windows.get(height)
+        if window is None:
+            rise, vel, ticks = 0, game.JUMP_STRENGTH, []
+            for tick in range(1, LOOKAHEAD_TICKS):
+                vel += game.GRAVITY
+                rise -= vel
+                if rise >= height:
+                    ticks.append(tick)
+            window = self.windows[height] = (ticks[0], ticks[-1]) if ticks else (0, 0)
+        return window
+
+    def ticks_until_hit(self, rect, vel, speed, obstacles, pits, platforms, jump_after=None):
+        """
+        공중에서 지금 궤적대로(jump_after 틱 뒤에 한 번 더 점프) 날아가면
+        몇 틱 뒤에 장애물에 닿거나, 구멍 위에 떨어지거나, 다음 장애물을 넘기엔 너무 늦게 착지하는지. 안전하면 None
+        """
+        bottom = rect.bottom
+        for tick in range(1, LOOKAHEAD_TICKS):
+            if tick - 1 == jump_after:
+                vel = game.JUMP_STRENGTH
+            vel += game.GRAVITY
+            bottom += vel
+            shift = speed * tick
+            left, right = rect.left + shift, rect.right + shift
+            top = bottom - rect.height
+            for obstacle in obstacles:
+                o = obstacle.rect
+                if o.left < right and o.right > left and o.top < bottom and o.bottom > top:
+                    return tick
+            surface = None
+            if vel >= 0:
+                for platform in platforms:
+                    p = platform.rect
+                    if p.left + 10 < right and left < p.right - 10 and p.top <= bottom <= p.top + vel + 15:
+                        surface = p.top
+                        break
+            if surface is None and bottom >= game.GROUND_Y:
+                if any(p.rect.left < right and p.rect.right > left for p in pits):
+                    return tick
+                surface = game.GROUND_Y
+            if surface is not None:
+                return tick if self.lands_too_late(surface, right, speed, obstacles) else None
+        return None
+
+    def lands_too_late(self, surface, right, speed, obstacles):
+        """surface 높이에 착지했을 때 바로 앞 장애물을 점프로 넘을 시간이 없는지"""
+        for obstacle in obstacles:
+            o = obstacle.rect
+            if o.left < right or o.top >= surface or o.bottom <= surface - game.SLIDE_HEIGHT:
+                continue
+            return (o.left - right) / speed < self.jump_window(surface - o.top)[0]
+        return False
+
+
+def killer_of(world, player):
+    """죽은 원인이 된 코스 기록의 패턴 이름과 종류"""
+    course = world.course
+    for obstacle in world.obstacle_group.query(player.rect):
+        index = getattr(obstacle, "course_index", None)
+        if index is not None:
+            return f"{game.PATTERN_NAMES[course.patterns[index]]} ({obstacle.obs_type})"
+    for pit in world.pit_group:
+        if pit.rect.left < player.rect.right and pit.rect.right > player.rect.left:
+            index = getattr(pit, "course_index", None)
+            if index is not None:
+                return f"{game.PATTERN_NAMES[course.patterns[index]]} (pit)"
+    return "?"
+
+
+def play_run(chapter, seed, options):
+    """챕터 한 판(1번 주자 -> 이어달리기 2번 주자)을 끝까지 돌리고 결과 dict를 돌려줍니다."""
+    course = game.generate_course(chapter, seed, validate=not options["unchecked"])
+    world = game.World(ROSTER, chapter, seed=seed, course=course)
+    bot = HeuristicBot(random.Random(seed), options["jitter"], options["miss"])
+    deaths = []
+    while True:
+        world.step(bot.decide(world))
+        if world.outcome is None:
+            continue
+        if world.outcome in ("relay", "game_over"):
+            player = world.player1 if world.outcome == "relay" else world.player2
+            deaths.append(((world.now - world.start_time) / 1000.0, killer_of(world, player)))
+        if world.outcome == "relay":
+            world.start_relay()
+            continue
+        break
+    grade = world.final_grade
+    world.dispose()
+    return {"chapter": chapter, "seed": seed, "grade": grade, "deaths": deaths}
+
+
+def init_worker(overrides):
+    """작업 프로세스 시작: 난이도 상수를 덮어쓰고, 이미지 없이 색상 박스로 에셋을 채웁니다."""
+    for name, value in overrides.items():
+        setattr(game, name, value)
+    game.init_headless_assets()
+
+
+def run_batch(job):
+    chapter, seeds, options = job
+    return [play_run(chapter, seed, options) for seed in seeds]
+
+
+def summarize(results):
+    """챕터 하나의 결과 목록 -> 보고용 dict"""
+    grades = Counter(r["grade"] for r in results)
+    deaths = sorted(t for r in results for t, _ in r["deaths"])
+    killers = Counter(k for r in results for _, k in r["deaths"])
+    buckets = Counter(int(t // HISTOGRAM_BUCKET_S) * HISTOGRAM_BUCKET_S for t in deaths)
+
+    def percentile(q):
+        return round(deaths[min(len(deaths) - 1, int(q * len(deaths)))], 2) if deaths else None
+
+    return {
+        "runs": len(results),
+        "clear_rate": sum(1 for r in results if r["grade"] in ("A", "A+")) / len(results),
+        "grades": {g: grades[g] for g in GRADES if grades[g]},
+        "deaths": len(deaths),
+        "death_time_s": {"p10": percentile(0.10), "p50": percentile(0.50), "p90": percentile(0.90)},
+        "death_histogram": {f"{b}-{b + HISTOGRAM_BUCKET_S}s": buckets[b] for b in sorted(buckets)},
+        "killers": killers.most_common(TOP_KILLERS),
+    }
+
+
+def print_summary(chapter, summary):
+    print(f"\n챕터 {chapter}: {summary['runs']}판, 클리어 {summary['clear_rate']:.1%}, 죽음 {summary['deaths']}번")
+    print("  등급: " + ", ".join(f"{g} {n / summary['runs']:.1%}" for g, n in summary["grades"].items()))
+    times = summary["death_time_s"]
+    print(f"  죽은 시각: p10 {times['p10']}초 / p50 {times['p50']}초 / p90 {times['p90']}초")
+    peak = max(summary["death_histogram"].values(), default=1)
+    for bucket, count in summary["death_histogram"].items():
+        print(f"    {bucket:>8} {'#' * max(1, round(count / peak * 40))} {count}")
+    print("  많이 죽인 패턴:")
+    for name, count in summary["killers"]:
+        print(f"    {count / max(1, summary['deaths']):6.1%}  {name}")
+
+
+def parse_numbers(text, kind=float):
+    return [kind(part) for part in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="챕터 난이도 몬테카를로 분석")
+    parser.add_argument("--chapter", type=int, choices=(1, 2, 3), help="분석할 챕터 (기본: 전부)")
+    parser.add_argument("--runs", type=int, default=1000, help="챕터마다 돌릴 판 수")
+    parser.add_argument("--seed", type=int, default=0, help="첫 판의 seed (판마다 1씩 증가)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="작업 프로세스 수")
+    parser.add_argument("--jitter", type=float, default=2.0, help="봇 점프 시점 흔들림 (틱, 표준편차)")
+    parser.add_argument("--miss", type=float, default=0.02, help="봇이 장애물 하나를 놓칠 확률")
+    parser.add_argument("--unchecked", action="store_true", help="코스 풀이 가능성 검사/수정을 건너뜀 (빠름)")
+    parser.add_argument("--speeds", help="챕터 1,2,3 기본 속도 (예: 6,8,10)")
+    parser.add_argument("--boost", type=int, help="SPEED_BOOST_AFTER_SECONDS 뒤 더해지는 속도")
+    parser.add_argument("--boost-after", type=int, help="속도가 빨라지는 시각(초)")
+    parser.add_argument("--weights", help="절차 생성 가중치 장애물,구멍,발판 (예: 0.5,0.2,0.3)")
+    parser.add_argument("--delay-scale", type=float, help="구간 사이 간격(PATTERN_DELAY_BANDS) 배율")
+    parser.add_argument("--out", help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    overrides = {}
+    if args.speeds:
+        overrides["CHAPTER_SPEEDS"] = dict(zip((1, 2, 3), parse_numbers(args.speeds, int)))
+    if args.boost is not None:
+        overrides["SPEED_BOOST"] = args.boost
+    if args.boost_after is not None:
+        overrides["SPEED_BOOST_AFTER_SECONDS"] = args.boost_after
+    if args.weights:
+        overrides["PROCEDURAL_WEIGHTS"] = tuple(parse_numbers(args.weights))
+    if args.delay_scale is not None:
+        overrides["PATTERN_DELAY_BANDS"] = tuple((speed, round(low * args.delay_scale), round(high * args.delay_scale))
+                                                 for speed, low, high in game.PATTERN_DELAY_BANDS)
+    options = {"jitter": args.jitter, "miss": args.miss, "unchecked": args.unchecked}
+
+    chapters = (args.chapter,) if args.chapter else (1, 2, 3)
+    jobs = []
+    for chapter in chapters:
+        for start in range(args.seed, args.seed + args.runs, BATCH_RUNS):
+            jobs.append((chapter, range(start, min(start + BATCH_RUNS, args.seed + args.runs)), options))
+
+    started = time.perf_counter()
+    results = {chapter: [] for chapter in chapters}
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(overrides,)) as pool:
+        for done, batch in enumerate(pool.map(run_batch, jobs), 1):
+            for result in batch:
+                results[result["chapter"]].append(result)
+            print(f"\r[난이도] {done}/{len(jobs)} 묶음", end="", flush=True)
+    elapsed = time.perf_counter() - started
+    total = sum(len(r) for r in results.values())
+    print(f"\r[난이도] {total}판 {elapsed:.1f}초 ({args.workers}개 프로세스, {total / elapsed:.1f}판/초)")
+
+    report = {"overrides": {k: str(v) for k, v in overrides.items()}, "options": options, "chapters": {}}
+    for chapter in chapters:
+        summary = summarize(results[chapter])
+        report["chapters"][str(chapter)] = summary
+        print_summary(chapter, summary)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
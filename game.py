@@ -1,1232 +1,3594 @@
-import pygame
-import sys
-import random
-import os
-
-
-# 1. 게임 초기화
-pygame.init()
-pygame.mixer.init()
-
-# --- 2. 기본 상수 설정 ---
-SCREEN_WIDTH = 1200
-SCREEN_HEIGHT = 600
-FPS = 60
-
-# 색상 정의
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-RED = (255, 0, 0)
-GREEN = (0, 255, 0)
-BLUE = (0, 0, 255)
-DARK_BLUE = (0, 0, 139)
-LIGHT_BLUE = (173, 216, 230)
-YELLOW = (255, 255, 0)
-CYAN = (0, 255, 255)
-MAGENTA = (255, 0, 255)
-GREY = (100, 100, 100)
-
-# 캐릭터 데이터 정의
-CHARACTERS_COLOR = {
-    "A": RED, "B": GREEN, "C": BLUE, "D": YELLOW, "E": CYAN, "F": MAGENTA
-}
-CHARACTER_IDS = list(CHARACTERS_COLOR.keys())
-
-GROUND_Y = SCREEN_HEIGHT - 100
-
-# 플레이어 크기 및 속성
-PLAYER_START_X = 90
-PLAYER_START_Y = GROUND_Y
-PLAYER_WIDTH = 70
-PLAYER_HEIGHT = 90
-
-GRAVITY = 1.0
-JUMP_STRENGTH = -16
-HIGH_JUMP_STRENGTH = -22
-
-# --- 3. 게임 창 설정 ---
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("A+를 향해 달려라! (Final Fixed Ver.)")
-clock = pygame.time.Clock()
-
-# --- 4. 폰트 설정 ---
-try:
-    font_small = pygame.font.SysFont("malgungothic", 35)
-    font_medium = pygame.font.SysFont("malgungothic", 45)
-    font_large = pygame.font.SysFont("malgungothic", 60)
-    font_xl = pygame.font.SysFont("malgungothic", 80)
-    font_icon = pygame.font.SysFont("arialblack", 20)
-    font_obstacle = pygame.font.SysFont("arialblack", 30)
-except Exception as e:
-    font_small = pygame.font.SysFont(None, 40)
-    font_medium = pygame.font.SysFont(None, 50)
-    font_large = pygame.font.SysFont(None, 60)
-    font_xl = pygame.font.SysFont(None, 80)
-    font_icon = pygame.font.SysFont(None, 30)
-    font_obstacle = pygame.font.SysFont(None, 40)
-
-
-# --- 5. 이미지 에셋 로드 함수 (경로 문제 완벽 해결 버전) ---
-def load_image(filename, width, height, color_fallback):
-    """
-    이미지를 로드합니다.
-    실행 위치와 상관없이, 무조건 game.py 파일이 있는 폴더를 기준으로 파일을 찾습니다.
-    """
-    # 1. 현재 실행 중인 파이썬 파일(game.py)의 폴더 경로를 확실하게 알아냅니다.
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-
-    # 2. 우선 game.py 옆에서 찾아봅니다.
-    path = os.path.join(current_dir, filename)
-
-    # 3. 없으면 assets 폴더 안도 찾아봅니다.
-    if not os.path.exists(path):
-        path = os.path.join(current_dir, "assets", filename)
-
-    try:
-        if os.path.exists(path):
-            image = pygame.image.load(path).convert_alpha()
-
-            # 크기 조절 (0보다 클 때만)
-            if width > 0 and height > 0:
-                image = pygame.transform.scale(image, (width, height))
-            else:
-                # 로그가 너무 많으면 정신없으므로 원본 사용 알림은 주석 처리해도 됩니다.
-                # print(f"[알림] {filename} 원본 크기 사용")
-                pass
-
-            print(f"[성공] 로드됨: {filename}")
-            return image
-        else:
-            # 파일을 못 찾았을 때, 컴퓨터가 어디를 뒤졌는지 경로를 출력해줍니다. (디버깅용)
-            print(f"[실패] 파일 없음: {filename}")
-            print(f"      (탐색한 위치: {path})")
-            raise FileNotFoundError
-
-    except Exception as e:
-        # 이미지가 없을 때 색상 박스로 대체
-        target_w = width if width > 0 else 50
-        target_h = height if height > 0 else 50
-        surf = pygame.Surface((target_w, target_h))
-        surf.fill(color_fallback)
-        return surf
-
-
-def load_game_assets():
-    print("--- 에셋 로딩 시작 ---")
-    assets = {
-        "backgrounds": {},
-        "characters": {},
-        "road": None,
-        "items": {},
-        "die": None,
-        "title_screen": None,
-        "obstacles": {
-            1: {"force_jump": [], "tall_jump": [], "force_slide": []},
-            2: {"force_jump": [], "tall_jump": [], "force_slide": []},
-            3: {"force_jump": [], "tall_jump": [], "force_slide": []}
-        }
-    }
-
-    # 1. 배경 이미지 로드
-    bg_width = SCREEN_WIDTH * 2
-    for i in range(1, 4):
-        bg = load_image(f"background{i}.png", bg_width, SCREEN_HEIGHT, BLACK)
-        assets["backgrounds"][i] = bg
-
-    # 2. 캐릭터 이미지 로드
-    for char_id in CHARACTER_IDS:
-        char_assets = {"run": [], "jump": None, "slide": None}
-        base_color = CHARACTERS_COLOR[char_id]
-        for frame in range(1, 4):
-            fname = f"{char_id}{frame}.png"
-            img = load_image(fname, PLAYER_WIDTH, PLAYER_HEIGHT, base_color)
-            char_assets["run"].append(img)
-        fname_jump = f"{char_id}J.png"
-        char_assets["jump"] = load_image(fname_jump, PLAYER_WIDTH, PLAYER_HEIGHT, base_color)
-        fname_slide = f"{char_id}S.png"
-        char_assets["slide"] = load_image(fname_slide, PLAYER_WIDTH, PLAYER_HEIGHT//2, base_color)
-        char_assets["portrait"] = load_image(f"{char_id}.png", 1000, 1000, base_color)
-        assets["characters"][char_id] = char_assets
-
-    # 3. 아이템 이미지 로드
-    assets["items"]["invincibility"] = load_image("Item1.png", 60, 60, CYAN)
-    assets["items"]["dash"] = load_image("Item2.png", 60, 60, YELLOW)
-
-    # 4. 도로 이미지 로드
-    assets["road"] = load_image("road.png", 0, 0, DARK_BLUE)
-
-    # 5. 비석 이미지 로드
-    assets["die"] = load_image("Die.png", 80, 80, GREY)
-
-    # 6. 장애물 이미지 로드 (챕터/타입별)
-    type_map = {
-        "Small": "force_jump",
-        "Tall": "tall_jump",
-        "Slide": "force_slide"
-    }
-    for chapter in range(1, 4):
-        for file_type, game_type in type_map.items():
-            for i in range(1, 6):
-                fname = f"Obs_C{chapter}_{file_type}_{i}.png"
-                path = fname
-                if not os.path.exists(path): path = os.path.join("assets", fname)
-                if os.path.exists(path):
-                    img = pygame.image.load(path).convert_alpha()
-                    assets["obstacles"][chapter][game_type].append(img)
-                    print(f"[성공] 장애물 로드: {fname} -> {game_type}")
-    # 타이틀
-    assets["title_screen"] = load_image("1screen.png", SCREEN_WIDTH, SCREEN_HEIGHT, BLUE)
-
-
-    print("--- 에셋 로딩 완료 ---\n")
-    return assets
-
-
-GAME_ASSETS = load_game_assets()
-
-# --- 6. 게임 진행도 변수 ---
-max_unlocked_chapter = 1
-character_roster = []
-
-
-# --- 7. 플레이어 클래스 ---
-class Player(pygame.sprite.Sprite):
-    def __init__(self, char_id):
-        super().__init__()
-        self.character_id = char_id
-        self.assets = GAME_ASSETS["characters"][char_id]
-        self.image = self.assets["run"][0]
-        self.rect = pygame.Rect(PLAYER_START_X, PLAYER_START_Y - PLAYER_HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT)
-        self.run_index = 0
-        self.anim_timer = 0
-        self.anim_speed = 0.15
-        self.vel_y = 0
-        self.is_jumping = True
-        self.is_sliding = False
-        self.is_dead = False
-        self.is_reviving = False
-        self.double_jumps = 0
-        self.max_jumps = 2
-        self.effect_active = False
-        self.effect_start_time = 0
-        self.effect_duration = 3000
-        self.current_effect_color = None
-        self.high_jump_active = False
-        self.high_jump_end_time = 0
-        self.is_big = False
-        self.skill_used_this_chapter = False
-        self.is_visible = True
-
-    def update(self, pit_group, platform_group, speed):
-        if self.is_dead:
-            self.rect.x -= speed
-            return
-
-        keys = pygame.key.get_pressed()
-
-        # [슬라이드 키 입력] 공중에 살짝 떠도 슬라이드 상태 유지
-        if keys[pygame.K_DOWN] and (not self.is_jumping or self.is_sliding):
-            self.slide(True)
-        else:
-            self.slide(False)
-
-        self.vel_y += GRAVITY
-        self.rect.y += self.vel_y
-
-        on_platform = False
-
-        # [수정] 떨어지는 중이거나(vel_y > 0) 바닥에 붙어있을 때 발판 체크
-        # '+ 15'로 인식 범위를 늘려서 슬라이드 시 발이 살짝 들려도 놓치지 않게 함
-        if self.vel_y >= 0:
-            platform_hits = pygame.sprite.spritecollide(self, platform_group, False)
-            for platform in platform_hits:
-                # 발바닥이 발판 상단보다 살짝 아래(15px)까지 허용 -> 확실하게 밟힘
-                if self.rect.bottom <= platform.rect.top + (self.vel_y + 15) and self.rect.bottom >= platform.rect.top:
-                    if self.rect.right > platform.rect.left + 10 and self.rect.left < platform.rect.right - 10:
-                        self.rect.bottom = platform.rect.top
-                        self.vel_y = 0
-                        self.is_jumping = False
-                        self.double_jumps = 0
-                        on_platform = True
-                        break
-
-        # 바닥(GROUND) 체크
-        if self.rect.top > GROUND_Y:
-            self.is_dead = True
-            self.vel_y = 0
-            return
-
-        on_ground = (self.rect.bottom >= GROUND_Y)
-
-        if on_platform:
-            pass
-        elif on_ground:
-            pit_hit_list = pygame.sprite.spritecollide(self, pit_group, False)
-            if pit_hit_list:
-                self.is_jumping = True
-            else:
-                self.rect.bottom = GROUND_Y
-                self.vel_y = 0
-                self.is_jumping = False
-                self.double_jumps = 0
-        else:
-            self.is_jumping = True
-
-        self.update_animation()
-
-        # (이펙트 처리 코드는 기존과 동일하므로 생략하지 않고 그대로 두셔도 됩니다)
-        # ... 아래 이펙트 코드는 그대로 두세요 ...
-        if self.effect_active:
-            current_time = pygame.time.get_ticks()
-            time_elapsed = current_time - self.effect_start_time
-            time_remaining = self.effect_duration - time_elapsed
-            if time_remaining <= 0:
-                self.deactivate_effect()
-            elif time_remaining < 1000:
-                self.is_visible = (current_time // 100) % 2 == 0
-            else:
-                self.is_visible = True
-        else:
-            self.is_visible = True
-
-        if self.high_jump_active:
-            if pygame.time.get_ticks() > self.high_jump_end_time:
-                self.high_jump_active = False
-
-        if self.is_reviving:
-            self.rect.x += speed * 0.5
-            if self.rect.centerx >= (PLAYER_START_X + PLAYER_WIDTH / 2):
-                self.is_reviving = False
-                self.rect.centerx = PLAYER_START_X + PLAYER_WIDTH / 2
-        else:
-            self.rect.centerx = PLAYER_START_X + (PLAYER_WIDTH / 2)
-
-    def update_animation(self):
-        if self.is_sliding:
-            self.image = self.assets["slide"]
-        elif self.is_jumping:
-            self.image = self.assets["jump"]
-        else:
-            self.anim_timer += 1 / FPS
-            if self.anim_timer >= self.anim_speed:
-                self.anim_timer = 0
-                self.run_index = (self.run_index + 1) % 3
-                self.image = self.assets["run"][self.run_index]
-
-    def jump(self):
-        jump_power = HIGH_JUMP_STRENGTH if self.high_jump_active else JUMP_STRENGTH
-        if self.double_jumps < self.max_jumps:
-            self.vel_y = jump_power
-            self.is_jumping = True
-            self.double_jumps += 1
-
-    def slide(self, is_sliding_key_pressed):
-        # 1. 슬라이드 시작
-        if is_sliding_key_pressed and not self.is_sliding:
-            self.is_sliding = True
-            # 현재 발 위치(midbottom)를 기억해둡니다.
-            current_pos = self.rect.midbottom
-            # 슬라이드 크기(높이 절반)로 Rect를 새로 잡되, 발 위치는 그대로 유지합니다.
-            self.rect = pygame.Rect(self.rect.x, 0, PLAYER_WIDTH, PLAYER_HEIGHT // 2)
-            self.rect.midbottom = current_pos
-
-        # 2. 슬라이드 끝 (일어서기)
-        elif not is_sliding_key_pressed and self.is_sliding:
-            self.is_sliding = False
-            # 다시 원래 발 위치를 기준으로 일어섭니다.
-            current_pos = self.rect.midbottom
-            self.rect = pygame.Rect(self.rect.x, 0, PLAYER_WIDTH, PLAYER_HEIGHT)
-            self.rect.midbottom = current_pos
-
-    def draw(self, surface):
-        if not self.is_visible: return
-        if self.is_dead:
-            self.draw_dead(surface, force_y=GROUND_Y)
-            return
-        surface.blit(self.image, self.rect)
-
-    def draw_dead(self, surface, force_y=None):
-        die_image = GAME_ASSETS["die"]
-        bottom_y = force_y if force_y is not None else self.rect.bottom
-        center_x = self.rect.centerx
-        die_rect = die_image.get_rect(midbottom=(center_x, bottom_y))
-        surface.blit(die_image, die_rect)
-
-    def activate_skill(self):
-        current_time = pygame.time.get_ticks()
-        if not self.skill_used_this_chapter:
-            self.skill_used_this_chapter = True
-
-            # [수정] A 또는 D일 때: 높은 점프 (RED 효과)
-            if self.character_id in ['A', 'D']:
-                self.high_jump_active = True
-                self.high_jump_end_time = current_time + self.effect_duration
-                # D도 A와 똑같이 빨간색 이펙트를 냅니다.
-                # (만약 D는 노란색을 내고 싶다면 apply_effect(YELLOW, ...)로 색만 분기하면 됩니다)
-                self.apply_effect(RED, is_big=False)
-
-            # [수정] B 또는 E일 때: 거대화 (CYAN 효과)
-            elif self.character_id in ['B', 'E']:
-                self.apply_effect(CYAN, is_big=True)
-
-            # [수정] C 또는 F일 때: 대시 (YELLOW 효과)
-            elif self.character_id in ['C', 'F']:
-                self.apply_effect(YELLOW, is_big=False)
-
-            else:
-                # 스킬이 없는 캐릭터 (현재는 없음)
-                self.skill_used_this_chapter = False
-        else:
-            print("스킬을 이미 사용했습니다.")
-
-    def activate_item_effect(self, item_type):
-        if item_type == 'invincibility':
-            self.apply_effect(CYAN, is_big=True)
-        elif item_type == 'dash':
-            self.apply_effect(YELLOW, is_big=False)
-
-    def apply_effect(self, color, is_big=False):
-        self.effect_active = True
-        self.effect_start_time = pygame.time.get_ticks()
-        self.current_effect_color = color
-        self.is_big = is_big
-        self.is_visible = True
-
-    def deactivate_effect(self):
-        self.effect_active = False
-        self.current_effect_color = None
-        self.is_big = False
-        self.is_visible = True
-
-    def revive(self, start_x):
-        self.is_dead = False
-        self.is_reviving = True
-        self.rect.bottomleft = (start_x, GROUND_Y)
-        self.vel_y = 0
-        self.is_jumping = True
-        self.double_jumps = 0
-        self.is_visible = True
-        self.deactivate_effect()
-
-
-# --- 8. 장애물 클래스 ---
-class Obstacle(pygame.sprite.Sprite):
-    def __init__(self, obs_type, chapter, x_pos=SCREEN_WIDTH, y_pos=GROUND_Y):
-        super().__init__()
-        self.obs_type = obs_type
-
-        # 크기 설정 (너비 40)
-        if self.obs_type == 'force_jump':
-            width, height = 30, 60
-            self.rect = pygame.Rect(0, 0, width, height)
-            self.rect.bottomleft = (x_pos, y_pos)
-        elif self.obs_type == 'tall_jump':
-            width, height = 30, 110
-            self.rect = pygame.Rect(0, 0, width, height)
-            self.rect.bottomleft = (x_pos, y_pos)
-        elif self.obs_type == 'force_slide':
-            width, height = 30, 230
-            self.rect = pygame.Rect(0, 0, width, height)
-            self.rect.bottomleft = (x_pos, y_pos - 70)
-
-        # 이미지 랜덤 적용
-        if GAME_ASSETS["obstacles"][chapter][self.obs_type]:
-            chosen_image = random.choice(GAME_ASSETS["obstacles"][chapter][self.obs_type])
-            self.image = pygame.transform.scale(chosen_image, (width, height))
-        else:
-            self.image = pygame.Surface([width, height])
-            self.image.fill(RED)
-            pygame.draw.rect(self.image, WHITE, (5, 5, width - 10, height - 10), 3)
-            try:
-                text = font_obstacle.render("F", True, WHITE)
-                text_rect = text.get_rect(center=(width // 2, height // 2))
-                self.image.blit(text, text_rect)
-            except:
-                pass
-
-    def update(self, speed):
-        self.rect.x -= speed
-        if self.rect.right < 0:
-            self.kill()
-
-    def draw(self, surface):
-        surface.blit(self.image, self.rect)
-
-
-# --- 9. 구멍 클래스 ---
-class Pit(pygame.sprite.Sprite):
-    def __init__(self, x_pos=SCREEN_WIDTH, width=None):
-        super().__init__()
-        if width is None:
-            pit_width = random.randint(100, 250)
-        else:
-            pit_width = width
-        self.image = pygame.Surface([pit_width, 100])
-        self.image.fill(BLACK)
-        self.rect = self.image.get_rect(topleft=(x_pos, GROUND_Y))
-
-    def update(self, speed):
-        self.rect.x -= speed
-        if self.rect.right < 0: self.kill()
-
-    def draw(self, surface):
-        surface.blit(self.image, self.rect)
-
-
-# --- 10. 플랫폼 클래스 ---
-class Platform(pygame.sprite.Sprite):
-    def __init__(self, plat_type, width, x_pos=SCREEN_WIDTH, y_pos=None):
-        super().__init__()
-        self.plat_type = plat_type
-        plat_width = width
-        plat_height = 40
-
-        if self.plat_type == 'floating':
-            plat_y = y_pos if y_pos is not None else random.randint(GROUND_Y - 180, GROUND_Y - 100)
-        elif self.plat_type == 'low_ground':
-            plat_y = y_pos if y_pos is not None else GROUND_Y - 80
-        elif self.plat_type == 'ground':
-            plat_y = y_pos if y_pos is not None else GROUND_Y
-
-        self.image = pygame.Surface([plat_width, plat_height])
-        road_img = GAME_ASSETS.get("road")
-        if road_img and road_img.get_width() > 1:
-            img_w = road_img.get_width()
-            img_h = road_img.get_height()
-            scale_factor = plat_height / img_h
-            new_w = int(img_w * scale_factor)
-            new_h = plat_height
-            scaled_road = pygame.transform.scale(road_img, (new_w, new_h))
-            for x in range(0, plat_width, new_w):
-                self.image.blit(scaled_road, (x, 0))
-        else:
-            self.image.fill(DARK_BLUE)
-            pygame.draw.rect(self.image, LIGHT_BLUE, (0, 0, plat_width, plat_height // 3))
-        self.rect = self.image.get_rect(topleft=(x_pos, plat_y))
-
-    def update(self, speed):
-        self.rect.x -= speed
-        if self.rect.right < 0: self.kill()
-
-    def draw(self, surface):
-        surface.blit(self.image, self.rect)
-
-
-# --- 11. 아이템/젤리 등 ---
-class Item(pygame.sprite.Sprite):
-    def __init__(self, item_type):
-        super().__init__()
-        self.item_type = item_type
-        if self.item_type == 'invincibility':
-            self.image = GAME_ASSETS["items"]["invincibility"]
-        elif self.item_type == 'dash':
-            self.image = GAME_ASSETS["items"]["dash"]
-        else:
-            self.image = pygame.Surface([60, 60])
-            self.image.fill(YELLOW)
-        float_y = random.randint(GROUND_Y - 120, GROUND_Y - 50)
-        self.rect = self.image.get_rect(midleft=(SCREEN_WIDTH, float_y))
-
-    def update(self, speed):
-        self.rect.x -= speed
-        if self.rect.right < 0: self.kill()
-
-    def draw(self, surface):
-        surface.blit(self.image, self.rect)
-
-
-class Collectible(pygame.sprite.Sprite):
-    def __init__(self, coll_type, x_pos=SCREEN_WIDTH, y_pos=None):
-        super().__init__()
-        self.coll_type = coll_type
-        self.image = pygame.Surface([20, 25])
-        self.image.fill(BLACK)
-        self.image.set_colorkey(BLACK)
-        if self.coll_type == 'grade_point':
-            pygame.draw.rect(self.image, MAGENTA, (0, 0, 20, 25), border_radius=7)
-        if y_pos is None: y_pos = random.randint(GROUND_Y - 180, GROUND_Y - 50)
-        self.rect = self.image.get_rect(midleft=(x_pos, y_pos))
-
-    def update(self, speed):
-        self.rect.x -= speed
-        if self.rect.right <20: self.kill()
-
-    def draw(self, surface):
-        surface.blit(self.image, self.rect)
-
-
-class SpeedLine(pygame.sprite.Sprite):
-    def __init__(self):
-        super().__init__()
-        self.image = pygame.Surface([random.randint(20, 40), 2])
-        self.image.fill(WHITE)
-        y_pos = random.randint(0, SCREEN_HEIGHT)
-        self.rect = self.image.get_rect(topleft=(SCREEN_WIDTH, y_pos))
-
-    def update(self, speed):
-        self.rect.x -= speed * 5
-        if self.rect.right < 0: self.kill()
-
-
-# --- 12. 버튼 정의 ---
-chapter_buttons = {
-    1: pygame.Rect(SCREEN_WIDTH // 4 - 100, SCREEN_HEIGHT // 2 - 75, 200, 150),
-    2: pygame.Rect(SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 - 75, 200, 150),
-    3: pygame.Rect(SCREEN_WIDTH * 3 // 4 - 100, SCREEN_HEIGHT // 2 - 75, 200, 150),
-}
-confirm_yes_button = pygame.Rect(SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2 + 50, 120, 50)
-confirm_no_button = pygame.Rect(SCREEN_WIDTH // 2 + 30, SCREEN_HEIGHT // 2 + 50, 120, 50)
-
-character_buttons = {}
-btn_width, btn_height = 100, 100
-btn_spacing = 40
-total_width = (btn_width * 6) + (btn_spacing * 5)
-start_x = (SCREEN_WIDTH - total_width) / 2
-for i, (char_id, char_color) in enumerate(CHARACTERS_COLOR.items()):
-    x = start_x + i * (btn_width + btn_spacing)
-    y = SCREEN_HEIGHT // 2 - 50
-    character_buttons[char_id] = pygame.Rect(x, y, btn_width, btn_height)
-
-restart_button_rect = pygame.Rect((SCREEN_WIDTH - 160) / 2, (SCREEN_HEIGHT // 2) + 80, 160, 60)
-relay_yes_button_rect = pygame.Rect((SCREEN_WIDTH // 2 - 150), (SCREEN_HEIGHT // 2 + 50), 120, 50)
-relay_no_button_rect = pygame.Rect((SCREEN_WIDTH // 2 + 30), (SCREEN_HEIGHT // 2 + 50), 120, 50)
-
-
-# --- 13. 메인 게임 루프 ---
-def main_game():
-    global max_unlocked_chapter, character_roster
-
-    player1 = None
-    player2 = None
-    current_player = None
-
-    obstacle_group = pygame.sprite.Group()
-    item_group = pygame.sprite.Group()
-    pit_group = pygame.sprite.Group()
-    platform_group = pygame.sprite.Group()
-    speed_line_group = pygame.sprite.Group()
-    collectible_group = pygame.sprite.Group()
-    ground_group = pygame.sprite.Group()
-
-    game_state = "TITLE_SCREEN"
-
-    try:
-        if os.path.exists("open.wav") or os.path.exists("assets/open.wav"):
-            pygame.mixer.music.load('open.wav' if os.path.exists("open.wav") else "assets/open.wav")
-            pygame.mixer.music.play(-1)
-    except:
-        pass
-
-    game_start_time = 0
-    elapsed_seconds = 0
-    score = 0
-    relay_prompt_start_time = 0
-    selected_chapter = 0
-    current_chapter = 1
-    current_obstacle_speed = 7
-    final_grade = ""
-    last_obstacle_spawn_time = 0
-    next_obstacle_spawn_delay = 4500
-    item_spawn_count = 0
-    item_spawn_limit = 0
-    selected_char_index = 0
-    selected_button_index = 0
-    transition_start_time = 0
-
-    current_background = None
-    background_x = 0
-
-    ITEM_SPAWN_TIMER = pygame.USEREVENT + 2
-    pygame.time.set_timer(ITEM_SPAWN_TIMER, 6000)
-    COLLECTIBLE_SPAWN_TIMER = pygame.USEREVENT + 3
-    pygame.time.set_timer(COLLECTIBLE_SPAWN_TIMER, 1000)
-
-    running = True
-    while running:
-        current_time_ticks = pygame.time.get_ticks()
-        mouse_pos = pygame.mouse.get_pos()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-
-            if game_state == "TITLE_SCREEN":
-                if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
-                    if not character_roster:
-                        game_state = "CHARACTER_SELECT"
-                    else:
-                        game_state = "CHAPTER_SELECT"
-
-            elif game_state == "CHAPTER_SELECT":
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    for chapter, rect in chapter_buttons.items():
-                        if chapter == 2 and max_unlocked_chapter < 2: continue
-                        if rect.collidepoint(event.pos):
-                            if chapter <= max_unlocked_chapter:
-                                selected_chapter = chapter
-                                selected_button_index = 0
-                                game_state = "CONFIRM_START"
-
-            elif game_state == "CONFIRM_START":
-                if event.type == pygame.KEYDOWN:
-                    if event.key in (pygame.K_LEFT, pygame.K_UP):
-                        selected_button_index = 0
-                    elif event.key in (pygame.K_RIGHT, pygame.K_DOWN):
-                        selected_button_index = 1
-                    elif event.key in (pygame.K_SPACE, pygame.K_RETURN):
-                        if selected_button_index == 0:
-                            game_state = "LOADING_TRANSITION"
-                            transition_start_time = current_time_ticks
-                        else:
-                            game_state = "CHAPTER_SELECT"
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    if confirm_yes_button.collidepoint(event.pos):
-                        game_state = "LOADING_TRANSITION"
-                        transition_start_time = current_time_ticks
-                    elif confirm_no_button.collidepoint(event.pos):
-                        game_state = "CHAPTER_SELECT"
-
-            elif game_state == "CHARACTER_SELECT":
-                if event.type == pygame.KEYDOWN:
-                    if event.key in (pygame.K_LEFT, pygame.K_UP):
-                        selected_char_index = (selected_char_index - 1) % 6
-                    elif event.key in (pygame.K_RIGHT, pygame.K_DOWN):
-                        selected_char_index = (selected_char_index + 1) % 6
-                    elif event.key in (pygame.K_SPACE, pygame.K_RETURN):
-                        char_id = CHARACTER_IDS[selected_char_index]
-                        if len(character_roster) < 2 and char_id not in character_roster:
-                            character_roster.append(char_id)
-                            if len(character_roster) == 2:
-                                game_state = "CHAPTER_SELECT"
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    for i, rect in enumerate(character_buttons.values()):
-                        if rect.collidepoint(event.pos):
-                            char_id = CHARACTER_IDS[i]
-                            if len(character_roster) < 2 and char_id not in character_roster:
-                                character_roster.append(char_id)
-                                if len(character_roster) == 2:
-                                    game_state = "CHAPTER_SELECT"
-
-            elif game_state == "PLAYING":
-                if event.type == pygame.KEYDOWN:
-                    jump_sound = pygame.mixer.Sound("jump.mp3")
-                    if event.key == pygame.K_UP: current_player.jump()
-                    if event.key == pygame.K_UP: jump_sound.play()
-                    if event.key == pygame.K_SPACE: current_player.activate_skill()
-                    if event.key == pygame.K_p: game_state = "PAUSED"
-                    if event.key == pygame.K_ESCAPE: running = False
-                if event.type == ITEM_SPAWN_TIMER and item_spawn_count < item_spawn_limit:
-                    item_type = random.choice(['invincibility', 'dash'])
-                    new_item = Item(item_type)
-                    all_obstacles = pygame.sprite.Group(obstacle_group, platform_group, ground_group)
-                    if not pygame.sprite.spritecollide(new_item, all_obstacles, False):
-                        item_spawn_count += 1
-                        item_group.add(new_item)
-                if event.type == COLLECTIBLE_SPAWN_TIMER:
-                    if random.random() < 0.7: collectible_group.add(Collectible('grade_point'))
-
-            elif game_state == "PAUSED":
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_p: game_state = "PLAYING"
-                    if event.key == pygame.K_ESCAPE: running = False
-
-            elif game_state == "RELAY_PROMPT":
-                if event.type == pygame.KEYDOWN:
-                    if event.key in (pygame.K_LEFT, pygame.K_UP):
-                        selected_button_index = 0
-                    elif event.key in (pygame.K_RIGHT, pygame.K_DOWN):
-                        selected_button_index = 1
-                    elif event.key in (pygame.K_SPACE, pygame.K_RETURN):
-                        if selected_button_index == 0:
-                            current_player = player2
-                            current_player.revive(player1.rect.x - 150)
-                            obstacle_group.empty();
-                            item_group.empty();
-                            pit_group.empty()
-                            platform_group.empty();
-                            speed_line_group.empty();
-                            collectible_group.empty()
-                            game_state = "PLAYING"
-                        else:
-                            game_state = "GAME_OVER"
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    if relay_yes_button_rect.collidepoint(event.pos):
-                        current_player = player2
-                        current_player.revive(player1.rect.x - 150)
-                        obstacle_group.empty();
-                        item_group.empty();
-                        pit_group.empty()
-                        platform_group.empty();
-                        speed_line_group.empty();
-                        collectible_group.empty()
-                        game_state = "PLAYING"
-                    elif relay_no_button_rect.collidepoint(event.pos):
-                        game_state = "GAME_OVER"
-
-            elif game_state == "GAME_OVER":
-                if (event.type == pygame.KEYDOWN and event.key in (pygame.K_SPACE, pygame.K_RETURN)) or \
-                        (event.type == pygame.MOUSEBUTTONDOWN and restart_button_rect.collidepoint(event.pos)):
-                    game_state = "TITLE_SCREEN"
-                    max_unlocked_chapter = 1
-                    character_roster = []
-                    player1 = None;
-                    player2 = None;
-                    current_player = None
-                    obstacle_group.empty();
-                    item_group.empty();
-                    pit_group.empty()
-                    platform_group.empty();
-                    speed_line_group.empty();
-                    collectible_group.empty()
-                    ground_group.empty()
-
-            elif game_state == "GAME_CLEAR":
-                if final_grade != "A+":
-                    if (event.type == pygame.KEYDOWN and event.key in (pygame.K_SPACE, pygame.K_RETURN)) or \
-                            (event.type == pygame.MOUSEBUTTONDOWN and restart_button_rect.collidepoint(event.pos)):
-                        game_state = "CHAPTER_SELECT"
-                        obstacle_group.empty();
-                        item_group.empty();
-                        pit_group.empty()
-                        platform_group.empty();
-                        speed_line_group.empty();
-                        collectible_group.empty()
-                        ground_group.empty()
-                else:
-                    if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
-                        game_state = "HIDDEN_CREDIT"
-
-            elif game_state == "HIDDEN_CREDIT":
-                if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
-                    game_state = "TITLE_SCREEN"
-                    character_roster = []
-
-        if game_state == "PLAYING":
-            if not player1.is_dead:
-                current_player = player1
-            else:
-                current_player = player2
-
-            elapsed_time = current_time_ticks - game_start_time
-            elapsed_seconds = elapsed_time // 1000
-            time_boost = 1 if elapsed_seconds > 30 else 0
-            current_accelerated_speed = current_obstacle_speed + time_boost
-            speed_multiplier = 1.0
-            if (current_player.effect_active and current_player.current_effect_color == YELLOW):
-                speed_multiplier = 3.0
-            final_speed = current_accelerated_speed * speed_multiplier
-
-            if speed_multiplier > 1.0 or current_player.is_reviving:
-                if random.randint(1, 4) == 1: speed_line_group.add(SpeedLine())
-
-            if current_background:
-                bg_width = current_background.get_width()
-                max_scroll = bg_width - SCREEN_WIDTH
-                progress = min(elapsed_seconds / 45.0, 1.0)
-                background_x = - (max_scroll * progress)
-
-            player1.update(pit_group, platform_group, final_speed)
-            player2.update(pit_group, platform_group, final_speed)
-            obstacle_group.update(final_speed)
-            item_group.update(final_speed)
-            pit_group.update(final_speed)
-            platform_group.update(final_speed)
-            speed_line_group.update(final_speed)
-            collectible_group.update(final_speed)
-            ground_group.update(final_speed)
-
-            if ground_group:
-                last_ground = max(ground_group, key=lambda g: g.rect.right)
-                if last_ground.rect.right < SCREEN_WIDTH + 200:
-                    new_plat_width = random.randint(300, 550)
-                    ground_group.add(Platform('ground', new_plat_width, x_pos=last_ground.rect.right))
-
-            if elapsed_seconds > 45:
-                if current_chapter == 3 and current_player is player1:
-                    final_grade = "A+"
-                    game_state = "GAME_CLEAR"
-                else:
-                    final_grade = "A"
-                    if current_chapter == max_unlocked_chapter:
-                        max_unlocked_chapter = min(max_unlocked_chapter + 1, 3)
-                    if current_chapter < 3:
-                        game_state = "CHAPTER_SELECT"
-                    else:
-                        game_state = "GAME_CLEAR"
-
-            if current_time_ticks - last_obstacle_spawn_time > next_obstacle_spawn_delay:
-                spawn_choice = random.choices(['obstacle', 'pit', 'platform'], weights=[0.5, 0.2, 0.3], k=1)[0]
-                if spawn_choice == 'obstacle':
-                    obstacle_group.add(
-                        Obstacle(random.choice(['force_jump', 'force_slide', 'tall_jump']), chapter=current_chapter))
-                elif spawn_choice == 'pit':
-                    if not platform_group: pit_group.add(Pit())
-                else:
-                    plat_type = random.choice(['floating', 'low_ground'])
-                    new_width = random.randint(300, 550) if plat_type == 'floating' else random.randint(300, 600)
-                    new_platform = Platform(plat_type, new_width)
-                    platform_group.add(new_platform)
-                    if random.random() < 0.5:
-                        obs_type = random.choice(['force_jump', 'tall_jump'])
-                        obstacle_x = SCREEN_WIDTH + random.randint(30, new_width - 60)
-                        obstacle_y = new_platform.rect.top
-                        obstacle_group.add(
-                            Obstacle(obs_type, chapter=current_chapter, x_pos=obstacle_x, y_pos=obstacle_y))
-
-                last_obstacle_spawn_time = current_time_ticks
-                if current_accelerated_speed < 9:
-                    next_obstacle_spawn_delay = random.randint(400, 1200)
-                elif current_accelerated_speed < 12:
-                    next_obstacle_spawn_delay = random.randint(300, 900)
-                else:
-                    next_obstacle_spawn_delay = random.randint(250, 700)
-
-            # 젤리 충돌 (버그 수정됨)
-            for item in pygame.sprite.spritecollide(current_player, collectible_group, True):
-                game_start_time -= 1000
-                item_sound = pygame.mixer.Sound("coin.mp3")
-                item_sound.play()
-
-
-            for item in pygame.sprite.spritecollide(current_player, item_group, True):
-                current_player.activate_item_effect(item.item_type)
-
-            if (current_player.is_dead or \
-                (not current_player.effect_active and pygame.sprite.spritecollide(current_player, obstacle_group,
-                                                                                  False))) \
-                    and not current_player.is_reviving:
-                if current_chapter == 1:
-                    grade_to_set = "F"
-                elif current_chapter == 2:
-                    grade_to_set = "D" if elapsed_seconds < 30 else "C"
-                elif current_chapter == 3:
-                    grade_to_set = "B" if elapsed_seconds < 30 else "A (Fail)"
-
-                if current_player is player1:
-                    game_state = "RELAY_PROMPT"
-                    final_grade = grade_to_set
-                    player1.is_dead = True
-                    relay_prompt_start_time = current_time_ticks
-                    selected_button_index = 0
-                elif current_player is player2:
-                    game_state = "GAME_OVER"
-                    final_grade = grade_to_set
-                    player2.is_dead = True
-
-        elif game_state == "RELAY_PROMPT":
-            if current_time_ticks - relay_prompt_start_time > 10000:
-                game_state = "GAME_OVER"
-
-        elif game_state == "LOADING_TRANSITION":
-            elapsed = current_time_ticks - transition_start_time
-            radius = int((elapsed / 1500) * SCREEN_WIDTH * 0.7)
-            if radius > SCREEN_WIDTH * 0.7:
-                game_state = "PLAYING"
-                player1 = Player(character_roster[0])
-                player2 = Player(character_roster[1])
-                player2.is_dead = True;
-                player2.rect.x = -200
-                current_player = player1
-                game_start_time = current_time_ticks
-                elapsed_seconds = 0
-                score = 0
-                current_chapter = selected_chapter
-
-                if current_chapter in GAME_ASSETS["backgrounds"]:
-                    current_background = GAME_ASSETS["backgrounds"][current_chapter]
-                    background_x = 0
-                else:
-                    current_background = None
-                    background_x = 0
-
-                if current_chapter == 1:
-                    current_obstacle_speed = 6
-                elif current_chapter == 2:
-                    current_obstacle_speed = 8
-                elif current_chapter == 3:
-                    current_obstacle_speed = 10
-                final_grade = ""
-                last_obstacle_spawn_time = current_time_ticks
-                next_obstacle_spawn_delay = 2000
-                item_spawn_count = 0
-                item_spawn_limit = random.randint(1, 2)
-                obstacle_group.empty();
-                item_group.empty();
-                pit_group.empty()
-                platform_group.empty();
-                speed_line_group.empty();
-                collectible_group.empty()
-                ground_group.empty()
-                ground_group.add(Platform('ground', SCREEN_WIDTH * 2, x_pos=0, y_pos=GROUND_Y))
-
-        # --- 화면 그리기 ---
-        if game_state == "PLAYING" and current_background:
-            screen.blit(current_background, (background_x, 0))
-        else:
-            screen.fill(BLACK)
-
-        if game_state in ["PLAYING", "RELAY_PROMPT", "PAUSED", "HIDDEN_CREDIT"]:
-            ground_group.draw(screen)
-        if game_state in ["PLAYING", "RELAY_PROMPT", "PAUSED"]:
-            pit_group.draw(screen)
-            platform_group.draw(screen)
-
-        if game_state == "TITLE_SCREEN":
-            if GAME_ASSETS["title_screen"]:
-                screen.blit(GAME_ASSETS["title_screen"], (0, 0))
-            else:
-                screen.fill(BLUE)
-
-                # --- [추가] 번쩍이는 효과 구현 ---
-
-                # 현재 시간을 기준으로 깜빡임 주기 설정 (1000ms = 1초)
-                # 500ms 동안 켜지고, 500ms 동안 꺼짐
-                flash_on = (current_time_ticks % 1000) < 500
-
-                # [효과 1] 눈 번쩍임 (빨간색 원 그리기)
-                if flash_on:
-                    # ★중요★: 아래 좌표(X, Y)와 반지름 숫자들을 실행해보면서 눈 위치에 맞게 조절해야 합니다.
-                    eye_center_x = 625  # 눈의 중심 X 좌표 (추정치)
-                    eye_center_y = 265  # 눈의 중심 Y 좌표 (추정치)
-                    eye_radius = 18  # 빨간 눈의 크기
-
-                    # 바깥쪽 진한 빨강
-                    pygame.draw.circle(screen, (200, 0, 0), (eye_center_x, eye_center_y), eye_radius)
-                    # 안쪽 밝은 빨강 (더 빛나는 느낌)
-                    pygame.draw.circle(screen, (255, 50, 50), (eye_center_x, eye_center_y), eye_radius - 5)
-
-                # [효과 2] 글씨 번쩍임 (검은색으로 덮기)
-                # flash_on이 False일 때(꺼진 타임일 때) 검은 박스로 글씨를 가립니다.
-                if not flash_on:
-                    # ★중요★: 아래 사각형 좌표(Left, Top, Width, Height)를 글씨를 딱 가릴 만큼 조절해야 합니다.
-                    text_cover_rect = pygame.Rect(350, 480, 500, 70)
-                    # 디버깅용: 위치 잡을 때는 BLACK 대신 RED로 바꿔서 영역을 확인해보세요.
-                    pygame.draw.rect(screen, BLACK, text_cover_rect)
-
-        elif game_state == "CHAPTER_SELECT":
-            title_text = font_large.render("챕터를 선택하세요", True, WHITE)
-            title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 100))
-            screen.blit(title_text, title_rect)
-            for chapter, rect in chapter_buttons.items():
-                if chapter == 3 and max_unlocked_chapter < 3: continue
-                is_hovered = rect.collidepoint(mouse_pos)
-                if chapter == 3:
-                    chapter_num_text = font_large.render("BOSS", True, WHITE)
-                else:
-                    chapter_num_text = font_xl.render(str(chapter), True, WHITE)
-                chapter_num_rect = chapter_num_text.get_rect(center=rect.center)
-                if chapter <= max_unlocked_chapter:
-                    if is_hovered:
-                        hover_rect = rect.inflate(20, 20)
-                        pygame.draw.rect(screen, LIGHT_BLUE, hover_rect, border_radius=15)
-                    else:
-                        pygame.draw.rect(screen, BLUE, rect, border_radius=15)
-                    pygame.draw.rect(screen, WHITE, rect, 4, border_radius=15)
-                    screen.blit(chapter_num_text, chapter_num_rect)
-                else:
-                    pygame.draw.rect(screen, GREY, rect, border_radius=15)
-                    pygame.draw.rect(screen, BLACK, rect, 4, border_radius=15)
-                    screen.blit(chapter_num_text, chapter_num_rect)
-                    locked_text = font_large.render("LOCKED", True, RED)
-                    locked_rect = locked_text.get_rect(center=rect.center)
-                    screen.blit(locked_text, locked_rect)
-
-        elif game_state == "CONFIRM_START":
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA);
-            overlay.fill((0, 0, 0, 180));
-            screen.blit(overlay, (0, 0))
-            confirm_text = font_large.render(f"Chapter {selected_chapter}을(를) 시작하시겠습니까?", True, WHITE)
-            confirm_rect = confirm_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
-            screen.blit(confirm_text, confirm_rect)
-            if confirm_yes_button.collidepoint(mouse_pos):
-                pygame.draw.rect(screen, GREEN, confirm_yes_button.inflate(10, 10), border_radius=10)
-            else:
-                pygame.draw.rect(screen, GREEN, confirm_yes_button, border_radius=10)
-            if selected_button_index == 0: pygame.draw.rect(screen, WHITE, confirm_yes_button.inflate(10, 10), 5,
-                                                            border_radius=10)
-            yes_text = font_small.render("예", True, BLACK)
-            yes_rect = yes_text.get_rect(center=confirm_yes_button.center)
-            screen.blit(yes_text, yes_rect)
-            if confirm_no_button.collidepoint(mouse_pos):
-                pygame.draw.rect(screen, RED, confirm_no_button.inflate(10, 10), border_radius=10)
-            else:
-                pygame.draw.rect(screen, RED, confirm_no_button, border_radius=10)
-            if selected_button_index == 1: pygame.draw.rect(screen, WHITE, confirm_no_button.inflate(10, 10), 5,
-                                                            border_radius=10)
-            no_text = font_small.render("아니오", True, WHITE)
-            no_rect = no_text.get_rect(center=confirm_no_button.center)
-            screen.blit(no_text, no_rect)
-
-        elif game_state == "CHARACTER_SELECT":
-            title_text = font_large.render("이어달리기 2명 선택", True, WHITE)
-            title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 150))
-            screen.blit(title_text, title_rect)
-            for i, (char_id, rect) in enumerate(character_buttons.items()):
-                if i == selected_char_index:
-                    pygame.draw.rect(screen, WHITE, rect.inflate(10, 10), 3)
-                if char_id in character_roster:
-                    pygame.draw.rect(screen, GREEN, rect.inflate(10, 10), 3)
-                char_img = GAME_ASSETS["characters"][char_id]["portrait"]
-                scaled_img = pygame.transform.scale(char_img, (80, 80))
-                img_rect = scaled_img.get_rect(center=rect.center)
-                screen.blit(scaled_img, img_rect)
-            selected_text = font_small.render(f"선택: {', '.join(character_roster)} (방향키, 스페이스)", True, WHITE)
-            selected_rect = selected_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT / 2 + 150))
-            screen.blit(selected_text, selected_rect)
-
-        elif game_state == "PLAYING":
-            if player1: player1.draw(screen)
-            if player2: player2.draw(screen)
-            obstacle_group.draw(screen)
-            item_group.draw(screen)
-            collectible_group.draw(screen)
-            speed_line_group.draw(screen)
-            progress_percent = (elapsed_seconds % 45) / 45.0
-            progress_rect_fg = pygame.Rect(0, 10, SCREEN_WIDTH * progress_percent, 20)
-            progress_rect_bg = pygame.Rect(0, 10, SCREEN_WIDTH, 20)
-            pygame.draw.rect(screen, GREEN, progress_rect_fg)
-            pygame.draw.rect(screen, WHITE, progress_rect_bg, 2)
-            score_text = font_small.render(f"점수: {score}", True, WHITE)
-            score_rect = score_text.get_rect(topright=(SCREEN_WIDTH - 20, 40))
-            screen.blit(score_text, score_rect)
-            runner_text = font_small.render(f"주자: {1 if current_player is player1 else 2} / 2", True, WHITE)
-            screen.blit(runner_text, (20, 40))
-            chapter_text = font_small.render(f"챕터: {current_chapter}", True, WHITE)
-            screen.blit(chapter_text, (20, 70))
-            time_text = font_small.render(f"시간: {elapsed_seconds} 초", True, WHITE)
-            screen.blit(time_text, (20, 100))
-            if not current_player.skill_used_this_chapter:
-                skill_text = font_small.render("SKILL READY (SPACE)", True, GREEN)
-            else:
-                skill_text = font_small.render("SKILL USED", True, RED)
-            screen.blit(skill_text, (20, 130))
-
-        elif game_state == "PAUSED":
-            if player1: player1.draw(screen)
-            if player2: player2.draw(screen)
-            obstacle_group.draw(screen);
-            item_group.draw(screen);
-            collectible_group.draw(screen);
-            speed_line_group.draw(screen)
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA);
-            overlay.fill((0, 0, 0, 180));
-            screen.blit(overlay, (0, 0))
-            pause_text = font_large.render("일시 정지", True, WHITE)
-            pause_rect = pause_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
-            screen.blit(pause_text, pause_rect)
-            resume_text = font_small.render("계속하려면 P를 누르세요", True, WHITE)
-            resume_rect = resume_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20))
-            screen.blit(resume_text, resume_rect)
-
-        elif game_state == "RELAY_PROMPT":
-            if player1: player1.draw(screen)
-            obstacle_group.draw(screen);
-            item_group.draw(screen);
-            collectible_group.draw(screen);
-            speed_line_group.draw(screen)
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA);
-            overlay.fill((0, 0, 0, 180));
-            screen.blit(overlay, (0, 0))
-            elapsed_prompt_time = current_time_ticks - relay_prompt_start_time
-            time_left = max(0, 10 - (elapsed_prompt_time // 1000))
-            confirm_text = font_large.render(f"이어달리기 하시겠습니까? ({time_left})", True, WHITE)
-            confirm_rect = confirm_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
-            screen.blit(confirm_text, confirm_rect)
-            pygame.draw.rect(screen, GREEN, relay_yes_button_rect.inflate(10, 10) if relay_yes_button_rect.collidepoint(
-                mouse_pos) else relay_yes_button_rect, border_radius=10)
-            if selected_button_index == 0: pygame.draw.rect(screen, WHITE, relay_yes_button_rect.inflate(10, 10), 5,
-                                                            border_radius=10)
-            yes_text = font_small.render("예", True, BLACK)
-            yes_rect = yes_text.get_rect(center=relay_yes_button_rect.center)
-            screen.blit(yes_text, yes_rect)
-            pygame.draw.rect(screen, RED, relay_no_button_rect.inflate(10, 10) if relay_no_button_rect.collidepoint(
-                mouse_pos) else relay_no_button_rect, border_radius=10)
-            if selected_button_index == 1: pygame.draw.rect(screen, WHITE, relay_no_button_rect.inflate(10, 10), 5,
-                                                            border_radius=10)
-            no_text = font_small.render("아니오", True, WHITE)
-            no_rect = no_text.get_rect(center=relay_no_button_rect.center)
-            screen.blit(no_text, no_rect)
-
-        elif game_state == "GAME_OVER":
-            if player1: player1.draw(screen)
-            if player2: player2.draw(screen)
-            if final_grade == "F":
-                grade_message = "학점: F. 다음 학기에 뵙겠습니다."
-            elif final_grade == "D":
-                grade_message = "학점: D. 재수강 위기입니다."
-            elif final_grade == "C":
-                grade_message = "학점: C. 분발하세요."
-            elif final_grade == "B":
-                grade_message = "학점: B. 를 놓쳤습니다!"
-            elif final_grade == "A (Fail)":
-                grade_message = "학점: A (Fail). 아깝게 클리어 실패!"
-            text = font_large.render("GAME OVER", True, WHITE)
-            text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 80))
-            screen.blit(text, text_rect)
-            grade_text = font_medium.render(grade_message, True, RED)
-            grade_rect = grade_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 20))
-            screen.blit(grade_text, grade_rect)
-            score_text = font_small.render(f"최종 점수: {score}", True, WHITE)
-            score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30))
-            screen.blit(score_text, score_rect)
-            pygame.draw.rect(screen, RED, restart_button_rect.inflate(10, 10) if restart_button_rect.collidepoint(
-                mouse_pos) else restart_button_rect, border_radius=10)
-            btn_text = font_small.render("재수강", True, WHITE)
-            btn_text_rect = btn_text.get_rect(center=restart_button_rect.center)
-            screen.blit(btn_text, btn_text_rect)
-
-        elif game_state == "GAME_CLEAR":
-            if final_grade == "A+":
-                text = font_large.render("!! CHAPTER 3 CLEAR !!", True, YELLOW)
-                text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 80))
-                screen.blit(text, text_rect)
-                grade_text = font_xl.render("A+학점 달성!", True, GREEN)
-                grade_rect = grade_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-                screen.blit(grade_text, grade_rect)
-                score_text = font_small.render(f"최종 점수: {score}", True, WHITE)
-                score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 60))
-                screen.blit(score_text, score_rect)
-                credit_hint_text = font_medium.render("아무 키나 눌러 히든 크레딧 보기", True, WHITE)
-                credit_hint_rect = credit_hint_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 120))
-                screen.blit(credit_hint_text, credit_hint_rect)
-            else:
-                text = font_large.render(f"!! CHAPTER {current_chapter} CLEAR !!", True, YELLOW)
-                text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 80))
-                screen.blit(text, text_rect)
-                grade_text = font_large.render(f"축하합니다! {final_grade}학점으로 클리어!", True, GREEN)
-                grade_rect = grade_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-                screen.blit(grade_text, grade_rect)
-                score_text = font_small.render(f"최종 점수: {score}", True, WHITE)
-                score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 60))
-                screen.blit(score_text, score_rect)
-                if restart_button_rect.collidepoint(mouse_pos):
-                    pygame.draw.rect(screen, BLUE, restart_button_rect.inflate(10, 10), border_radius=10)
-                else:
-                    pygame.draw.rect(screen, BLUE, restart_button_rect, border_radius=10)
-                btn_text = font_small.render("챕터 선택", True, WHITE)
-                btn_text_rect = btn_text.get_rect(center=restart_button_rect.center)
-                screen.blit(btn_text, btn_text_rect)
-
-        elif game_state == "HIDDEN_CREDIT":
-            credit_text = font_large.render("대학원 입학을 축하합니다!", True, WHITE)
-            credit_rect = credit_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 200))
-            screen.blit(credit_text, credit_rect)
-            press_key_text = font_small.render("아무 키나 눌러 시작 화면으로", True, WHITE)
-            press_key_rect = press_key_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50))
-            screen.blit(press_key_text, press_key_rect)
-
-        elif game_state == "LOADING_TRANSITION":
-            elapsed = current_time_ticks - transition_start_time
-            radius = int((elapsed / 1500) * SCREEN_WIDTH * 0.7)
-            if radius < SCREEN_WIDTH * 0.7:
-                pygame.draw.circle(screen, BLACK, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2), radius)
-
-        pygame.display.flip()
-        clock.tick(FPS)
-
-    pygame.quit()
-    sys.exit()
-
-
-if __name__ == "__main__":
-    main_game()
\ No newline at end of file
+import pygame
+import sys
+import random
+import os
+import heapq
+import math
+import json
+import time
+import queue
+import argparse
+import struct
+import zlib
+import csv
+from array import array
+import gc
+import weakref
+import hashlib
+import mmap
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # 코스 풀이 가능성 검사에만 필요합니다. 없으면 검사를 건너뜁니다.
+    np = None
+
+PROCESS_START_TIME = time.perf_counter()  # 시작 지연 측정 기준
+
+
+# 1. 게임 초기화
+# import 할 때는 창/폰트/에셋을 건드리지 않습니다. (테스트나 도구에서 물리/생성 코드만 가져다 쓸 수 있게)
+# 실제 게임은 main_game()에서 init_display() -> init_fonts() -> init_assets() 순서로 준비합니다.
+
+# --- 2. 기본 상수 설정 ---
+SCREEN_WIDTH = 1200
+SCREEN_HEIGHT = 600
+FPS = 60          # 물리(시뮬레이션) 틱 속도. 화면 주사율과는 따로 움직입니다.
+RENDER_FPS = 60   # 화면 프레임 상한 (--fps 로 변경, 0이면 제한 없음)
+MAX_FRAME_MS = 250  # 한 프레임이 이보다 오래 걸려도 이만큼만 따라잡습니다. (멈췄다 풀릴 때 순간이동 방지)
+
+# 색상 정의
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+DARK_BLUE = (0, 0, 139)
+LIGHT_BLUE = (173, 216, 230)
+YELLOW = (255, 255, 0)
+CYAN = (0, 255, 255)
+MAGENTA = (255, 0, 255)
+GREY = (100, 100, 100)
+
+# 캐릭터 데이터 정의
+CHARACTERS_COLOR = {
+    "A": RED, "B": GREEN, "C": BLUE, "D": YELLOW, "E": CYAN, "F": MAGENTA
+}
+CHARACTER_IDS = list(CHARACTERS_COLOR.keys())
+
+GROUND_Y = SCREEN_HEIGHT - 100
+
+# 플레이어 크기 및 속성
+PLAYER_START_X = 90
+PLAYER_START_Y = GROUND_Y
+PLAYER_WIDTH = 70
+PLAYER_HEIGHT = 90
+PORTRAIT_SIZE = 80  # 캐릭터 선택 화면의 초상화 크기
+PORTRAIT_SIZES = (PORTRAIT_SIZE,)  # 미리 만들어 두는 초상화 크기 (다른 화면에서 쓰면 여기에 추가)
+
+GRAVITY = 1.0
+JUMP_STRENGTH = -16
+HIGH_JUMP_STRENGTH = -22
+
+# 장애물 크기 (너비, 높이)와 바닥에서 띄우는 높이
+OBSTACLE_SIZES = {
+    "force_jump": (30, 60),
+    "tall_jump": (30, 110),
+    "force_slide": (30, 230),
+}
+OBSTACLE_RAISE = {"force_jump": 0, "tall_jump": 0, "force_slide": 70}
+
+PLATFORM_HEIGHT = 40
+PIT_HEIGHT = 100
+ROAD_STRIP_WIDTH = SCREEN_WIDTH * 2  # 가장 긴 발판(시작 바닥)까지 덮는 길이
+
+# --- 3. 게임 창 설정 ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, ".cache")  # 폰트 경로 등 다음 실행을 빠르게 하기 위한 캐시
+
+STARTUP_TIMINGS = {}  # 시작 단계 이름 -> 걸린 시간(ms)
+
+screen = None
+clock = None
+
+
+def record_startup_phase(name, started):
+    STARTUP_TIMINGS[name] = (time.perf_counter() - started) * 1000
+
+
+def init_display():
+    """pygame과 오디오를 초기화하고 게임 창을 엽니다. (한 번만)"""
+    global screen, clock
+    if screen is not None:
+        return screen
+    started = time.perf_counter()
+    pygame.init()
+    try:
+        pygame.mixer.init()
+    except pygame.error:
+        print("[실패] 오디오 장치를 열 수 없습니다. (소리 없이 진행)")
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("A+를 향해 달려라! (Final Fixed Ver.)")
+    clock = pygame.time.Clock()
+    record_startup_phase("display", started)
+    return screen
+
+
+def to_display_format(surface):
+    """창이 열려 있으면 화면 형식으로 변환합니다. (창 없이 돌릴 때는 그대로 둡니다)"""
+    if pygame.display.get_surface() is not None:
+        return surface.convert()
+    return surface
+
+
+# --- 3-1. 프레임 구간별 시간 측정 ---
+# 구간 이름 -> 묶음. 벤치마크는 묶음(events/update/draw/flip) 단위로 비교합니다.
+PROFILE_PHASES = {
+    "events": "events",
+    "update": "update",
+    "spawn": "update",
+    "entities": "update",
+    "collisions": "update",
+    "background": "draw",
+    "sprites": "draw",
+    "hud": "draw",
+    "draw": "draw",
+    "overlay": "draw",
+    "flip": "flip",
+    "gc": "update",
+}
+
+
+class FrameProfiler:
+    """
+    한 프레임을 구간(입력, 업데이트, 그리기, flip ...)으로 나눠 걸린 시간을 잽니다.
+    begin()으로 프레임을 시작하고, 구간이 끝날 때마다 mark(이름)을 부르면 직전 mark부터의 시간(ms)이 더해집니다.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.started = 0.0
+        self.last = 0.0
+
+    def begin(self):
+        self.phases = {}
+        self.started = self.last = time.perf_counter()
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + (now - self.last) * 1000
+        self.last = now
+
+    def total_ms(self):
+        return (self.last - self.started) * 1000
+
+    def grouped(self):
+        groups = {}
+        for name, ms in self.phases.items():
+            group = PROFILE_PHASES.get(name, name)
+            groups[group] = groups.get(group, 0.0) + ms
+        return groups
+
+
+# --- 3-2. 히치(튀는 프레임) 감시 / GC 정책 ---
+# 게임 중에는 2세대(전체) GC가 저절로 돌지 않게 기준을 크게 잡고, 화면이 멈춰도 티가 안 나는
+# 상태(챕터 전환, 게임 오버)에 들어갈 때 몰아서 수집합니다. 0/1세대는 짧아서 기본값 그대로 둡니다.
+GC_GAMEPLAY_THRESHOLDS = (700, 10, 1000000)
+GC_COLLECT_STATES = ("LOADING_TRANSITION", "GAME_OVER")
+
+
+def freeze_loaded_assets():
+    """에셋을 다 불러온 뒤 호출합니다. 지금 살아 있는 객체(에셋, 모듈 등)를 GC 검사 대상에서 빼 둡니다."""
+    gc.collect()
+    gc.freeze()
+
+
+def apply_gameplay_gc_policy():
+    gc.set_threshold(*GC_GAMEPLAY_THRESHOLDS)
+
+
+class HitchMonitor:
+    """
+    예산(budget_ms)을 넘긴 프레임을 히치로 기록합니다.
+    그 프레임에 있었던 일(스폰, 효과음 로드, Surface 생성, 에셋 마무리, GC)을 같이 남겨 원인을 좁힐 수 있게 합니다.
+    GC는 gc.callbacks로 직접 잡고, 나머지는 코드 곳곳에서 note(종류)로 알려 줍니다.
+    """
+    MAX_RECORDS = 200
+
+    def __init__(self, budget_ms=1000 / FPS):
+        self.budget_ms = budget_ms
+        self.counts = {}
+        self.gc_events = []
+        self.gc_started = 0.0
+        self.frames = 0
+        self.hitch_count = 0
+        self.hitches_by_state = {}
+        self.records = deque(maxlen=self.MAX_RECORDS)
+        self.last_was_hitch = False
+        self.installed = False
+
+    def install(self):
+        if not self.installed:
+            gc.callbacks.append(self.on_gc)
+            self.installed = True
+
+    def uninstall(self):
+        if self.installed:
+            gc.callbacks.remove(self.on_gc)
+            self.installed = False
+
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self.gc_started = time.perf_counter()
+        else:
+            ms = (time.perf_counter() - self.gc_started) * 1000
+            self.gc_events.append((info["generation"], round(ms, 3), info["collected"]))
+
+    def note(self, kind, amount=1):
+        self.counts[kind] = self.counts.get(kind, 0) + amount
+
+    def end_frame(self, game_state, profiler):
+        """프레임이 끝날 때 부릅니다. 히치면 기록하고, 이번 프레임 카운터를 비웁니다."""
+        self.frames += 1
+        total = profiler.total_ms()
+        self.last_was_hitch = total > self.budget_ms
+        if self.last_was_hitch:
+            self.hitch_count += 1
+            self.hitches_by_state[game_state] = self.hitches_by_state.get(game_state, 0) + 1
+            self.records.append({
+                "frame": self.frames,
+                "state": game_state,
+                "ms": round(total, 2),
+                "phases": {name: round(ms, 2) for name, ms in profiler.phases.items()},
+                "events": dict(self.counts),
+                "gc": list(self.gc_events),
+            })
+        if self.counts:
+            self.counts = {}
+        if self.gc_events:
+            self.gc_events = []
+
+    def summary(self, worst=5):
+        lines = [f"[히치] {self.frames} 프레임 중 {self.hitch_count}번 예산({self.budget_ms:.1f} ms) 초과 "
+                 f"{self.hitches_by_state}"]
+        for record in sorted(self.records, key=lambda r: r["ms"], reverse=True)[:worst]:
+            slowest = max(record["phases"], key=record["phases"].get, default="-")
+            gc_text = ", ".join(f"gen{gen} {ms:.1f} ms" for gen, ms, _ in record["gc"]) or "없음"
+            lines.append(f"  #{record['frame']} {record['state']} {record['ms']} ms "
+                         f"(가장 긴 구간 {slowest}, 이벤트 {record['events'] or '없음'}, GC {gc_text})")
+        return "\n".join(lines)
+
+
+HITCH_MONITOR = HitchMonitor()
+
+
+# --- 4. 폰트 설정 ---
+# SysFont는 호출할 때마다 시스템 폰트 목록을 뒤지므로, 이름 -> 파일 경로를 한 번만 찾아 캐시합니다.
+FONT_CACHE_FILE = os.path.join(CACHE_DIR, "fonts.json")
+FONT_PATHS = None
+
+font_small = None
+font_medium = None
+font_large = None
+font_xl = None
+font_icon = None
+font_obstacle = None
+font_debug = None
+
+
+def resolve_font_path(name):
+    """시스템 폰트 이름을 파일 경로로 바꿉니다. (못 찾으면 None = 기본 폰트)"""
+    global FONT_PATHS
+    if FONT_PATHS is None:
+        try:
+            with open(FONT_CACHE_FILE, encoding="utf-8") as f:
+                FONT_PATHS = json.load(f)
+        except (OSError, ValueError):
+            FONT_PATHS = {}
+
+    path = FONT_PATHS.get(name, "")
+    if name in FONT_PATHS and (path is None or os.path.exists(path)):
+        return path
+
+    path = pygame.font.match_font(name)
+    FONT_PATHS[name] = path
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(FONT_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(FONT_PATHS, f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass
+    return path
+
+
+def load_font(name, size, fallback_size):
+    try:
+        return pygame.font.Font(resolve_font_path(name), size)
+    except Exception:
+        return pygame.font.Font(None, fallback_size)
+
+
+def init_fonts():
+    """게임에서 쓰는 폰트를 만듭니다. (한 번만)"""
+    global font_small, font_medium, font_large, font_xl, font_icon, font_obstacle, font_debug
+    if font_small is not None:
+        return
+    started = time.perf_counter()
+    pygame.font.init()
+    font_small = load_font("malgungothic", 35, 40)
+    font_medium = load_font("malgungothic", 45, 50)
+    font_large = load_font("malgungothic", 60, 60)
+    font_xl = load_font("malgungothic", 80, 80)
+    font_icon = load_font("arialblack", 20, 30)
+    font_obstacle = load_font("arialblack", 30, 40)
+    font_debug = load_font("consolas", 15, 20)
+    record_startup_phase("fonts", started)
+
+
+# --- 4-1. 글자 렌더링 캐시 ---
+class TextCache:
+    """
+    font.render 결과를 (폰트, 문자열, 색상) 키로 저장해 두는 LRU 캐시입니다.
+    한글 글리프 렌더링은 비싸므로, 내용이 바뀌지 않은 HUD/메뉴 글자는 이전 Surface를 그대로 씁니다.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        HITCH_MONITOR.note("surface")
+        surface = font.render(text, True, color)
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)  # 가장 오래 안 쓴 것부터 버림
+        return surface
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+TEXT_CACHE = TextCache()
+
+
+def render_text(font, text, color):
+    """font.render(text, True, color) 대신 사용합니다. (캐시됨)"""
+    return TEXT_CACHE.render(font, text, color)
+
+
+# --- 5. 이미지 에셋 로드 함수 (경로 문제 완벽 해결 버전) ---
+def find_asset_path(filename):
+    """
+    에셋 파일 경로를 찾습니다.
+    실행 위치와 상관없이, 무조건 game.py 파일이 있는 폴더를 기준으로 파일을 찾습니다.
+    (game.py 옆 -> assets 폴더 순서, 둘 다 없으면 assets 쪽 경로를 돌려줍니다)
+    """
+    # 1. 현재 실행 중인 파이썬 파일(game.py)의 폴더 경로를 확실하게 알아냅니다.
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+
+    # 2. 우선 game.py 옆에서 찾아봅니다.
+    path = os.path.join(current_dir, filename)
+
+    # 3. 없으면 assets 폴더 안도 찾아봅니다.
+    if not os.path.exists(path):
+        path = os.path.join(current_dir, "assets", filename)
+    return path
+
+
+# 면적이 이 배 넘게 줄어드는 이미지(1000x1000 초상화 -> 80x80 등)는 축소본을 디스크에 저장해 두었다가
+# 다음 실행부터는 원본 대신 읽습니다. 초상화처럼 부드럽게 줄일 이미지는 mip처럼 반씩 줄여 만듭니다.
+THUMBNAIL_DIR = os.path.join(CACHE_DIR, "thumbnails")
+THUMBNAIL_MIN_REDUCTION = 16
+
+
+def thumbnail_path(path, width, height):
+    """원본 파일의 수정 시각/크기가 이름에 들어가므로, 원본이 바뀌면 다른 파일이 됩니다."""
+    stat = os.stat(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(THUMBNAIL_DIR, f"{stem}-{width}x{height}-{stat.st_mtime_ns:x}-{stat.st_size:x}.png")
+
+
+def mip_scale(image, width, height):
+    """목표 크기의 두 배보다 클 동안 반씩 줄인 뒤(mip 단계) 마지막에 목표 크기로 맞춥니다."""
+    scale = pygame.transform.smoothscale if image.get_bitsize() >= 24 else pygame.transform.scale
+    while image.get_width() >= width * 2 and image.get_height() >= height * 2:
+        image = scale(image, (image.get_width() // 2, image.get_height() // 2))
+    return scale(image, (width, height))
+
+
+def save_thumbnail(image, cache_path):
+    """축소본을 저장하고, 같은 이미지/크기의 예전(원본이 바뀌기 전) 축소본을 지웁니다."""
+    prefix = os.path.basename(cache_path).rsplit("-", 2)[0] + "-"
+    # 다른 스레드(번들 빌드)가 같은 파일을 동시에 쓸 수 있으므로 임시 파일에 쓰고 바꿔 끼웁니다.
+    temp_path = f"{cache_path[:-len('.png')]}.{os.getpid()}-{threading.get_ident()}.tmp.png"
+    try:
+        os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+        for name in os.listdir(THUMBNAIL_DIR):
+            if name.startswith(prefix) and name != os.path.basename(cache_path) and ".tmp" not in name:
+                os.remove(os.path.join(THUMBNAIL_DIR, name))
+        pygame.image.save(image, temp_path)
+        os.replace(temp_path, cache_path)
+    except (OSError, pygame.error):
+        pass
+
+
+def decode_image(path, width, height, mip=False):
+    """
+    파일을 디코딩하고 크기를 맞춥니다. (작업 스레드에서 호출해도 안전한 부분)
+    mip=True면 크게 줄일 때 반씩 부드럽게 줄입니다. (기본은 가장자리가 선명한 scale, colorkey로 바꾸기 좋음)
+    파일이 없거나 읽을 수 없으면 None을 돌려줍니다.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        cache_path = None
+        if width > 0 and height > 0:
+            cache_path = thumbnail_path(path, width, height)
+            if os.path.exists(cache_path):
+                return pygame.image.load(cache_path)
+        image = pygame.image.load(path)
+        # 크기 조절 (0보다 클 때만, 너비가 0이면 높이에 맞추고 비율 유지)
+        if width > 0 and height > 0:
+            reduced = image.get_width() * image.get_height() > width * height * THUMBNAIL_MIN_REDUCTION
+            if reduced and mip:
+                image = mip_scale(image, width, height)
+            else:
+                image = pygame.transform.scale(image, (width, height))
+            if reduced:
+                save_thumbnail(image, cache_path)
+        elif height > 0 and image.get_height() != height:
+            fit_width = max(1, round(image.get_width() * height / image.get_height()))
+            scale = pygame.transform.smoothscale if image.get_bitsize() >= 24 else pygame.transform.scale
+            image = scale(image, (fit_width, height))
+        return image
+    except pygame.error:
+        return None
+
+
+# 완전 투명/불투명만 있는 이미지를 colorkey로 바꿀 때 쓸 색 후보 (이미지의 불투명 픽셀에 없는 첫 색을 씀)
+COLORKEY_CANDIDATES = (MAGENTA, CYAN, GREEN, (1, 2, 3))
+
+
+def alpha_mode(image):
+    """
+    이미지가 알파를 실제로 어떻게 쓰는지 봅니다. (작업 스레드에서 호출해도 안전한 부분)
+    ("opaque", None)    : 전부 불투명 -> convert()
+    ("colorkey", 색)    : 완전 투명/완전 불투명 픽셀만 있음 -> convert() + 그 색을 colorkey로
+    ("alpha", None)     : 반투명 픽셀이 있음 -> convert_alpha()
+    """
+    colorkey = image.get_colorkey()
+    if colorkey is not None:
+        return "colorkey", tuple(colorkey[:3])
+    if not image.get_masks()[3]:  # 픽셀별 알파 채널이 없음 (Surface 전체 알파는 그대로 둠)
+        return "opaque", None
+    width, height = image.get_size()
+    opaque = pygame.mask.from_surface(image, 254)  # 알파 255인 픽셀
+    opaque_count = opaque.count()
+    if opaque_count == width * height:
+        return "opaque", None
+    if pygame.mask.from_surface(image, 0).count() != opaque_count:  # 알파 1~254인 픽셀이 있음
+        return "alpha", None
+    for key in COLORKEY_CANDIDATES:
+        # 알파 차이 < 255 이므로 불투명 픽셀 중에서만 이 색을 셉니다.
+        if pygame.mask.from_threshold(image, key + (255,), (1, 1, 1, 255)).count() == 0:
+            return "colorkey", key
+    return "alpha", None
+
+
+def convert_for_display(image, kind, key=None):
+    """alpha_mode() 결과에 맞춰 화면 형식으로 바꿉니다. (메인 스레드 전용)"""
+    if pygame.display.get_surface() is None:
+        return image
+    if kind == "opaque":
+        return image.convert()
+    if kind == "colorkey":
+        if image.get_masks()[3]:
+            converted = to_display_format(pygame.Surface(image.get_size()))
+            converted.fill(key)
+            converted.blit(image, (0, 0))
+        else:
+            converted = image.convert()
+        converted.set_colorkey(key, pygame.RLEACCEL)
+        return converted
+    return image.convert_alpha()
+
+
+def finish_image(filename, image, width, height, color_fallback, mode=None, quiet=False):
+    """
+    디코딩된 이미지를 화면 형식으로 바꿉니다. (메인 스레드 전용)
+    mode는 alpha_mode() 결과이며, 없으면 여기서 구합니다. quiet면 성공 로그를 찍지 않습니다. (번들)
+    이미지가 없을 때는 색상 박스로 대체합니다.
+    """
+    if image is not None:
+        kind, key = mode or alpha_mode(image)
+        if not quiet:
+            print(f"[성공] 로드됨: {filename} ({kind})")
+        return convert_for_display(image, kind, key)
+
+    # 파일을 못 찾았을 때, 컴퓨터가 어디를 뒤졌는지 경로를 출력해줍니다. (디버깅용)
+    print(f"[실패] 파일 없음: {filename}")
+    print(f"      (탐색한 위치: {find_asset_path(filename)})")
+    target_w = width if width > 0 else 50
+    target_h = height if height > 0 else 50
+    surf = to_display_format(pygame.Surface((target_w, target_h)))
+    surf.fill(color_fallback)
+    return surf
+
+
+def load_image(filename, width, height, color_fallback):
+    """
+    이미지를 바로(동기식으로) 로드합니다. 경로는 find_asset_path()로 찾습니다.
+    """
+    image = decode_image(find_asset_path(filename), width, height)
+    return finish_image(filename, image, width, height, color_fallback)
+
+
+def make_obstacle_fallback(width, height):
+    """장애물 이미지가 하나도 없을 때 쓰는 빨간 'F' 박스"""
+    surf = to_display_format(pygame.Surface([width, height]))
+    surf.fill(RED)
+    pygame.draw.rect(surf, WHITE, (5, 5, width - 10, height - 10), 3)
+    try:
+        text = render_text(font_obstacle, "F", WHITE)
+        text_rect = text.get_rect(center=(width // 2, height // 2))
+        surf.blit(text, text_rect)
+    except:
+        pass
+    return surf
+
+
+class RoadStripCache:
+    """
+    발판용 도로 이미지를 미리 한 줄로 이어 붙여 둔 캐시입니다.
+    발판을 만들 때마다 scale + 타일 blit 하지 않고, 너비별 subsurface를 돌려줍니다.
+    """
+
+    def __init__(self, road_img, height):
+        self.height = height
+        self.by_width = {}
+        self.strip = to_display_format(pygame.Surface([ROAD_STRIP_WIDTH, height]))
+        if road_img and road_img.get_width() > 1:
+            img_w = road_img.get_width()
+            img_h = road_img.get_height()
+            scale_factor = height / img_h
+            new_w = max(1, int(img_w * scale_factor))
+            self.tile = pygame.transform.scale(road_img, (new_w, height))
+            for x in range(0, ROAD_STRIP_WIDTH, new_w):
+                self.strip.blit(self.tile, (x, 0))
+        else:
+            self.tile = None
+            self.strip.fill(DARK_BLUE)
+            pygame.draw.rect(self.strip, LIGHT_BLUE, (0, 0, ROAD_STRIP_WIDTH, height // 3))
+
+    def get(self, width):
+        surface = self.by_width.get(width)
+        if surface is None:
+            HITCH_MONITOR.note("surface")
+            if width <= ROAD_STRIP_WIDTH:
+                surface = self.strip.subsurface((0, 0, width, self.height))
+            else:
+                # 스트립보다 긴 발판은 드물기 때문에 한 번 만들어서 너비별로 보관
+                surface = to_display_format(pygame.Surface([width, self.height]))
+                for x in range(0, width, ROAD_STRIP_WIDTH):
+                    surface.blit(self.strip, (x, 0))
+            self.by_width[width] = surface
+        return surface
+
+
+# 챕터 배경 레이어: (파일명, 카메라 대비 스크롤 비율). 첫 레이어는 불투명한 먼 배경(없으면 검은색),
+# 나머지는 있으면 그 위에 겹치는 투명 PNG입니다. 모두 화면 높이에 맞춰 원래 비율로 타일링합니다.
+PARALLAX_LAYERS = (
+    ("background{chapter}.png", 0.08),
+    ("background{chapter}_mid.png", 0.3),
+    ("background{chapter}_near.png", 0.6),
+)
+
+
+class ParallaxLayer:
+    """가로로 끝없이 이어지는 배경 레이어 한 장. 카메라 x에 scroll_factor를 곱한 만큼(소수점까지) 움직입니다."""
+
+    def __init__(self, image, scroll_factor):
+        self.image = image
+        self.scroll_factor = scroll_factor
+        self.width = image.get_width()
+        self.height = image.get_height()
+
+    def offset(self, camera_x, step=1):
+        """타일 안에서 화면 왼쪽 끝이 오는 x. step을 주면 그 px 단위로 끊어서 움직입니다."""
+        return round(camera_x * self.scroll_factor) // step * step % self.width
+
+    def blits(self, camera_x, step=1):
+        """화면에 보이는 열만 잘라서, 타일 끝에서 처음으로 넘어가며(wrap-around) 채우는 blit 목록"""
+        start = self.offset(camera_x, step)
+        x = 0
+        sequence = []
+        while x < SCREEN_WIDTH:
+            width = min(self.width - start, SCREEN_WIDTH - x)
+            sequence.append((self.image, (x, 0), (start, 0, width, self.height)))
+            x += width
+            start = 0
+        return sequence
+
+
+class ParallaxBackground:
+    """챕터 배경 레이어 묶음 (먼 레이어부터 그림)"""
+
+    def __init__(self, layers):
+        self.layers = layers
+
+    def offsets(self, camera_x, step=1):
+        """레이어별 정수 오프셋 (이 값이 같으면 배경 화면도 같음)"""
+        return tuple(layer.offset(camera_x, step) for layer in self.layers)
+
+    def draw(self, surface, camera_x, step=1):
+        surface.blits([blit for layer in self.layers for blit in layer.blits(camera_x, step)], False)
+
+    def nbytes(self):
+        return sum(layer.image.get_bytesize() * layer.width * layer.height for layer in self.layers)
+
+
+def build_parallax_background(layer_images):
+    """레이어 번호 -> 이미지 표로 배경을 만듭니다. 먼 레이어는 검은 바탕에 합쳐 불투명하게 바꿉니다."""
+    layers = []
+    for index, (_, scroll_factor) in enumerate(PARALLAX_LAYERS):
+        image = layer_images.get(index)
+        if image is None:
+            continue
+        if index == 0:
+            opaque = to_display_format(pygame.Surface(image.get_size()))
+            opaque.fill(BLACK)
+            opaque.blit(image, (0, 0))
+            image = opaque
+        layers.append(ParallaxLayer(image, scroll_factor))
+    return ParallaxBackground(layers)
+
+
+OBSTACLE_FILE_TYPES = {
+    "Small": "force_jump",
+    "Tall": "tall_jump",
+    "Slide": "force_slide"
+}
+
+
+def new_asset_table():
+    """로딩 전 GAME_ASSETS의 빈 구조 (로더가 채워 넣습니다)"""
+    return {
+        "backgrounds": {},
+        "background_layers": {1: {}, 2: {}, 3: {}},
+        "characters": {
+            char_id: {"run": [None, None, None], "jump": None, "slide": None, "portraits": {}}
+            for char_id in CHARACTER_IDS
+        },
+        "road": None,
+        "road_strips": None,
+        "items": {},
+        "die": None,
+        "title_screen": None,
+        "obstacles": {
+            1: {"force_jump": [], "tall_jump": [], "force_slide": []},
+            2: {"force_jump": [], "tall_jump": [], "force_slide": []},
+            3: {"force_jump": [], "tall_jump": [], "force_slide": []}
+        }
+    }
+
+
+def asset_manifest(group):
+    """
+    로딩 그룹별 파일 목록을 돌려줍니다.
+    각 항목: (파일명, 너비, 높이, 대체 색상, 저장 위치)
+    저장 위치는 GAME_ASSETS 안의 키 경로이며, 마지막 키가 None이면 리스트에 추가합니다.
+    대체 색상이 None이면 파일이 없을 때 그냥 건너뜁니다.
+
+    title     : 타이틀 화면 (가장 먼저)
+    common    : 캐릭터, 아이템, 도로, 비석
+    chapterN  : N챕터 장애물 (챕터 시작 직전에 로드)
+    backgroundN : N챕터 배경 레이어 (챕터 시작 직전에 로드, 다른 챕터를 시작하면 내려놓음)
+    """
+    if group == "title":
+        return [("1screen.png", SCREEN_WIDTH, SCREEN_HEIGHT, BLUE, ("title_screen",))]
+
+    if group == "common":
+        entries = []
+        for char_id in CHARACTER_IDS:
+            base_color = CHARACTERS_COLOR[char_id]
+            for frame in range(1, 4):
+                entries.append((f"{char_id}{frame}.png", PLAYER_WIDTH, PLAYER_HEIGHT, base_color,
+                                ("characters", char_id, "run", frame - 1)))
+            entries.append((f"{char_id}J.png", PLAYER_WIDTH, PLAYER_HEIGHT, base_color,
+                            ("characters", char_id, "jump")))
+            entries.append((f"{char_id}S.png", PLAYER_WIDTH, PLAYER_HEIGHT // 2, base_color,
+                            ("characters", char_id, "slide")))
+            for size in PORTRAIT_SIZES:  # 화면에 실제로 그리는 크기만 (원본 1000x1000은 들고 있지 않음)
+                entries.append((f"{char_id}.png", size, size, base_color, ("characters", char_id, "portraits", size)))
+        entries.append(("Item1.png", 60, 60, CYAN, ("items", "invincibility")))
+        entries.append(("Item2.png", 60, 60, YELLOW, ("items", "dash")))
+        entries.append(("road.png", 0, 0, DARK_BLUE, ("road",)))
+        entries.append(("Die.png", 80, 80, GREY, ("die",)))
+        return entries
+
+    if group.startswith("chapter"):
+        chapter = int(group[len("chapter"):])
+        entries = []
+        # 장애물 아틀라스 (게임에서 쓰는 크기로 미리 축소해 스폰 때 scale 하지 않음)
+        for file_type, game_type in OBSTACLE_FILE_TYPES.items():
+            width, height = OBSTACLE_SIZES[game_type]
+            for i in range(1, 6):
+                entries.append((f"Obs_C{chapter}_{file_type}_{i}.png", width, height, None,
+                                ("obstacles", chapter, game_type, None)))
+        return entries
+
+    if group.startswith("background"):
+        chapter = int(group[len("background"):])
+        # 너비 0: 화면 높이에 맞추고 원래 비율 유지. 먼 레이어만 필수(없으면 검은색)
+        return [(filename.format(chapter=chapter), 0, SCREEN_HEIGHT, BLACK if index == 0 else None,
+                 ("background_layers", chapter, index))
+                for index, (filename, _) in enumerate(PARALLAX_LAYERS)]
+
+    raise ValueError(f"알 수 없는 에셋 그룹: {group}")
+
+
+def entry_uses_mip(entry):
+    """초상화처럼 크게 줄이는 UI 이미지는 부드럽게(mip) 줄입니다."""
+    return "portraits" in entry[4]
+
+
+def store_asset(assets, key_path, value):
+    target = assets
+    for key in key_path[:-1]:
+        target = target[key]
+    if key_path[-1] is None:
+        target.append(value)
+    else:
+        target[key_path[-1]] = value
+
+
+def finish_asset_group(assets, group):
+    """그룹의 파일이 모두 들어온 뒤 한 번 실행하는 후처리"""
+    if group == "common":
+        assets["road_strips"] = RoadStripCache(assets["road"], PLATFORM_HEIGHT)
+        prepare_shared_surfaces()
+    elif group.startswith("chapter"):
+        chapter = int(group[len("chapter"):])
+        for game_type, atlas in assets["obstacles"][chapter].items():
+            if not atlas:
+                atlas.append(make_obstacle_fallback(*OBSTACLE_SIZES[game_type]))
+    elif group.startswith("background"):
+        chapter = int(group[len("background"):])
+        background = build_parallax_background(assets["background_layers"][chapter])
+        assets["background_layers"][chapter] = {}
+        assets["backgrounds"][chapter] = background
+        print(f"[배경] 챕터 {chapter}: 레이어 {len(background.layers)}장, {background.nbytes() / 2 ** 20:.1f} MB")
+
+
+def release_asset_group(assets, group):
+    """그룹이 만든 에셋을 내려놓습니다. (지금은 배경 그룹만)"""
+    if group.startswith("background"):
+        chapter = int(group[len("background"):])
+        assets["backgrounds"].pop(chapter, None)
+        assets["background_layers"][chapter] = {}
+
+
+class AssetLoader:
+    """
+    작업 스레드 풀에서 PNG 디코딩/크기 조절을 하고, 결과를 큐에 넣습니다. (번들에 있는 파일은 건너뜀)
+    작업 스레드는 알파를 실제로 쓰는지(alpha_mode)도 미리 봐 두고,
+    메인 스레드는 pump()에서 큐를 비우며 화면 형식 변환과 저장만 합니다.
+    그룹 단위로 요청하고(request), 끝났는지(is_ready)와 걸린 시간(timings)을 확인할 수 있습니다.
+    """
+
+    def __init__(self, assets, workers=None, bundle=None):
+        self.assets = assets
+        self.bundle = bundle   # AssetBundle (있으면 번들에 든 파일은 디코딩하지 않음)
+        self.executor = ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1),
+                                           thread_name_prefix="asset")
+        self.results = queue.Queue()
+        self.pending = {}      # 그룹 -> 아직 메인 스레드에서 처리 안 된 파일 수
+        self.totals = {}       # 그룹 -> 전체 파일 수
+        self.started = {}      # 그룹 -> 요청 시각
+        self.timings = {}      # 그룹 -> 요청부터 완료까지 걸린 시간(초)
+        self.bundled = {}      # 그룹 -> 번들에서 읽은 파일 수
+
+    def request(self, group):
+        """그룹 로딩을 시작합니다. 이미 요청한 그룹은 무시합니다."""
+        if group in self.totals:
+            return
+        entries = asset_manifest(group)
+        self.totals[group] = len(entries)
+        self.pending[group] = len(entries)
+        self.started[group] = time.perf_counter()
+        self.bundled[group] = 0
+        for entry in entries:
+            record = self.bundle.lookup(entry) if self.bundle is not None else None
+            if record is None:
+                self.executor.submit(self._decode, group, entry)
+            else:
+                # 번들에 있으면 디코딩 없이 mmap 위의 픽셀로 바로 Surface를 만듭니다.
+                self.bundled[group] += 1
+                self.results.put((group, entry) + self.bundle.load(record) + (True,))
+        if not entries:
+            self._complete(group)
+
+    def _decode(self, group, entry):
+        filename, width, height = entry[0], entry[1], entry[2]
+        try:
+            image = decode_image(find_asset_path(filename), width, height, mip=entry_uses_mip(entry))
+            mode = alpha_mode(image) if image is not None else None
+        except Exception:
+            image, mode = None, None
+        self.results.put((group, entry, image, mode, False))
+
+    def pump(self, budget_ms=4.0):
+        """
+        디코딩이 끝난 파일을 메인 스레드에서 마무리합니다.
+        budget_ms 만큼만 일하고 돌아오므로 화면이 멈추지 않습니다. (None이면 있는 것 전부 처리)
+        """
+        deadline = None if budget_ms is None else time.perf_counter() + budget_ms / 1000
+        while deadline is None or time.perf_counter() < deadline:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self._finish(*result)
+
+    def _finish(self, group, entry, image, mode, bundled=False):
+        filename, width, height, color_fallback, key_path = entry
+        HITCH_MONITOR.note("asset")
+        if image is not None or color_fallback is not None:
+            store_asset(self.assets, key_path, finish_image(filename, image, width, height, color_fallback, mode,
+                                                                quiet=bundled))
+        self.pending[group] -= 1
+        if self.pending[group] == 0:
+            self._complete(group)
+
+    def _complete(self, group):
+        finish_asset_group(self.assets, group)
+        self.timings[group] = time.perf_counter() - self.started[group]
+        source = f" (번들 {self.bundled[group]}/{self.totals[group]}개)" if self.bundle is not None else ""
+        print(f"[로딩] {group} 완료: {self.timings[group] * 1000:.0f} ms{source}")
+        audit_surface_formats(group, self.assets)
+
+    def release(self, group):
+        """다 불러온 그룹을 메모리에서 내려놓습니다. 다시 request()하면 새로 불러옵니다."""
+        if not self.is_ready(group):
+            return
+        release_asset_group(self.assets, group)
+        for table in (self.totals, self.pending, self.started, self.timings, self.bundled):
+            table.pop(group, None)
+
+    def is_ready(self, group):
+        return group in self.timings
+
+    def progress(self, *groups):
+        """요청한 그룹들의 진행률 (0.0 ~ 1.0)"""
+        total = sum(self.totals.get(g, 0) for g in groups)
+        if total == 0:
+            return 1.0 if all(self.is_ready(g) for g in groups) else 0.0
+        done = sum(self.totals.get(g, 0) - self.pending.get(g, 0) for g in groups)
+        return done / total
+
+    def wait(self, *groups):
+        """그룹이 모두 끝날 때까지 기다립니다. (도구/테스트용 동기 로딩)"""
+        for group in groups:
+            self.request(group)
+        while not all(self.is_ready(g) for g in groups):
+            self._finish(*self.results.get())
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+ALL_ASSET_GROUPS = ("title", "common", "chapter1", "chapter2", "chapter3", "background1", "background2", "background3")
+
+
+def load_game_assets():
+    """모든 에셋을 한 번에 불러옵니다. (창 없이 돌리는 도구용 동기 버전)"""
+    print("--- 에셋 로딩 시작 ---")
+    assets = new_asset_table()
+    loader = AssetLoader(assets, bundle=open_asset_bundle())
+    loader.wait(*ALL_ASSET_GROUPS)
+    loader.shutdown()
+    freeze_loaded_assets()
+    print("--- 에셋 로딩 완료 ---\n")
+    return assets
+
+
+# --- 5-1. 효과음 ---
+# 이름: (파일명, 동시에 재생할 수 있는 최대 개수)
+SOUND_EFFECTS = {
+    "jump": ("jump.mp3", 2),
+    "coin": ("coin.mp3", 3),
+}
+SFX_CHANNEL_COUNT = 6  # 효과음 전용으로 예약할 채널 수 (배경음악과 섞이지 않게)
+
+
+class SoundBank:
+    """
+    효과음을 한 번만 디코딩해 두고, 예약된 채널 풀에서 재생합니다.
+    파일이 없거나 믹서를 쓸 수 없으면 해당 효과음은 조용히 무시됩니다.
+    """
+
+    def __init__(self):
+        self.sounds = {}
+        self.limits = {}
+        self.channels = []
+        self.active = {}  # 이름 -> 그 효과음이 최근에 재생된 채널 목록 (오래된 순)
+
+    def load(self, effects, channel_count):
+        if not pygame.mixer.get_init():
+            print("[실패] 믹서를 사용할 수 없어 효과음을 끕니다.")
+            return
+        if pygame.mixer.get_num_channels() < channel_count + 2:
+            pygame.mixer.set_num_channels(channel_count + 2)
+        pygame.mixer.set_reserved(channel_count)
+        self.channels = [pygame.mixer.Channel(i) for i in range(channel_count)]
+
+        for name, (filename, limit) in effects.items():
+            self.limits[name] = limit
+            self.active[name] = []
+            path = find_asset_path(filename)
+            try:
+                HITCH_MONITOR.note("sound")
+                self.sounds[name] = pygame.mixer.Sound(path)
+                print(f"[성공] 효과음 로드: {filename}")
+            except (pygame.error, FileNotFoundError):
+                print(f"[실패] 효과음 없음: {filename} (무음 처리)")
+                print(f"      (탐색한 위치: {path})")
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is None:
+            return
+
+        # 아직 이 효과음을 재생 중인 채널만 남깁니다.
+        playing = [ch for ch in self.active[name] if ch.get_busy() and ch.get_sound() is sound]
+        if len(playing) >= self.limits[name]:
+            # 동시 재생 한도에 걸리면 가장 오래된 것을 끊고 그 채널에서 다시 재생
+            channel = playing.pop(0)
+        else:
+            channel = next((ch for ch in self.channels if not ch.get_busy()), None)
+            if channel is None:
+                self.active[name] = playing
+                return
+        channel.play(sound)
+        playing.append(channel)
+        self.active[name] = playing
+
+
+def load_sound_assets():
+    sounds = SoundBank()
+    sounds.load(SOUND_EFFECTS, SFX_CHANNEL_COUNT)
+    return sounds
+
+
+# 에셋은 init_assets()가 채웁니다. 그 전까지는 빈 구조/무음입니다.
+GAME_ASSETS = new_asset_table()
+GAME_SOUNDS = SoundBank()
+
+
+def init_assets(background=True):
+    """
+    효과음을 불러오고 이미지 로딩을 시작합니다. 사용 중인 AssetLoader를 돌려줍니다.
+    background=False면 모든 에셋이 준비될 때까지 기다립니다. (init_display() 이후에 호출)
+    """
+    started = time.perf_counter()
+    GAME_SOUNDS.load(SOUND_EFFECTS, SFX_CHANNEL_COUNT)
+    bundle_started = time.perf_counter()
+    bundle = open_asset_bundle()
+    record_startup_phase("bundle", bundle_started)
+    loader = AssetLoader(GAME_ASSETS, bundle=bundle)
+    loader.request("title")
+    loader.request("common")
+    if bundle is None:
+        # 이번 실행은 PNG에서 읽고, 다음 실행부터 쓸 번들은 작업 스레드에서 (로딩 요청 뒤에) 새로 만듭니다.
+        loader.executor.submit(build_asset_bundle)
+    if not background:
+        loader.wait(*ALL_ASSET_GROUPS)
+    record_startup_phase("assets", started)
+    return loader
+
+
+def init_headless_assets():
+    """
+    창 없이 시뮬레이션만 돌릴 때 사용합니다.
+    파일을 읽지 않고, 모든 이미지를 원래 크기의 색상 박스로 채웁니다. (충돌 크기는 실제와 같음)
+    """
+    for group in ALL_ASSET_GROUPS:
+        for filename, width, height, color_fallback, key_path in asset_manifest(group):
+            if color_fallback is None:
+                continue
+            surf = pygame.Surface((width if width > 0 else 50, height if height > 0 else 50))
+            surf.fill(color_fallback)
+            store_asset(GAME_ASSETS, key_path, surf)
+        finish_asset_group(GAME_ASSETS, group)
+
+# --- 5-2. Surface 형식 점검 ---
+# 화면 형식과 다른 Surface는 blit할 때마다 픽셀 형식을 바꿔 가며 그리므로 느립니다.
+# 그룹을 다 불러올 때마다 새로 생긴 Surface를 훑어, 형식이 다른 것과 blit 한 번 비용을 출력합니다.
+SURFACE_AUDIT_REPEATS = 5
+AUDITED_SURFACES = weakref.WeakSet()  # 이미 점검한 Surface (내려놓은 배경은 저절로 빠짐)
+
+
+def iter_surfaces(node, name):
+    """에셋 표를 따라가며 (이름, Surface)를 돌려줍니다. 캐시가 잘라 준 subsurface는 원본만 봅니다."""
+    if isinstance(node, pygame.Surface):
+        yield name, node
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            yield from iter_surfaces(value, f"{name}.{key}" if name else str(key))
+    elif isinstance(node, (list, tuple)):
+        for index, value in enumerate(node):
+            yield from iter_surfaces(value, f"{name}[{index}]")
+    elif isinstance(node, RoadStripCache):
+        yield f"{name}.strip", node.strip
+    elif isinstance(node, ParallaxBackground):
+        for index, layer in enumerate(node.layers):
+            yield f"{name}.layer{index}", layer.image
+    elif isinstance(node, ColorStripCache) and node.strip is not None:
+        yield f"{name}.strip", node.strip
+
+
+def shared_surfaces():
+    """에셋 표 밖에 있는 공용 Surface들"""
+    yield from iter_surfaces({"PIT_STRIPS": PIT_STRIPS, "SPEED_LINE_STRIPS": SPEED_LINE_STRIPS,
+                              "ITEM_FALLBACK_STRIPS": ITEM_FALLBACK_STRIPS,
+                              "COLLECTIBLE_IMAGES": COLLECTIBLE_IMAGES}, "")
+    if modal_overlay_surface is not None:
+        yield "modal_overlay", modal_overlay_surface
+
+
+def surface_format_issue(surface, display):
+    """화면 형식과 맞지 않으면 이유를, 맞으면 None을 돌려줍니다."""
+    has_alpha = bool(surface.get_masks()[3])
+    if surface.get_bitsize() != display.get_bitsize() or surface.get_masks()[:3] != display.get_masks()[:3]:
+        kind = "알파" if has_alpha else "불투명"
+        return f"{surface.get_bitsize()}비트 {kind} (화면 {display.get_bitsize()}비트)"
+    if has_alpha and alpha_mode(surface)[0] != "alpha":
+        return "반투명 픽셀이 없는데 per-pixel 알파"
+    return None
+
+
+def blit_cost_us(surface, target):
+    """surface를 target에 한 번 blit하는 시간(µs). 여러 번 재서 가장 짧은 값을 씁니다."""
+    best = None
+    for _ in range(SURFACE_AUDIT_REPEATS):
+        started = time.perf_counter()
+        target.blit(surface, (0, 0))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None or elapsed < best else best
+    return best * 1e6
+
+
+def audit_surface_formats(label, assets):
+    """
+    아직 점검하지 않은 Surface 중 화면 형식과 다른 것을 찾아 출력하고 (이름, 이유, 지금 µs, 변환 후 µs) 목록을 돌려줍니다.
+    비용은 화면 크기 버퍼에 한 번 blit하는 시간으로, 한 프레임에 한 번 그린다고 본 추정치입니다.
+    """
+    display = pygame.display.get_surface()
+    if display is None:
+        return []
+    target = None
+    checked = 0
+    findings = []
+    for name, surface in list(iter_surfaces(assets, "")) + list(shared_surfaces()):
+        if surface in AUDITED_SURFACES:
+            continue
+        AUDITED_SURFACES.add(surface)
+        checked += 1
+        issue = surface_format_issue(surface, display)
+        if issue is None:
+            continue
+        if target is None:
+            target = pygame.Surface(display.get_size()).convert()
+        fixed = convert_for_display(surface, *alpha_mode(surface))
+        findings.append((name, issue, blit_cost_us(surface, target), blit_cost_us(fixed, target)))
+    print(f"[서피스 점검] {label}: {checked}개 중 화면 형식과 다른 것 {len(findings)}개")
+    for name, issue, cost, fixed_cost in findings:
+        print(f"    {name}: {issue}, 프레임당 약 {cost:.0f} µs (변환하면 {fixed_cost:.0f} µs)")
+    return findings
+
+
+# --- 5-3. 에셋 번들 (미리 줄여 둔 픽셀을 mmap으로 읽기) ---
+# PNG 디코딩과 크기 조절은 빌드 때 한 번만 하고, 결과 픽셀(RGB/RGBA)을 색인과 함께 파일 하나에 이어 붙여 둡니다.
+# 실행할 때는 파일을 mmap하고 pygame.image.frombuffer로 Surface를 만드므로 디코딩/scale이 없습니다.
+# 색인의 키는 원본 파일 내용의 해시로 만들며, 원본이 추가/삭제/수정되면 낡은 번들로 보고 다시 만듭니다.
+ASSET_BUNDLE_PATH = os.path.join(CACHE_DIR, "assets.bundle")
+BUNDLE_MAGIC = b"ABDL"
+BUNDLE_VERSION = 1
+BUNDLE_HEADER = struct.Struct("<4sBI")  # 매직, 버전, 색인(JSON) 길이
+BUNDLE_ALIGN = 64                       # 이미지마다 시작 위치를 이 바이트 단위로 맞춤
+
+
+def bundle_entry_key(entry):
+    filename, width, height = entry[0], entry[1], entry[2]
+    return f"{filename}@{width}x{height}" + ("~mip" if entry_uses_mip(entry) else "")
+
+
+def bundle_entries():
+    """모든 그룹의 manifest 항목 (번들 키 -> 항목, 같은 파일/크기는 한 번만)"""
+    entries = {}
+    for group in ALL_ASSET_GROUPS:
+        for entry in asset_manifest(group):
+            entries.setdefault(bundle_entry_key(entry), entry)
+    return entries
+
+
+def source_digests(filenames, known=None):
+    """
+    원본 파일별 [mtime_ns, 크기, 내용 해시] (없는 파일은 None)
+    known(예전 색인)에 같은 mtime/크기로 기록된 해시가 있으면 파일을 다시 읽지 않습니다.
+    """
+    known = known or {}
+    digests = {}
+    for filename in sorted(filenames):
+        path = find_asset_path(filename)
+        try:
+            stat = os.stat(path)
+            record = known.get(filename)
+            if not (record and record[:2] == [stat.st_mtime_ns, stat.st_size]):
+                with open(path, "rb") as f:
+                    record = [stat.st_mtime_ns, stat.st_size, hashlib.blake2b(f.read(), digest_size=16).hexdigest()]
+        except OSError:
+            record = None
+        digests[filename] = record
+    return digests
+
+
+def bundle_key(entries, digests):
+    """번들 버전 + 항목(파일/크기) + 원본 내용 해시로 만든 키"""
+    key = hashlib.blake2b(f"v{BUNDLE_VERSION}".encode(), digest_size=16)
+    for name in sorted(entries):
+        key.update(name.encode("utf-8"))
+    for filename, record in sorted(digests.items()):
+        key.update(f"{filename}={record[2] if record else '-'}".encode("utf-8"))
+    return key.hexdigest()
+
+
+def bundle_data_start(index_length):
+    return (BUNDLE_HEADER.size + index_length + BUNDLE_ALIGN - 1) // BUNDLE_ALIGN * BUNDLE_ALIGN
+
+
+def build_asset_bundle(path=ASSET_BUNDLE_PATH):
+    """
+    모든 이미지를 디코딩/크기 조절해 번들 파일로 씁니다. (작업 스레드에서 호출해도 안전)
+    임시 파일에 다 쓴 뒤 바꿔 끼우므로, 쓰는 도중에 다른 실행이 반쯤 쓴 번들을 읽지 않습니다.
+    """
+    started = time.perf_counter()
+    entries = bundle_entries()
+    digests = source_digests({entry[0] for entry in entries.values()})
+    images = {}
+    chunks = []
+    offset = 0
+    for name, entry in sorted(entries.items()):
+        filename, width, height = entry[0], entry[1], entry[2]
+        if digests[filename] is None:
+            continue
+        image = decode_image(find_asset_path(filename), width, height, mip=entry_uses_mip(entry))
+        if image is None:
+            continue
+        kind, colorkey = alpha_mode(image)
+        pixel_format = "RGBA" if kind != "opaque" and image.get_masks()[3] else "RGB"
+        data = pygame.image.tobytes(image, pixel_format)
+        images[name] = {"offset": offset, "size": image.get_size(), "format": pixel_format, "mode": [kind, colorkey]}
+        chunks.append(data)
+        chunks.append(bytes(-len(data) % BUNDLE_ALIGN))
+        offset += len(data) + len(chunks[-1])
+    index = json.dumps({"key": bundle_key(entries, digests), "sources": digests, "images": images}).encode("utf-8")
+    temp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, "wb") as f:
+            f.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(index)))
+            f.write(index)
+            f.write(bytes(bundle_data_start(len(index)) - BUNDLE_HEADER.size - len(index)))
+            f.writelines(chunks)
+        os.replace(temp_path, path)
+    except OSError as exc:
+        print(f"[번들] 저장 실패: {exc}")
+        return None
+    elapsed = time.perf_counter() - started
+    print(f"[번들] 이미지 {len(images)}개, {offset / 2 ** 20:.1f} MB 저장: {path} ({elapsed * 1000:.0f} ms)")
+    return path
+
+
+class AssetBundle:
+    """mmap으로 연 번들 파일. lookup()으로 manifest 항목의 기록을 찾고, load()로 Surface를 만듭니다."""
+
+    def __init__(self, images, data_start, mapped):
+        self.images = images
+        self.data_start = data_start
+        self.mapped = mapped
+        self.view = memoryview(mapped)
+
+    def lookup(self, entry):
+        """번들에 없는 항목(파일이 없거나 못 읽은 것)은 None"""
+        return self.images.get(bundle_entry_key(entry))
+
+    def load(self, record):
+        """(Surface, alpha_mode 결과). Surface는 mmap 위의 픽셀을 복사 없이 그대로 가리킵니다."""
+        width, height = record["size"]
+        start = self.data_start + record["offset"]
+        pixels = self.view[start:start + width * height * len(record["format"])]
+        image = pygame.image.frombuffer(pixels, (width, height), record["format"])
+        kind, colorkey = record["mode"]
+        return image, (kind, tuple(colorkey) if colorkey else None)
+
+
+def open_asset_bundle(path=ASSET_BUNDLE_PATH):
+    """번들을 mmap으로 열고 원본과 맞는지 확인합니다. 없거나 낡았으면 이유를 출력하고 None을 돌려줍니다."""
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        print("[번들] 없음 - 원본 PNG에서 읽습니다.")
+        return None
+    try:
+        magic, version, index_length = BUNDLE_HEADER.unpack_from(mapped, 0)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+            raise ValueError("형식 버전이 다름")
+        index = json.loads(mapped[BUNDLE_HEADER.size:BUNDLE_HEADER.size + index_length])
+        entries = bundle_entries()
+        digests = source_digests({entry[0] for entry in entries.values()}, index["sources"])
+        if index["key"] != bundle_key(entries, digests):
+            raise ValueError("원본 파일이 바뀜")
+    except (ValueError, KeyError, TypeError, struct.error) as exc:
+        mapped.close()
+        print(f"[번들] 낡음({exc}) - 원본 PNG에서 읽습니다.")
+        return None
+    return AssetBundle(index["images"], bundle_data_start(index_length), mapped)
+
+
+# --- 6. 게임 진행도 변수 ---
+max_unlocked_chapter = 1
+character_roster = []
+
+
+# --- 7. 플레이어 클래스 ---
+class Player(pygame.sprite.Sprite):
+    def __init__(self, char_id):
+        super().__init__()
+        self.character_id = char_id
+        self.assets = GAME_ASSETS["characters"][char_id]
+        self.image = self.assets["run"][0]
+        self.rect = pygame.Rect(PLAYER_START_X, PLAYER_START_Y - PLAYER_HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT)
+        # rect는 월드 좌표입니다. 화면에서의 x 위치(screen_x)에 카메라 위치를 더해 맞춥니다.
+        self.screen_x = float(PLAYER_START_X)
+        self.run_index = 0
+        self.anim_timer = 0
+        self.anim_speed = 0.15
+        self.vel_y = 0
+        self.is_jumping = True
+        self.is_sliding = False
+        self.is_dead = False
+        self.is_reviving = False
+        self.double_jumps = 0
+        self.max_jumps = 2
+        self.effect_active = False
+        self.effect_start_time = 0
+        self.effect_duration = 3000
+        self.current_effect_color = None
+        self.high_jump_active = False
+        self.high_jump_end_time = 0
+        self.is_big = False
+        self.skill_used_this_chapter = False
+        self.is_visible = True
+        self.remember_position()
+
+    def update(self, pit_group, platform_group, speed, slide_held=False, now=0, camera_x=0.0):
+        """
+        한 틱만큼 플레이어를 진행합니다.
+        키보드/벽시계를 직접 읽지 않고, 슬라이드 키 상태(slide_held)와 시뮬레이션 시각(now, ms)을 받습니다.
+        """
+        if self.is_dead:
+            # 죽은 자리(월드 좌표)에 그대로 남아 화면 밖으로 흘러갑니다.
+            return
+        self.follow_camera(camera_x)
+
+        # [슬라이드 키 입력] 공중에 살짝 떠도 슬라이드 상태 유지
+        if slide_held and (not self.is_jumping or self.is_sliding):
+            self.slide(True)
+        else:
+            self.slide(False)
+
+        self.vel_y += GRAVITY
+        self.rect.y += self.vel_y
+
+        on_platform = False
+
+        # [수정] 떨어지는 중이거나(vel_y > 0) 바닥에 붙어있을 때 발판 체크
+        # '+ 15'로 인식 범위를 늘려서 슬라이드 시 발이 살짝 들려도 놓치지 않게 함
+        if self.vel_y >= 0:
+            platform_hits = platform_group.query(self.rect)
+            for platform in platform_hits:
+                # 발바닥이 발판 상단보다 살짝 아래(15px)까지 허용 -> 확실하게 밟힘
+                if self.rect.bottom <= platform.rect.top + (self.vel_y + 15) and self.rect.bottom >= platform.rect.top:
+                    if self.rect.right > platform.rect.left + 10 and self.rect.left < platform.rect.right - 10:
+                        self.rect.bottom = platform.rect.top
+                        self.vel_y = 0
+                        self.is_jumping = False
+                        self.double_jumps = 0
+                        on_platform = True
+                        break
+
+        # 바닥(GROUND) 체크
+        if self.rect.top > GROUND_Y:
+            self.is_dead = True
+            self.vel_y = 0
+            return
+
+        on_ground = (self.rect.bottom >= GROUND_Y)
+
+        if on_platform:
+            pass
+        elif on_ground:
+            pit_hit_list = pit_group.query(self.rect)
+            if pit_hit_list:
+                self.is_jumping = True
+            else:
+                self.rect.bottom = GROUND_Y
+                self.vel_y = 0
+                self.is_jumping = False
+                self.double_jumps = 0
+        else:
+            self.is_jumping = True
+
+        self.update_animation()
+
+        # (이펙트 처리 코드는 기존과 동일하므로 생략하지 않고 그대로 두셔도 됩니다)
+        # ... 아래 이펙트 코드는 그대로 두세요 ...
+        if self.effect_active:
+            current_time = int(now)
+            time_elapsed = current_time - self.effect_start_time
+            time_remaining = self.effect_duration - time_elapsed
+            if time_remaining <= 0:
+                self.deactivate_effect()
+            elif time_remaining < 1000:
+                self.is_visible = (current_time // 100) % 2 == 0
+            else:
+                self.is_visible = True
+        else:
+            self.is_visible = True
+
+        if self.high_jump_active:
+            if now > self.high_jump_end_time:
+                self.high_jump_active = False
+
+        if self.is_reviving:
+            self.screen_x += speed * 0.5
+            if self.screen_x >= PLAYER_START_X:
+                self.is_reviving = False
+                self.screen_x = float(PLAYER_START_X)
+        else:
+            self.screen_x = float(PLAYER_START_X)
+
+    def follow_camera(self, camera_x):
+        """카메라가 움직인 만큼 월드 좌표 rect를 옮겨, 화면상 위치를 screen_x로 유지합니다."""
+        if not self.is_dead:
+            self.rect.x = int(camera_x + self.screen_x)
+
+    def remember_position(self):
+        """틱을 진행하기 전 위치를 기억해 둡니다. (그릴 때 두 틱 사이를 보간하는 데 사용)"""
+        self.prev_screen_x = self.screen_x
+        self.prev_bottom = self.rect.bottom
+
+    def update_animation(self):
+        if self.is_sliding:
+            self.image = self.assets["slide"]
+        elif self.is_jumping:
+            self.image = self.assets["jump"]
+        else:
+            self.anim_timer += SIM_STEP_MS / 1000
+            if self.anim_timer >= self.anim_speed:
+                self.anim_timer = 0
+                self.run_index = (self.run_index + 1) % 3
+                self.image = self.assets["run"][self.run_index]
+
+    def jump(self):
+        jump_power = HIGH_JUMP_STRENGTH if self.high_jump_active else JUMP_STRENGTH
+        if self.double_jumps < self.max_jumps:
+            self.vel_y = jump_power
+            self.is_jumping = True
+            self.double_jumps += 1
+
+    def slide(self, is_sliding_key_pressed):
+        # 1. 슬라이드 시작
+        if is_sliding_key_pressed and not self.is_sliding:
+            self.is_sliding = True
+            # 현재 발 위치(midbottom)를 기억해둡니다.
+            current_pos = self.rect.midbottom
+            # 슬라이드 크기(높이 절반)로 Rect를 새로 잡되, 발 위치는 그대로 유지합니다.
+            self.rect = pygame.Rect(self.rect.x, 0, PLAYER_WIDTH, PLAYER_HEIGHT // 2)
+            self.rect.midbottom = current_pos
+
+        # 2. 슬라이드 끝 (일어서기)
+        elif not is_sliding_key_pressed and self.is_sliding:
+            self.is_sliding = False
+            # 다시 원래 발 위치를 기준으로 일어섭니다.
+            current_pos = self.rect.midbottom
+            self.rect = pygame.Rect(self.rect.x, 0, PLAYER_WIDTH, PLAYER_HEIGHT)
+            self.rect.midbottom = current_pos
+
+    def draw(self, surface, camera_x=0, alpha=1.0):
+        """alpha는 직전 틱(0.0)과 현재 틱(1.0) 사이 어디를 그릴지입니다. 그린 영역을 돌려줍니다. (안 그렸으면 None)"""
+        if not self.is_visible: return None
+        if self.is_dead:
+            return self.draw_dead(surface, force_y=GROUND_Y, camera_x=camera_x)
+        screen_x = self.prev_screen_x + (self.screen_x - self.prev_screen_x) * alpha
+        bottom = self.prev_bottom + (self.rect.bottom - self.prev_bottom) * alpha
+        x = int(camera_x + screen_x) - int(camera_x)
+        return surface.blit(self.image, (x, round(bottom) - self.rect.height))
+
+    def draw_dead(self, surface, force_y=None, camera_x=0):
+        die_image = GAME_ASSETS["die"]
+        bottom_y = force_y if force_y is not None else self.rect.bottom
+        center_x = self.rect.centerx - int(camera_x)
+        die_rect = die_image.get_rect(midbottom=(center_x, bottom_y))
+        return surface.blit(die_image, die_rect)
+
+    def activate_skill(self, now):
+        current_time = now
+        if not self.skill_used_this_chapter:
+            self.skill_used_this_chapter = True
+
+            # [수정] A 또는 D일 때: 높은 점프 (RED 효과)
+            if self.character_id in ['A', 'D']:
+                self.high_jump_active = True
+                self.high_jump_end_time = current_time + self.effect_duration
+                # D도 A와 똑같이 빨간색 이펙트를 냅니다.
+                # (만약 D는 노란색을 내고 싶다면 apply_effect(YELLOW, ...)로 색만 분기하면 됩니다)
+                self.apply_effect(RED, current_time, is_big=False)
+
+            # [수정] B 또는 E일 때: 거대화 (CYAN 효과)
+            elif self.character_id in ['B', 'E']:
+                self.apply_effect(CYAN, current_time, is_big=True)
+
+            # [수정] C 또는 F일 때: 대시 (YELLOW 효과)
+            elif self.character_id in ['C', 'F']:
+                self.apply_effect(YELLOW, current_time, is_big=False)
+
+            else:
+                # 스킬이 없는 캐릭터 (현재는 없음)
+                self.skill_used_this_chapter = False
+        else:
+            print("스킬을 이미 사용했습니다.")
+
+    def activate_item_effect(self, item_type, now):
+        if item_type == 'invincibility':
+            self.apply_effect(CYAN, now, is_big=True)
+        elif item_type == 'dash':
+            self.apply_effect(YELLOW, now, is_big=False)
+
+    def apply_effect(self, color, now, is_big=False):
+        self.effect_active = True
+        self.effect_start_time = now
+        self.current_effect_color = color
+        self.is_big = is_big
+        self.is_visible = True
+
+    def deactivate_effect(self):
+        self.effect_active = False
+        self.current_effect_color = None
+        self.is_big = False
+        self.is_visible = True
+
+    def revive(self, start_x, camera_x=0.0):
+        """start_x는 화면 기준 x 좌표입니다."""
+        self.is_dead = False
+        self.is_reviving = True
+        self.screen_x = float(start_x)
+        self.rect.bottomleft = (int(camera_x + start_x), GROUND_Y)
+        self.vel_y = 0
+        self.is_jumping = True
+        self.double_jumps = 0
+        self.is_visible = True
+        self.deactivate_effect()
+        self.remember_position()
+
+
+# --- 7-1. 오브젝트 풀 / 공용 Surface ---
+class EntityPool:
+    """
+    스프라이트 인스턴스를 재사용하는 풀입니다.
+    acquire()는 남는 인스턴스가 있으면 reset()으로 다시 초기화해서 돌려주고, 없을 때만 새로 만듭니다.
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.allocated = 0   # 지금까지 새로 만든 개수
+        self.live = 0        # 현재 사용 중인 개수
+        self.high_water = 0  # 동시에 사용된 최대 개수
+
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args, **kwargs)
+        else:
+            sprite = self.cls(*args, **kwargs)
+            self.allocated += 1
+        sprite.owner_pool = self
+        self.live += 1
+        if self.live > self.high_water:
+            self.high_water = self.live
+        return sprite
+
+    def release(self, sprite):
+        self.live -= 1
+        self.free.append(sprite)
+
+    def stats(self):
+        return {
+            "allocated": self.allocated,
+            "live": self.live,
+            "high_water": self.high_water,
+            "free": len(self.free),
+        }
+
+
+class PooledSprite(pygame.sprite.Sprite):
+    """
+    풀에서 꺼내 쓰는 스프라이트의 공통 부모입니다.
+    kill()이나 그룹 empty()로 모든 그룹에서 빠지면 자동으로 풀에 반납됩니다.
+    하위 클래스는 __init__과 같은 인자를 받는 reset()을 구현합니다.
+    """
+    pool = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.owner_pool = None
+        self.spawn_id = 0
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(*args, **kwargs)
+
+    def reset(self, *args, **kwargs):
+        raise NotImplementedError
+
+    def kill(self):
+        super().kill()
+        self.release()
+
+    def remove_internal(self, group):
+        super().remove_internal(group)
+        if not self.alive():
+            self.release()
+
+    def release(self):
+        if self.owner_pool is not None:
+            pool = self.owner_pool
+            self.owner_pool = None
+            pool.release(self)
+
+    def draw(self, surface, camera_x=0):
+        surface.blit(self.image, (self.rect.x - int(camera_x), self.rect.y))
+
+
+class ColorStripCache:
+    """
+    한 가지 색으로 채운 긴 띠를 한 번만 만들고, 너비별 subsurface를 돌려줍니다.
+    (구멍, 효과선처럼 단색 Surface를 매번 새로 만들지 않기 위해 사용)
+    """
+
+    def __init__(self, color, height, max_width=SCREEN_WIDTH):
+        self.color = color
+        self.height = height
+        self.max_width = max_width
+        self.strip = None
+        self.by_width = {}
+
+    def prepare(self):
+        """긴 띠를 미리 만들어 둡니다. (화면 형식으로 바꾸므로 창을 연 뒤에 호출)"""
+        if self.strip is None:
+            self.strip = to_display_format(pygame.Surface([self.max_width, self.height]))
+            self.strip.fill(self.color)
+        return self.strip
+
+    def get(self, width):
+        surface = self.by_width.get(width)
+        if surface is None:
+            HITCH_MONITOR.note("surface")
+            self.prepare()
+            if width <= self.max_width:
+                surface = self.strip.subsurface((0, 0, width, self.height))
+            else:
+                surface = to_display_format(pygame.Surface([width, self.height]))
+                surface.fill(self.color)
+            self.by_width[width] = surface
+        return surface
+
+
+PIT_STRIPS = ColorStripCache(BLACK, PIT_HEIGHT)
+SPEED_LINE_STRIPS = ColorStripCache(WHITE, 2, max_width=40)
+ITEM_FALLBACK_STRIPS = ColorStripCache(YELLOW, 60, max_width=60)
+COLLECTIBLE_IMAGES = {}
+
+
+def collectible_image(coll_type):
+    """젤리 이미지는 종류별로 하나만 만들어 공유합니다."""
+    image = COLLECTIBLE_IMAGES.get(coll_type)
+    if image is None:
+        image = to_display_format(pygame.Surface([20, 25]))
+        image.fill(BLACK)
+        if coll_type == 'grade_point':
+            pygame.draw.rect(image, MAGENTA, (0, 0, 20, 25), border_radius=7)
+        image.set_colorkey(BLACK, pygame.RLEACCEL)  # 다 그린 뒤에 RLE로 (이후엔 blit만 함)
+        COLLECTIBLE_IMAGES[coll_type] = image
+    return image
+
+
+def prepare_shared_surfaces():
+    """구멍/효과선/아이템 띠와 젤리 이미지를 로딩 때 미리 만들어 둡니다. (게임 중 할당 방지, 형식 점검 대상)"""
+    for strips in (PIT_STRIPS, SPEED_LINE_STRIPS, ITEM_FALLBACK_STRIPS):
+        strips.prepare()
+    collectible_image('grade_point')
+
+
+# --- 8. 장애물 클래스 ---
+class Obstacle(PooledSprite):
+    def reset(self, obs_type, chapter, x_pos=SCREEN_WIDTH, y_pos=GROUND_Y, rng=random):
+        self.obs_type = obs_type
+
+        # 크기 설정 (OBSTACLE_SIZES / OBSTACLE_RAISE 참고)
+        self.rect.size = OBSTACLE_SIZES[obs_type]
+        self.rect.bottomleft = (x_pos, y_pos - OBSTACLE_RAISE[obs_type])
+
+        # 이미지 랜덤 적용 (아틀라스에 이미 크기가 맞춰져 있으므로 고르기만 함)
+        images = GAME_ASSETS["obstacles"][chapter][self.obs_type]
+        self.image = images[rng.randrange(len(images))]
+
+
+# --- 9. 구멍 클래스 ---
+class Pit(PooledSprite):
+    def reset(self, x_pos=SCREEN_WIDTH, width=None, rng=random):
+        if width is None:
+            pit_width = rng.randint(100, 250)
+        else:
+            pit_width = width
+        self.image = PIT_STRIPS.get(pit_width)
+        self.rect.size = self.image.get_size()
+        self.rect.topleft = (x_pos, GROUND_Y)
+
+
+# --- 10. 플랫폼 클래스 ---
+class Platform(PooledSprite):
+    def reset(self, plat_type, width, x_pos=SCREEN_WIDTH, y_pos=None, rng=random):
+        self.plat_type = plat_type
+        plat_width = width
+
+        if self.plat_type == 'floating':
+            plat_y = y_pos if y_pos is not None else rng.randint(GROUND_Y - 180, GROUND_Y - 100)
+        elif self.plat_type == 'low_ground':
+            plat_y = y_pos if y_pos is not None else GROUND_Y - 80
+        elif self.plat_type == 'ground':
+            plat_y = y_pos if y_pos is not None else GROUND_Y
+
+        # 도로 이미지는 로딩 때 만들어 둔 스트립을 공유합니다. (scale/타일 blit 없음)
+        self.image = GAME_ASSETS["road_strips"].get(plat_width)
+        self.rect.size = self.image.get_size()
+        self.rect.topleft = (x_pos, plat_y)
+
+
+# --- 11. 아이템/젤리 등 ---
+class Item(PooledSprite):
+    def reset(self, item_type, x_pos=SCREEN_WIDTH, rng=random):
+        self.item_type = item_type
+        if self.item_type == 'invincibility':
+            self.image = GAME_ASSETS["items"]["invincibility"]
+        elif self.item_type == 'dash':
+            self.image = GAME_ASSETS["items"]["dash"]
+        else:
+            self.image = ITEM_FALLBACK_STRIPS.get(60)
+        float_y = rng.randint(GROUND_Y - 120, GROUND_Y - 50)
+        self.rect.size = self.image.get_size()
+        self.rect.midleft = (x_pos, float_y)
+
+
+class Collectible(PooledSprite):
+    despawn_margin = 20  # 화면 왼쪽 20px 안쪽에서 미리 사라짐
+
+    def reset(self, coll_type, x_pos=SCREEN_WIDTH, y_pos=None, rng=random):
+        self.coll_type = coll_type
+        self.image = collectible_image(coll_type)
+        if y_pos is None: y_pos = rng.randint(GROUND_Y - 180, GROUND_Y - 50)
+        self.rect.size = self.image.get_size()
+        self.rect.midleft = (x_pos, y_pos)
+
+
+class SpeedLine(PooledSprite):
+    """
+    대시 효과선. 화면에서 스크롤 속도의 5배로 흘러갑니다.
+    매 프레임 움직이지 않고, 생성 시점의 카메라 위치로부터 화면 위치를 계산합니다.
+    """
+    SPEED_FACTOR = 5
+
+    def reset(self, camera_x=0.0, rng=random):
+        self.image = SPEED_LINE_STRIPS.get(rng.randint(20, 40))
+        y_pos = rng.randint(0, SCREEN_HEIGHT)
+        self.spawn_camera_x = camera_x
+        self.rect.size = self.image.get_size()
+        self.rect.topleft = (SCREEN_WIDTH, y_pos)
+        # 화면 오른쪽 끝이 0보다 작아지는 카메라 위치
+        self.despawn_x = camera_x + self.rect.right / self.SPEED_FACTOR
+
+    def screen_x(self, camera_x):
+        return int(SCREEN_WIDTH - (camera_x - self.spawn_camera_x) * self.SPEED_FACTOR)
+
+
+for _pooled_cls in (Obstacle, Pit, Platform, Item, Collectible, SpeedLine):
+    _pooled_cls.pool = EntityPool(_pooled_cls)
+ENTITY_POOLS = {cls.__name__: cls.pool for cls in (Obstacle, Pit, Platform, Item, Collectible, SpeedLine)}
+
+
+# --- 11-1. x축 격자 인덱스 그룹 (충돌 후보 빠르게 찾기) ---
+LANE_CELL_WIDTH = 128
+
+
+class LaneGroup(pygame.sprite.Group):
+    """
+    스크롤 방향(x)으로 일정한 칸(LANE_CELL_WIDTH)을 나눠, 각 칸에 걸친 스프라이트를 기억하는 그룹입니다.
+    월드 좌표의 스프라이트는 움직이지 않으므로 넣을 때 한 번만 칸을 계산하면 되고,
+    kill()/empty() 등으로 빠질 때 자동으로 인덱스에서도 지워집니다.
+    query(rect)는 rect 근처 칸만 확인하므로, 전체 스프라이트 수와 상관없이 빠릅니다.
+    """
+
+    def __init__(self, cell_width=LANE_CELL_WIDTH):
+        super().__init__()
+        self.cell_width = cell_width
+        self.cells = {}
+        self.spans = {}
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        first = sprite.rect.left // self.cell_width
+        last = (sprite.rect.right - 1) // self.cell_width
+        self.spans[sprite] = (first, last)
+        for cell in range(first, last + 1):
+            self.cells.setdefault(cell, []).append(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        first, last = self.spans.pop(sprite)
+        for cell in range(first, last + 1):
+            bucket = self.cells[cell]
+            bucket.remove(sprite)
+            if not bucket:
+                del self.cells[cell]
+
+    def query(self, rect):
+        """rect와 겹치는 스프라이트 목록 (넣은 순서와 무관)"""
+        first = rect.left // self.cell_width
+        last = (rect.right - 1) // self.cell_width
+        hits = []
+        for cell in range(first, last + 1):
+            bucket = self.cells.get(cell)
+            if bucket:
+                for sprite in bucket:
+                    if sprite.rect.colliderect(rect) and sprite not in hits:
+                        hits.append(sprite)
+        return hits
+
+
+# --- 11-2. 챕터 코스 (미리 만들어 두는 스폰 기록) ---
+# 스폰 기록 종류와 변형 이름 (배열에는 번호로 저장)
+SPAWN_OBSTACLE = 0
+SPAWN_PIT = 1
+SPAWN_PLATFORM = 2
+SPAWN_ITEM = 3
+SPAWN_COLLECTIBLE = 4
+OBSTACLE_TYPES = ("force_jump", "tall_jump", "force_slide")
+PLATFORM_TYPES = ("floating", "low_ground")
+ITEM_TYPES = ("invincibility", "dash")
+ITEM_SPAN = 60  # 아이템이 다른 것과 겹치는지 볼 때 쓰는 대략적인 너비
+FIRST_PATTERN_MS = 2000
+
+# 직접 만든 구간: 이름 -> (나오기 시작하는 챕터, 가중치, [(시작 ms, 종류, 변형, 너비, y, x 오프셋), ...])
+# y가 -1이면 종류별 기본 높이, 발판 위 장애물은 발판 윗면 y를 적습니다.
+AUTHORED_CHUNKS = {
+    "double_hurdle": (1, 1.0, [(0, SPAWN_OBSTACLE, 0, 0, -1, 0),
+                               (550, SPAWN_OBSTACLE, 0, 0, -1, 0)]),
+    "jump_then_slide": (1, 1.0, [(0, SPAWN_OBSTACLE, 0, 0, -1, 0),
+                                 (1000, SPAWN_OBSTACLE, 2, 0, -1, 0)]),
+    "low_step": (1, 0.8, [(0, SPAWN_PLATFORM, 1, 400, GROUND_Y - 80, 0),
+                          (700, SPAWN_PLATFORM, 0, 350, GROUND_Y - 160, 0)]),
+    "pit_then_hurdle": (2, 1.0, [(0, SPAWN_PIT, 0, 150, -1, 0),
+                                 (1100, SPAWN_OBSTACLE, 0, 0, -1, 0)]),
+    "guarded_platform": (2, 0.8, [(0, SPAWN_PLATFORM, 0, 450, GROUND_Y - 140, 0),
+                                  (0, SPAWN_OBSTACLE, 0, 0, GROUND_Y - 140, 200)]),
+    "tall_then_pit": (3, 0.8, [(0, SPAWN_OBSTACLE, 1, 0, -1, 0),
+                               (1200, SPAWN_PIT, 0, 120, -1, 0)]),
+}
+AUTHORED_CHUNK_CHANCE = 0.35
+
+# 절차 생성 구간의 종류별 가중치 (장애물, 구멍, 발판)
+PROCEDURAL_WEIGHTS = (0.5, 0.2, 0.3)
+# 구간 사이 간격: (이 속도 미만이면, 최소 ms, 최대 ms). 마지막 줄은 나머지 전부
+PATTERN_DELAY_BANDS = ((9, 400, 1200), (12, 300, 900), (None, 250, 700))
+
+# 코스 기록이 어느 구간(패턴)에서 나왔는지 (난이도 분석에서 "어떤 패턴에서 죽었나"를 셀 때 사용)
+PATTERN_NAMES = (("-",) + OBSTACLE_TYPES + ("pit",) + PLATFORM_TYPES
+                 + tuple(f"{p}+{o}" for p in PLATFORM_TYPES for o in OBSTACLE_TYPES[:2])
+                 + tuple(AUTHORED_CHUNKS))
+PATTERN_IDS = {name: i for i, name in enumerate(PATTERN_NAMES)}
+
+
+class Course:
+    """
+    챕터 한 판 분량의 스폰 기록입니다. 시간(ms) 순으로 정렬된 평행 배열에 담겨 있고,
+    World는 커서 하나로 "다음 기록의 시간이 되었나"만 비교하며 앞에서부터 꺼내 씁니다.
+    """
+
+    def __init__(self):
+        self.times = array("i")
+        self.kinds = array("B")
+        self.variants = array("B")
+        self.widths = array("H")
+        self.ys = array("h")
+        self.offsets = array("h")
+        self.patterns = array("B")  # PATTERN_NAMES 번호 (젤리/아이템은 0)
+
+    def __len__(self):
+        return len(self.times)
+
+    def add(self, time_ms, kind, variant=0, width=0, y=-1, offset=0, pattern=0):
+        self.times.append(int(time_ms))
+        self.kinds.append(kind)
+        self.variants.append(variant)
+        self.widths.append(width)
+        self.ys.append(y)
+        self.offsets.append(offset)
+        self.patterns.append(pattern)
+
+
+def nominal_speed(chapter, time_ms):
+    """대시/젤리 보너스를 빼고 계산한 그 시각의 스크롤 속도 (픽셀/틱)"""
+    return CHAPTER_SPEEDS.get(chapter, 7) + (SPEED_BOOST if time_ms // 1000 > SPEED_BOOST_AFTER_SECONDS else 0)
+
+
+def nominal_camera_x(chapter, time_ms):
+    """대시/젤리 보너스 없이 달렸을 때 그 시각의 카메라 위치"""
+    ticks = time_ms / SIM_STEP_MS
+    boosted = max(0.0, ticks - (SPEED_BOOST_AFTER_SECONDS + 1) * 1000 / SIM_STEP_MS)
+    return CHAPTER_SPEEDS.get(chapter, 7) * ticks + SPEED_BOOST * boosted
+
+
+def pattern_delay(rng, speed):
+    """다음 장애물 구간까지의 간격(ms). 빠를수록 촘촘합니다."""
+    for below_speed, low, high in PATTERN_DELAY_BANDS:
+        if below_speed is None or speed < below_speed:
+            return rng.randint(low, high)
+
+
+def procedural_chunk(rng):
+    """
+    예전 실시간 스폰과 같은 규칙(장애물 0.5 / 구멍 0.2 / 발판 0.3)으로 구간 하나를 만듭니다.
+    (패턴 이름, 기록 목록)을 돌려줍니다.
+    """
+    spawn_choice = rng.choices((SPAWN_OBSTACLE, SPAWN_PIT, SPAWN_PLATFORM), weights=PROCEDURAL_WEIGHTS, k=1)[0]
+    if spawn_choice == SPAWN_OBSTACLE:
+        variant = rng.randrange(len(OBSTACLE_TYPES))
+        return OBSTACLE_TYPES[variant], [(0, SPAWN_OBSTACLE, variant, 0, -1, 0)]
+    if spawn_choice == SPAWN_PIT:
+        return "pit", [(0, SPAWN_PIT, 0, rng.randint(100, 250), -1, 0)]
+    plat_variant = rng.randrange(len(PLATFORM_TYPES))
+    if PLATFORM_TYPES[plat_variant] == 'floating':
+        width = rng.randint(300, 550)
+        plat_y = rng.randint(GROUND_Y - 180, GROUND_Y - 100)
+    else:
+        width = rng.randint(300, 600)
+        plat_y = GROUND_Y - 80
+    name = PLATFORM_TYPES[plat_variant]
+    records = [(0, SPAWN_PLATFORM, plat_variant, width, plat_y, 0)]
+    if rng.random() < 0.5:
+        # 발판 위 장애물은 force_jump / tall_jump 중 하나
+        variant = rng.randrange(2)
+        records.append((0, SPAWN_OBSTACLE, variant, 0, plat_y, rng.randint(30, width - 60)))
+        name = f"{name}+{OBSTACLE_TYPES[variant]}"
+    return name, records
+
+
+def generate_course(chapter, seed, validate=True):
+    """
+    챕터 전체(45초 + 여유 1초)의 스폰 기록을 만듭니다. LOADING_TRANSITION 동안 호출합니다.
+    같은 (chapter, seed)면 항상 같은 코스가 나옵니다. (World의 rng와는 따로 움직임)
+    validate=True면 점프/슬라이드만으로 통과할 수 없는 곳을 check_course()로 찾아 고칩니다.
+    """
+    rng = random.Random(f"course-{chapter}-{seed}")
+    end_ms = (CHAPTER_DURATION_SECONDS + 1) * 1000
+    chunks = [(name, weight) for name, (min_chapter, weight, _) in AUTHORED_CHUNKS.items() if chapter >= min_chapter]
+    records = []
+    spans = []            # 장애물/발판이 차지하는 명목 월드 x 구간 (아이템 겹침 확인용)
+    platforms_until = 0   # 마지막 발판이 화면에서 사라지는 시각. 그 전에는 구멍을 만들지 않습니다.
+
+    t = FIRST_PATTERN_MS
+    while t < end_ms:
+        if chunks and rng.random() < AUTHORED_CHUNK_CHANCE:
+            name = rng.choices([c[0] for c in chunks], weights=[c[1] for c in chunks], k=1)[0]
+            chunk = AUTHORED_CHUNKS[name][2]
+        else:
+            name, chunk = procedural_chunk(rng)
+        pattern = PATTERN_IDS[name]
+
+        for offset_ms, kind, variant, width, y, dx in chunk:
+            at = t + offset_ms
+            if at >= end_ms:
+                break
+            speed = nominal_speed(chapter, at)
+            x = nominal_camera_x(chapter, at) + SCREEN_WIDTH + dx
+            if kind == SPAWN_PIT and at < platforms_until:
+                continue
+            if kind == SPAWN_PLATFORM:
+                platforms_until = max(platforms_until, at + (SCREEN_WIDTH + width) / speed * SIM_STEP_MS)
+                spans.append((x, x + width))
+            elif kind == SPAWN_OBSTACLE:
+                spans.append((x, x + OBSTACLE_SIZES[OBSTACLE_TYPES[variant]][0]))
+            records.append((at, kind, variant, width, y, dx, pattern))
+
+        t += chunk[-1][0] + pattern_delay(rng, nominal_speed(chapter, t))
+
+    # 젤리: 1초마다 70%
+    for at in range(COLLECTIBLE_SPAWN_INTERVAL_MS, end_ms, COLLECTIBLE_SPAWN_INTERVAL_MS):
+        if rng.random() < 0.7:
+            records.append((at, SPAWN_COLLECTIBLE, 0, 0, rng.randint(GROUND_Y - 180, GROUND_Y - 50), 0))
+
+    # 아이템: 6초마다 시도해서 장애물/발판과 겹치지 않는 자리에 1~2개
+    item_limit = rng.randint(1, 2)
+    item_count = 0
+    for at in range(ITEM_SPAWN_INTERVAL_MS, end_ms, ITEM_SPAWN_INTERVAL_MS):
+        if item_count >= item_limit:
+            break
+        x = nominal_camera_x(chapter, at) + SCREEN_WIDTH
+        if any(start < x + ITEM_SPAN and x < end for start, end in spans):
+            continue
+        records.append((at, SPAWN_ITEM, rng.randrange(len(ITEM_TYPES)), 0, -1, 0))
+        item_count += 1
+
+    records.sort(key=lambda r: r[0])  # 안정 정렬이라 같은 시각이면 발판 -> 그 위 장애물 순서가 유지됨
+    if validate:
+        return repair_course(records, chapter)
+    return build_course(records)
+
+
+def timed_generate_course(chapter, seed):
+    """generate_course()와 같지만 (코스, 걸린 ms)를 돌려줍니다. 로딩 스레드에서 부릅니다."""
+    started = time.perf_counter()
+    course = generate_course(chapter, seed)
+    return course, (time.perf_counter() - started) * 1000
+
+
+def build_course(records):
+    course = Course()
+    for record in records:
+        course.add(*record)
+    return course
+
+
+# --- 11-3. 코스 풀이 가능성 검사 (NumPy) ---
+SLIDE_HEIGHT = PLAYER_HEIGHT // 2
+# 검사에서 다루는 rect.bottom / vel_y 범위 (높은 점프 2번을 해도 넘지 않는 넉넉한 값)
+STATE_Y_MIN = -512
+STATE_VEL_MIN = -32
+STATE_VEL_SPAN = 128
+MAX_COURSE_REPAIRS = 12
+
+
+class CourseObject:
+    """검사용으로 월드 좌표에 펼친 코스 기록 하나 (명목 카메라 기준)"""
+    __slots__ = ("index", "kind", "tick", "left", "top", "right", "bottom")
+
+    def __init__(self, index, kind, tick, left, top, width, height):
+        self.index = index
+        self.kind = kind
+        self.tick = tick
+        self.left = left
+        self.top = top
+        self.right = left + width
+        self.bottom = top + height
+
+
+def course_layout(course, chapter):
+    """
+    코스를 대시/젤리 없이 달렸을 때의 틱별 카메라 위치와, 각 기록이 생기는 틱/월드 좌표 사각형으로 펼칩니다.
+    World.step()과 같은 순서(이동 -> 컬링 -> 스폰)와 같은 규칙(발판이 남아 있으면 구멍 생략)을 따릅니다.
+    """
+    last_tick = int((CHAPTER_DURATION_SECONDS + 1) * 1000 / SIM_STEP_MS) + 2
+    camera = [0.0] * (last_tick + 1)
+    base = CHAPTER_SPEEDS.get(chapter, 7)
+    for tick in range(1, last_tick + 1):
+        boost = SPEED_BOOST if int(tick * SIM_STEP_MS // 1000) > SPEED_BOOST_AFTER_SECONDS else 0
+        camera[tick] = camera[tick - 1] + base + boost
+
+    objects = []
+    platforms = []
+    for i in range(len(course)):
+        kind = course.kinds[i]
+        if kind in (SPAWN_ITEM, SPAWN_COLLECTIBLE):
+            continue
+        # World.step()의 'now >= next_spawn_time'을 처음 만족하는 틱
+        tick = max(1, math.ceil(course.times[i] / SIM_STEP_MS))
+        while tick > 1 and (tick - 1) * SIM_STEP_MS >= course.times[i]:
+            tick -= 1
+        while tick * SIM_STEP_MS < course.times[i]:
+            tick += 1
+        if tick > last_tick:
+            break
+        x = int(camera[tick]) + SCREEN_WIDTH + course.offsets[i]
+        y = course.ys[i]
+        if kind == SPAWN_OBSTACLE:
+            width, height = OBSTACLE_SIZES[OBSTACLE_TYPES[course.variants[i]]]
+            bottom = (GROUND_Y if y < 0 else y) - OBSTACLE_RAISE[OBSTACLE_TYPES[course.variants[i]]]
+            objects.append(CourseObject(i, kind, tick, x, bottom - height, width, height))
+        elif kind == SPAWN_PIT:
+            if any(p.tick <= tick and p.right >= camera[tick] for p in platforms):
+                continue
+            objects.append(CourseObject(i, kind, tick, x, GROUND_Y, course.widths[i], PIT_HEIGHT))
+        elif kind == SPAWN_PLATFORM:
+            platform = CourseObject(i, kind, tick, x, y, course.widths[i], PLATFORM_HEIGHT)
+            platforms.append(platform)
+            objects.append(platform)
+    objects.sort(key=lambda o: o.left)
+    return camera, objects
+
+
+def check_course(course, chapter, jump_strength=JUMP_STRENGTH):
+    """
+    코스를 아이템/스킬/젤리 없이, 점프(2단 점프 포함)와 슬라이드만으로 끝까지 지나갈 수 있는지 확인합니다.
+    도달 가능한 플레이어 상태(발 위치, vel_y, 사용한 점프 수, 공중 여부, 슬라이드)를 NumPy 배열로 들고,
+    매 틱 모든 상태에 가능한 입력(점프/슬라이드)을 한꺼번에 적용해 Player.update()와 같은 규칙으로 진행합니다.
+    x는 모든 상태가 같으므로(카메라를 따라감) 상태에 넣지 않습니다.
+
+    (True, None) 또는 (False, 막히는 틱)을 돌려줍니다. NumPy가 없으면 (True, None).
+    """
+    if np is None:
+        return True, None
+    camera, objects = course_layout(course, chapter)
+    clear_tick = next(t for t in range(len(camera)) if int(t * SIM_STEP_MS // 1000) > CHAPTER_DURATION_SECONDS)
+    gravity = int(GRAVITY)
+    empty = np.iinfo(np.int32).max  # 중력/점프 힘이 정수라 rect.y가 반올림 없이 그대로 움직입니다.
+
+    # 시작 상태: 바닥에 서 있고 공중 판정(is_jumping=True), 점프 0회
+    bottom = np.array([GROUND_Y], dtype=np.int32)
+    vel = np.zeros(1, dtype=np.int32)
+    jumps = np.zeros(1, dtype=np.int32)
+    jumping = np.ones(1, dtype=bool)
+    sliding = np.zeros(1, dtype=bool)
+
+    # 상태 칸 번호 -> 그 칸에 남길 상태 (중복 제거용, 정렬 없이 O(n). 쓴 칸은 매 틱 다시 비웁니다)
+    owner = np.full((GROUND_Y + PLAYER_HEIGHT + 1 - STATE_Y_MIN) * STATE_VEL_SPAN * 4, empty, dtype=np.int32)
+    nearby = []
+    next_object = 0
+    settled, signature = False, None
+    for tick in range(1, clear_tick):
+        # 이번 틱에 플레이어 근처(화면 x 기준 앞뒤)에 있을 수 있는 물체만 추립니다.
+        left = int(camera[tick - 1] + PLAYER_START_X)
+        while next_object < len(objects) and objects[next_object].left < left + PLAYER_WIDTH + 400:
+            nearby.append(objects[next_object])
+            next_object += 1
+        nearby = [o for o in nearby if o.right > left - 50]
+
+        # 플레이어와 겹치는 물체가 없고 상태 집합이 이미 더 변하지 않으면(자유 달리기의 고정점) 계산을 건너뜁니다.
+        free = not any(o.left < left + PLAYER_WIDTH + 20 and o.right > left - 20 for o in nearby if o.tick <= tick)
+        if free and settled:
+            continue
+
+        # 1. 점프 입력: 점프할 수 있는 상태만 '점프함' 갈래를 하나 더 만듭니다.
+        can_jump = jumps < 2
+        count = len(bottom)
+        bottom = np.concatenate((bottom, bottom[can_jump]))
+        added = len(bottom) - count
+        vel = np.concatenate((vel, np.full(added, jump_strength, dtype=np.int32)))
+        jumps = np.concatenate((jumps, jumps[can_jump] + 1))
+        jumping = np.concatenate((jumping, np.ones(added, dtype=bool)))
+        sliding = np.concatenate((sliding, sliding[can_jump]))
+
+        # 2. 슬라이드 키: 떼면 일어서고, 누르면 (바닥이거나 이미 슬라이드 중일 때) 슬라이드.
+        #    결과가 달라지는 상태만 '누름' 갈래를 만듭니다. 발 위치는 그대로이고 높이만 바뀝니다.
+        held = ~jumping | sliding
+        count = len(bottom)
+        bottom = np.concatenate((bottom, bottom[held]))
+        vel = np.concatenate((vel, vel[held]))
+        jumps = np.concatenate((jumps, jumps[held]))
+        sliding = np.zeros(len(bottom), dtype=bool)
+        sliding[count:] = True
+        height = np.where(sliding, SLIDE_HEIGHT, PLAYER_HEIGHT).astype(np.int32)
+
+        # 3. 중력
+        vel += gravity
+        bottom += vel
+        top = bottom - height
+
+        # 4. 발판 착지 (떨어지는 중이고, 발바닥이 윗면 근처일 때)
+        landed = np.zeros(len(bottom), dtype=bool)
+        for o in nearby:
+            if o.kind != SPAWN_PLATFORM or o.tick >= tick:
+                continue
+            if not (left + PLAYER_WIDTH > o.left + 10 and left < o.right - 10):
+                continue
+            land = ~landed & (vel >= 0) & (top < o.bottom) & (bottom > o.top) & (bottom <= o.top + vel + 15)
+            bottom[land] = o.top
+            vel[land] = 0
+            landed |= land
+        jumps[landed] = 0
+        top = bottom - height
+
+        # 5. 바닥 / 구멍
+        alive = top <= GROUND_Y
+        in_pit = np.zeros(len(bottom), dtype=bool)
+        for o in nearby:
+            if o.kind == SPAWN_PIT and o.tick < tick and left < o.right and left + PLAYER_WIDTH > o.left:
+                in_pit |= (top < o.bottom) & (bottom > o.top)
+        snap = ~landed & ~in_pit & (bottom >= GROUND_Y)
+        bottom[snap] = GROUND_Y
+        vel[snap] = 0
+        jumps[snap] = 0
+        jumping = ~(snap | landed)
+
+        # 6. 카메라 이동 후 장애물 충돌
+        left = int(camera[tick] + PLAYER_START_X)
+        top = bottom - height
+        for o in nearby:
+            if o.kind == SPAWN_OBSTACLE and o.tick <= tick and left < o.right and left + PLAYER_WIDTH > o.left:
+                alive &= (top >= o.bottom) | (bottom <= o.top)
+
+        # 7. 살아남은 상태만 남기고 합치기. (점프를 덜 쓴 상태가 더 많이 쓴 같은 상태를 대신함)
+        if not alive.all():
+            bottom, vel, jumps, jumping, sliding = bottom[alive], vel[alive], jumps[alive], jumping[alive], sliding[alive]
+        if len(bottom) == 0:
+            return False, tick
+        # 칸마다 (점프 수, 순서)가 가장 작은 상태 하나만 남깁니다.
+        cell = (((bottom - STATE_Y_MIN) * STATE_VEL_SPAN + vel - STATE_VEL_MIN) * 2 + jumping) * 2 + sliding
+        rank = jumps * len(bottom) + np.arange(len(bottom), dtype=np.int32)
+        np.minimum.at(owner, cell, rank)
+        first = owner[cell] == rank
+        owner[cell] = empty
+        bottom, vel, jumps, jumping, sliding = bottom[first], vel[first], jumps[first], jumping[first], sliding[first]
+        if not free:
+            settled, signature = False, None
+        else:
+            code = np.sort(cell[first] * 4 + jumps)
+            settled = signature is not None and np.array_equal(code, signature)
+            signature = code
+    return True, None
+
+
+def repair_course(records, chapter):
+    """
+    풀 수 없는 코스면 막히는 지점에 가장 가까운 장애물/구멍 기록을 하나씩 빼면서 다시 검사합니다.
+    (records는 시간 순으로 정렬된 기록 튜플 목록, 고친 Course를 돌려줌)
+    """
+    course = build_course(records)
+    for _ in range(MAX_COURSE_REPAIRS):
+        ok, fail_tick = check_course(course, chapter)
+        if ok:
+            break
+        camera, objects = course_layout(course, chapter)
+        player_left = int(camera[fail_tick]) + PLAYER_START_X
+        candidates = [o for o in objects if o.kind != SPAWN_PLATFORM and o.tick <= fail_tick]
+        if not candidates:
+            break
+        culprit = min(candidates, key=lambda o: max(o.left - player_left - PLAYER_WIDTH, player_left - o.right, 0))
+        del records[culprit.index]
+        course = build_course(records)
+    return course
+
+
+# --- 12. 시뮬레이션 월드 (창/벽시계 없이 PLAYING 상태 진행) ---
+SIM_STEP_MS = 1000 / FPS  # 한 틱의 시뮬레이션 시간 (고정 간격)
+CHAPTER_DURATION_SECONDS = 45
+CHAPTER_SPEEDS = {1: 6, 2: 8, 3: 10}
+SPEED_BOOST_AFTER_SECONDS = 30  # 이 시간이 지나면 SPEED_BOOST만큼 빨라짐
+SPEED_BOOST = 1
+ITEM_SPAWN_INTERVAL_MS = 6000
+COLLECTIBLE_SPAWN_INTERVAL_MS = 1000
+
+
+class InputFrame:
+    """
+    한 틱 동안의 입력입니다.
+    jump/skill은 이번 틱에 눌렸는지, slide는 아래 키를 누르고 있는지를 뜻합니다.
+    """
+    __slots__ = ("jump", "slide", "skill")
+
+    def __init__(self, jump=False, slide=False, skill=False):
+        self.jump = jump
+        self.slide = slide
+        self.skill = skill
+
+
+NO_INPUT = InputFrame()
+
+
+class World:
+    """
+    PLAYING 상태의 게임 로직(플레이어, 장애물/구멍/발판, 스폰, 학점 규칙)을 담당합니다.
+    pygame 이벤트, 화면, clock을 쓰지 않고 InputFrame과 시뮬레이션 시각(now, ms)만으로 진행되므로
+    창 없이도 실제 시간보다 훨씬 빠르게 돌릴 수 있습니다.
+
+    step()이 끝나면 outcome이 바뀌었는지 확인합니다.
+        None            : 계속 진행
+        "relay"         : 1번 주자 사망 -> 이어달리기 여부 확인
+        "game_over"     : 2번 주자까지 사망
+        "chapter_clear" : 챕터 클리어 (다음 챕터로)
+        "game_clear"    : 마지막 챕터 클리어
+    events에는 이번 틱에 발생한 효과음 이벤트("jump", "coin")가 담깁니다.
+
+    모든 무작위 선택은 seed로 만든 self.rng 하나에서 나오므로,
+    같은 seed와 같은 틱별 입력이면 언제 돌려도 같은 판이 나옵니다. (Replay 참고)
+
+    장애물/발판 등은 월드 좌표에 고정되어 있고, 스크롤은 camera_x 하나만 움직입니다.
+    화면 x = 월드 x - camera_x 이며, 그리는 쪽에서 오프셋을 적용합니다.
+    """
+
+    def __init__(self, roster, chapter, seed=None, course=None):
+        self.chapter = chapter
+        self.roster = tuple(roster[:2])
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        # 장애물/발판/아이템/젤리는 미리 만든 코스에서 시간 순으로 꺼냅니다.
+        self.course = course if course is not None else generate_course(chapter, self.seed)
+        self.course_index = 0
+        self.next_spawn_time = self.course.times[0] if len(self.course) else float("inf")
+        self.base_speed = CHAPTER_SPEEDS.get(chapter, 7)
+
+        self.player1 = Player(roster[0])
+        self.player2 = Player(roster[1])
+        self.player2.is_dead = True
+        self.player2.rect.x = -200
+        self.current_player = self.player1
+
+        # 충돌 검사를 하는 그룹은 x축 인덱스(LaneGroup)를 씁니다.
+        self.obstacle_group = LaneGroup()
+        self.item_group = LaneGroup()
+        self.pit_group = LaneGroup()
+        self.platform_group = LaneGroup()
+        self.speed_line_group = pygame.sprite.Group()
+        self.collectible_group = LaneGroup()
+        self.ground_group = LaneGroup()
+
+        self.camera_x = 0.0
+        self.prev_camera_x = 0.0
+        # 사라질 카메라 위치 순으로 정렬된 큐: (despawn_x, 순번, 스프라이트)
+        self.despawn_queue = []
+        self.spawn_serial = 0
+
+        self.tick = 0   # 진행한 틱 수 (시뮬레이션 시계)
+        self.now = 0.0
+        self.start_time = 0
+        self.elapsed_seconds = 0
+        self.score = 0
+        self.final_grade = ""
+        self.outcome = None
+        self.events = []
+        self.profiler = None  # FrameProfiler를 넣으면 step() 안의 스폰/이동/충돌 시간을 나눠 잽니다.
+
+
+        self.ground_end_x = 0
+        self.spawn(self.ground_group, Platform.pool.acquire('ground', SCREEN_WIDTH * 2, x_pos=0, y_pos=GROUND_Y))
+
+    def spawn(self, group, sprite):
+        """스프라이트를 그룹에 넣고, 화면 왼쪽으로 벗어날 카메라 위치를 큐에 등록합니다."""
+        group.add(sprite)
+        despawn_x = getattr(sprite, "despawn_x", None)
+        if despawn_x is None:
+            despawn_x = sprite.rect.right - getattr(sprite, "despawn_margin", 0)
+        # 풀에서 재사용된 스프라이트가 예전 큐 항목 때문에 지워지지 않도록 번호로 구분합니다.
+        self.spawn_serial += 1
+        sprite.spawn_id = self.spawn_serial
+        heapq.heappush(self.despawn_queue, (despawn_x, self.spawn_serial, sprite))
+        if group is self.ground_group:
+            self.ground_end_x = max(self.ground_end_x, sprite.rect.right)
+        return sprite
+
+    def cull(self):
+        """카메라 뒤로 지나간 스프라이트를 제거합니다. (정렬된 큐의 앞만 확인)"""
+        queue = self.despawn_queue
+        while queue and queue[0][0] < self.camera_x:
+            _, spawn_id, sprite = heapq.heappop(queue)
+            if sprite.spawn_id == spawn_id:
+                sprite.kill()
+
+    def clear_entities(self):
+        """바닥을 제외한 장애물/아이템/이펙트를 모두 지웁니다."""
+        self.obstacle_group.empty()
+        self.item_group.empty()
+        self.pit_group.empty()
+        self.platform_group.empty()
+        self.speed_line_group.empty()
+        self.collectible_group.empty()
+
+    def dispose(self):
+        """월드를 버리기 전에 모든 스프라이트를 풀에 돌려줍니다."""
+        self.clear_entities()
+        self.ground_group.empty()
+        self.despawn_queue = []
+
+    def start_relay(self):
+        """2번 주자로 이어달리기를 시작합니다."""
+        self.current_player = self.player2
+        screen_x = self.player1.rect.x - self.camera_x - 150
+        self.current_player.revive(screen_x, self.camera_x)
+        self.clear_entities()
+        self.outcome = None
+
+    def step(self, frame=NO_INPUT):
+        """시뮬레이션을 한 틱(SIM_STEP_MS) 진행합니다."""
+        self.events = []
+        if self.outcome is not None:
+            return
+        self.tick += 1
+        self.now = self.tick * SIM_STEP_MS
+        now = self.now
+        self.prev_camera_x = self.camera_x
+        self.player1.remember_position()
+        self.player2.remember_position()
+        profiler = self.profiler
+
+        if not self.player1.is_dead:
+            self.current_player = self.player1
+        else:
+            self.current_player = self.player2
+        player = self.current_player
+
+        # 1. 입력 처리
+        if frame.jump:
+            player.jump()
+            self.events.append("jump")
+        if frame.skill:
+            player.activate_skill(now)
+
+        # 2. 속도 계산
+        elapsed_time = now - self.start_time
+        self.elapsed_seconds = int(elapsed_time // 1000)
+        time_boost = SPEED_BOOST if self.elapsed_seconds > SPEED_BOOST_AFTER_SECONDS else 0
+        current_accelerated_speed = self.base_speed + time_boost
+        speed_multiplier = 1.0
+        if player.effect_active and player.current_effect_color == YELLOW:
+            speed_multiplier = 3.0
+        final_speed = current_accelerated_speed * speed_multiplier
+
+        if speed_multiplier > 1.0 or player.is_reviving:
+            if self.rng.randint(1, 4) == 1:
+                self.spawn(self.speed_line_group, SpeedLine.pool.acquire(self.camera_x, rng=self.rng))
+
+        # 3. 이동 (플레이어만 움직이고, 나머지는 카메라 이동으로 스크롤)
+        self.player1.update(self.pit_group, self.platform_group, final_speed, frame.slide, now, self.camera_x)
+        self.player2.update(self.pit_group, self.platform_group, final_speed, frame.slide, now, self.camera_x)
+        self.camera_x += final_speed
+        self.player1.follow_camera(self.camera_x)
+        self.player2.follow_camera(self.camera_x)
+        self.cull()
+        if profiler: profiler.mark("entities")
+
+        if self.ground_end_x - self.camera_x < SCREEN_WIDTH + 200:
+            new_plat_width = self.rng.randint(300, 550)
+            self.spawn(self.ground_group, Platform.pool.acquire('ground', new_plat_width, x_pos=self.ground_end_x))
+
+        # 4. 챕터 클리어
+        if self.elapsed_seconds > CHAPTER_DURATION_SECONDS:
+            if self.chapter == 3 and player is self.player1:
+                self.final_grade = "A+"
+                self.outcome = "game_clear"
+            else:
+                self.final_grade = "A"
+                self.outcome = "chapter_clear" if self.chapter < 3 else "game_clear"
+            return
+
+        # 5. 코스 스폰 (다음 기록 시각이 되었을 때만 꺼냄)
+        while now >= self.next_spawn_time:
+            self.spawn_from_course(self.course_index)
+            self.course_index += 1
+            self.next_spawn_time = self.course.times[self.course_index] \
+                if self.course_index < len(self.course) else float("inf")
+        if profiler: profiler.mark("spawn")
+
+        # 6. 충돌
+        # 젤리 충돌 (버그 수정됨)
+        for item in self.collectible_group.query(player.rect):
+            item.kill()
+            self.start_time -= 1000
+            self.events.append("coin")
+
+        for item in self.item_group.query(player.rect):
+            item.kill()
+            player.activate_item_effect(item.item_type, now)
+
+        if (player.is_dead or
+                (not player.effect_active and self.obstacle_group.query(player.rect))) \
+                and not player.is_reviving:
+            self.final_grade = self.grade_for_death()
+            player.is_dead = True
+            self.outcome = "relay" if player is self.player1 else "game_over"
+        if profiler: profiler.mark("collisions")
+
+    def group_counts(self):
+        """그룹별 살아 있는 스프라이트 수 (성능 오버레이/기록용)"""
+        return {
+            "obstacle": len(self.obstacle_group),
+            "platform": len(self.platform_group),
+            "ground": len(self.ground_group),
+            "pit": len(self.pit_group),
+            "item": len(self.item_group),
+            "collectible": len(self.collectible_group),
+            "speed_line": len(self.speed_line_group),
+        }
+
+    def render_camera(self, alpha):
+        """직전 틱과 현재 틱 사이(alpha: 0.0~1.0)의 카메라 위치. 그리기에만 씁니다."""
+        return self.prev_camera_x + (self.camera_x - self.prev_camera_x) * alpha
+
+    def spawn_x(self):
+        """화면 오른쪽 끝의 월드 x 좌표 (새 스프라이트가 나타나는 위치)"""
+        return int(self.camera_x) + SCREEN_WIDTH
+
+    def spawn_from_course(self, index):
+        """
+        코스의 index번째 기록을 화면 오른쪽 끝(에서 x 오프셋만큼)에 만듭니다.
+        장애물/구멍에는 course_index를 남겨, 부딪혔을 때 어느 기록(패턴)이었는지 알 수 있게 합니다.
+        """
+        course = self.course
+        kind = course.kinds[index]
+        variant = course.variants[index]
+        y = course.ys[index]
+        x = self.spawn_x() + course.offsets[index]
+        if kind == SPAWN_OBSTACLE:
+            obstacle = Obstacle.pool.acquire(OBSTACLE_TYPES[variant], chapter=self.chapter, x_pos=x,
+                                             y_pos=GROUND_Y if y < 0 else y, rng=self.rng)
+            obstacle.course_index = index
+            self.spawn(self.obstacle_group, obstacle)
+        elif kind == SPAWN_PIT:
+            # 대시 등으로 발판이 예상보다 오래 남아 있으면 구멍은 건너뜁니다.
+            if not self.platform_group:
+                pit = Pit.pool.acquire(x_pos=x, width=course.widths[index])
+                pit.course_index = index
+                self.spawn(self.pit_group, pit)
+        elif kind == SPAWN_PLATFORM:
+            self.spawn(self.platform_group,
+                       Platform.pool.acquire(PLATFORM_TYPES[variant], course.widths[index], x_pos=x, y_pos=y))
+        elif kind == SPAWN_ITEM:
+            new_item = Item.pool.acquire(ITEM_TYPES[variant], x_pos=x, rng=self.rng)
+            blocked = any(group.query(new_item.rect)
+                          for group in (self.obstacle_group, self.platform_group, self.ground_group))
+            if not blocked:
+                self.spawn(self.item_group, new_item)
+            else:
+                new_item.release()
+        elif kind == SPAWN_COLLECTIBLE:
+            self.spawn(self.collectible_group, Collectible.pool.acquire('grade_point', x_pos=x, y_pos=y))
+
+    def grade_for_death(self):
+        if self.chapter == 1:
+            return "F"
+        elif self.chapter == 2:
+            return "D" if self.elapsed_seconds < 30 else "C"
+        return "B" if self.elapsed_seconds < 30 else "A (Fail)"
+
+
+def draw_scrolling(surface, group, camera_x, rects=None):
+    """월드 좌표 스프라이트 그룹을 카메라 오프셋을 적용해 그립니다. rects를 주면 그린 영역을 덧붙입니다."""
+    cam = int(camera_x)
+    drawn = surface.blits([(sprite.image, (sprite.rect.x - cam, sprite.rect.y)) for sprite in group], rects is not None)
+    if rects is not None:
+        rects.extend(drawn)
+
+
+def draw_speed_lines(surface, group, camera_x, rects=None):
+    drawn = surface.blits([(line.image, (line.screen_x(camera_x), line.rect.y)) for line in group], rects is not None)
+    if rects is not None:
+        rects.extend(drawn)
+
+
+def world_checksum(world):
+    """리플레이가 똑같이 재현됐는지 비교하기 위한 월드 상태 요약값"""
+    p1, p2 = world.player1, world.player2
+    state = (f"{world.tick}|{world.score}|{world.camera_x:.3f}|{world.elapsed_seconds}|{world.outcome}|"
+             f"{tuple(p1.rect)}|{p1.vel_y}|{p1.is_dead}|{tuple(p2.rect)}|{p2.vel_y}|{p2.is_dead}")
+    return zlib.crc32(state.encode("utf-8"))
+
+
+# --- 12-1. 리플레이 (seed + 틱별 입력 기록) ---
+REPLAY_MAGIC = b"RPLY"
+REPLAY_VERSION = 3  # 2: 코스를 미리 만드는 방식으로 바뀜 (1과 같은 seed라도 다른 판), 3: 막히는 코스를 고침
+# magic, 버전, 챕터, 캐릭터 2명, seed, 마지막 상태 checksum, 틱 수
+REPLAY_HEADER = struct.Struct("<4sBB2sIII")
+REPLAY_DIR = os.path.join(BASE_DIR, "replays")
+
+# 틱마다 1바이트: 비트 0 = UP(점프), 1 = DOWN(슬라이드), 2 = SPACE(스킬), 3 = P(이 틱 직전에 일시정지)
+INPUT_JUMP = 1
+INPUT_SLIDE = 2
+INPUT_SKILL = 4
+INPUT_PAUSE = 8
+REPLAY_FRAMES = [InputFrame(jump=bool(bits & INPUT_JUMP), slide=bool(bits & INPUT_SLIDE),
+                            skill=bool(bits & INPUT_SKILL))
+                 for bits in range(8)]
+
+
+class Replay:
+    """
+    World 한 판의 seed와 틱별 입력입니다.
+    같은 seed로 World를 만들고 기록된 입력을 틱마다 넣으면 처음 판과 똑같이 진행됩니다.
+    1번 주자가 죽은 뒤에도 입력이 남아 있으면 이어달리기를 한 것으로 봅니다.
+    """
+
+    def __init__(self, seed, chapter, roster, inputs=b"", checksum=0):
+        self.seed = seed
+        self.chapter = chapter
+        self.roster = tuple(roster)
+        self.inputs = bytearray(inputs)
+        self.checksum = checksum
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def record(self, frame, paused=False):
+        bits = (INPUT_JUMP if frame.jump else 0) | (INPUT_SLIDE if frame.slide else 0) \
+            | (INPUT_SKILL if frame.skill else 0) | (INPUT_PAUSE if paused else 0)
+        self.inputs.append(bits)
+
+    def frame(self, tick):
+        """tick번째(0부터) 틱의 입력과, 그 직전에 일시정지했는지를 돌려줍니다."""
+        bits = self.inputs[tick]
+        return REPLAY_FRAMES[bits & 7], bool(bits & INPUT_PAUSE)
+
+    def default_path(self):
+        return os.path.join(REPLAY_DIR, f"ch{self.chapter}-{''.join(self.roster)}-{self.seed}.replay")
+
+    def save(self, path=None):
+        path = path or self.default_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.chapter, "".join(self.roster).encode("ascii"),
+                                    self.seed, self.checksum, len(self.inputs))
+        with open(path, "wb") as f:
+            f.write(header)
+            f.write(self.inputs)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, chapter, roster, seed, checksum, count = REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"리플레이 파일 형식이 아닙니다: {path}")
+        inputs = data[REPLAY_HEADER.size:REPLAY_HEADER.size + count]
+        if len(inputs) != count:
+            raise ValueError(f"리플레이 파일이 잘렸습니다: {path}")
+        return cls(seed, chapter, roster.decode("ascii"), inputs, checksum)
+
+
+def run_replay(replay):
+    """리플레이를 창 없이 끝까지 돌리고 World를 돌려줍니다. (checksum 비교는 호출하는 쪽에서)"""
+    world = World(replay.roster, replay.chapter, seed=replay.seed)
+    for tick in range(len(replay)):
+        if world.outcome == "relay":
+            world.start_relay()
+        frame, _ = replay.frame(tick)
+        world.step(frame)
+    return world
+
+
+# --- 13. 버튼 정의 ---
+chapter_buttons = {
+    1: pygame.Rect(SCREEN_WIDTH // 4 - 100, SCREEN_HEIGHT // 2 - 75, 200, 150),
+    2: pygame.Rect(SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 - 75, 200, 150),
+    3: pygame.Rect(SCREEN_WIDTH * 3 // 4 - 100, SCREEN_HEIGHT // 2 - 75, 200, 150),
+}
+confirm_yes_button = pygame.Rect(SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2 + 50, 120, 50)
+confirm_no_button = pygame.Rect(SCREEN_WIDTH // 2 + 30, SCREEN_HEIGHT // 2 + 50, 120, 50)
+
+character_buttons = {}
+btn_width, btn_height = 100, 100
+btn_spacing = 40
+total_width = (btn_width * 6) + (btn_spacing * 5)
+start_x = (SCREEN_WIDTH - total_width) / 2
+for i, (char_id, char_color) in enumerate(CHARACTERS_COLOR.items()):
+    x = start_x + i * (btn_width + btn_spacing)
+    y = SCREEN_HEIGHT // 2 - 50
+    character_buttons[char_id] = pygame.Rect(x, y, btn_width, btn_height)
+
+restart_button_rect = pygame.Rect((SCREEN_WIDTH - 160) / 2, (SCREEN_HEIGHT // 2) + 80, 160, 60)
+relay_yes_button_rect = pygame.Rect((SCREEN_WIDTH // 2 - 150), (SCREEN_HEIGHT // 2 + 50), 120, 50)
+relay_no_button_rect = pygame.Rect((SCREEN_WIDTH // 2 + 30), (SCREEN_HEIGHT // 2 + 50), 120, 50)
+
+
+# --- 13-1. 성능 오버레이 / 프레임 기록 ---
+WORLD_GROUP_NAMES = ("obstacle", "platform", "ground", "pit", "item", "collectible", "speed_line")
+
+
+class PerfOverlay:
+    """
+    F3으로 켜는 성능 오버레이. 구간별 평균 시간, 그룹별 스프라이트 수, 최근 프레임 시간 그래프를 보여 줍니다.
+    글자 패널은 REFRESH_MS마다 한 번만 다시 만들고(값이 계속 바뀌므로 TEXT_CACHE는 쓰지 않음), 그래프만 매 프레임 그립니다.
+    """
+    GRAPH_FRAMES = 180
+    REFRESH_MS = 250
+    WIDTH = 260
+    GRAPH_HEIGHT = 60
+    BUDGET_MS = 1000 / FPS
+
+    def __init__(self):
+        self.visible = False
+        self.history = deque(maxlen=self.GRAPH_FRAMES)
+        self.sums = {}
+        self.count = 0
+        self.panel = None
+        self.last_refresh = -self.REFRESH_MS
+
+    def record(self, profiler):
+        self.history.append(profiler.total_ms())
+        if not self.visible:
+            return
+        for name, ms in profiler.phases.items():
+            self.sums[name] = self.sums.get(name, 0.0) + ms
+        self.count += 1
+
+    def rebuild_panel(self, counts):
+        average = sum(self.history) / max(len(self.history), 1)
+        lines = [f"frame {average:6.2f} ms  (max {max(self.history, default=0):.1f})"]
+        for name in PROFILE_PHASES:
+            if name in self.sums:
+                lines.append(f"{name:<11}{self.sums[name] / max(self.count, 1):6.2f} ms")
+        if counts:
+            lines.append("")
+            lines.extend(f"{name:<11}{counts.get(name, 0):4d}" for name in WORLD_GROUP_NAMES)
+        line_height = font_debug.get_linesize()
+        HITCH_MONITOR.note("surface", len(lines) + 1)
+        panel = pygame.Surface((self.WIDTH, line_height * len(lines) + 10 + self.GRAPH_HEIGHT), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        for i, line in enumerate(lines):
+            panel.blit(font_debug.render(line, True, WHITE), (8, 5 + i * line_height))
+        self.panel = panel
+        self.sums = {}
+        self.count = 0
+
+    def draw(self, surface, now, counts):
+        if self.panel is None or now - self.last_refresh >= self.REFRESH_MS:
+            self.last_refresh = now
+            self.rebuild_panel(counts)
+        x = SCREEN_WIDTH - self.WIDTH - 10
+        y = 170
+        surface.blit(self.panel, (x, y))
+
+        # 프레임 시간 그래프: 가운데 선이 한 프레임 예산(16.6 ms), 넘으면 빨간색
+        base_y = y + self.panel.get_height() - 5
+        scale = (self.GRAPH_HEIGHT - 10) / (self.BUDGET_MS * 2)
+        budget_y = base_y - self.BUDGET_MS * scale
+        pygame.draw.line(surface, YELLOW, (x + 5, budget_y), (x + self.WIDTH - 5, budget_y))
+        step = (self.WIDTH - 10) / self.GRAPH_FRAMES
+        for i, ms in enumerate(self.history):
+            bar_x = x + 5 + i * step
+            color = RED if ms > self.BUDGET_MS else GREEN
+            pygame.draw.line(surface, color, (bar_x, base_y), (bar_x, base_y - min(ms, self.BUDGET_MS * 2) * scale))
+
+
+class FrameTrace:
+    """프레임마다 상태, 구간별 시간(ms), 그룹별 스프라이트 수를 CSV 또는 JSONL로 남깁니다."""
+
+    def __init__(self, path):
+        self.path = path
+        self.is_csv = path.lower().endswith(".csv")
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.frames = 0
+        if self.is_csv:
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(["frame", "state", "total"] + list(PROFILE_PHASES) + list(WORLD_GROUP_NAMES))
+
+    def write(self, game_state, profiler, counts):
+        self.frames += 1
+        phases = profiler.phases
+        if self.is_csv:
+            self.writer.writerow([self.frames, game_state, f"{profiler.total_ms():.3f}"]
+                                 + [f"{phases.get(name, 0.0):.3f}" for name in PROFILE_PHASES]
+                                 + [counts.get(name, 0) for name in WORLD_GROUP_NAMES])
+        else:
+            record = {"frame": self.frames, "state": game_state, "total": round(profiler.total_ms(), 3),
+                      "phases": {name: round(ms, 3) for name, ms in phases.items()}, "counts": counts}
+            self.file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+# --- 13-2. 메뉴/모달 화면 (한 번 그려 두고 바뀐 곳만 갱신) ---
+# 이 상태들은 화면이 거의 멈춰 있으므로, 바탕을 한 번 그려 캐시해 두고 hover/깜빡임/카운트다운만 다시 그립니다.
+RETAINED_STATES = ("TITLE_SCREEN", "CHAPTER_SELECT", "CHARACTER_SELECT", "CONFIRM_START",
+                   "PAUSED", "RELAY_PROMPT", "GAME_OVER", "GAME_CLEAR", "HIDDEN_CREDIT")
+
+modal_overlay_surface = None
+
+
+def modal_overlay():
+    """
+    모달 화면 뒤를 어둡게 덮는 반투명 Surface (처음 한 번만 만듦)
+    픽셀마다 같은 알파라서 per-pixel 알파 대신 화면 형식 + Surface 전체 알파로 만듭니다.
+    """
+    global modal_overlay_surface
+    if modal_overlay_surface is None:
+        HITCH_MONITOR.note("surface")
+        modal_overlay_surface = to_display_format(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)))
+        modal_overlay_surface.fill(BLACK)
+        modal_overlay_surface.set_alpha(180)
+    return modal_overlay_surface
+
+
+class RetainedScreen:
+    """
+    메뉴/모달 화면을 retained mode로 그립니다.
+    begin(key)가 True면(키가 바뀌었거나 None) 바탕을 통째로 다시 그리고 snapshot()으로 캐시합니다. 그 위의 작은 부분(위젯)은
+    widget(name, key, rect)가 True일 때만 캐시된 바탕으로 그 영역을 지운 뒤 다시 그립니다.
+    present()는 바탕을 새로 그린 프레임만 flip()하고, 나머지는 바뀐 영역만 display.update(rects)로 보냅니다.
+    아무것도 안 바뀐 프레임은 화면에 아무것도 보내지 않습니다.
+    """
+
+    def __init__(self):
+        self.frame = None
+        self.key = None
+        self.widgets = {}  # 이름 -> (키, 마지막으로 그린 영역)
+        self.dirty = []
+        self.full = False
+
+    def invalidate(self):
+        self.key = None
+
+    def begin(self, key):
+        self.dirty = []
+        self.full = key is None or key != self.key  # None: 매 프레임 전부 그리는 화면
+        if self.full:
+            self.key = key
+            self.widgets.clear()
+        return self.full
+
+    def snapshot(self, surface):
+        if self.frame is None:
+            self.frame = surface.copy()
+        else:
+            self.frame.blit(surface, (0, 0))
+
+    def widget(self, surface, name, key, rect):
+        last = self.widgets.get(name)
+        if last is not None and last[0] == key:
+            return False
+        rect = pygame.Rect(rect)
+        area = rect if last is None else rect.union(last[1])
+        if not self.full:
+            surface.blit(self.frame, area, area)
+            self.dirty.append(area)
+        self.widgets[name] = (key, rect)
+        return True
+
+    def present(self):
+        if self.full:
+            pygame.display.flip()
+        elif self.dirty:
+            pygame.display.update(self.dirty)
+
+
+# --- 13-3. 게임 화면 렌더러 (전체 flip / 바뀐 영역만 갱신) ---
+DIRTY_FULL_RATIO = 0.6     # 바뀐 면적이 화면의 이 비율을 넘으면 영역별 갱신 대신 flip()
+DIRTY_PARALLAX_STEP = 4    # dirty 렌더러는 배경 레이어를 이 px 단위로 끊어서 움직여 전체 갱신 횟수를 줄입니다.
+
+
+def draw_hud(surface, world, rects=None):
+    elapsed_seconds = world.elapsed_seconds
+    progress_percent = (elapsed_seconds % 45) / 45.0
+    progress_rect_fg = pygame.Rect(0, 10, SCREEN_WIDTH * progress_percent, 20)
+    progress_rect_bg = pygame.Rect(0, 10, SCREEN_WIDTH, 20)
+    pygame.draw.rect(surface, GREEN, progress_rect_fg)
+    pygame.draw.rect(surface, WHITE, progress_rect_bg, 2)
+    score_text = render_text(font_small, f"점수: {world.score}", WHITE)
+    score_rect = score_text.get_rect(topright=(SCREEN_WIDTH - 20, 40))
+    drawn = [progress_rect_bg, surface.blit(score_text, score_rect)]
+    runner_text = render_text(font_small, f"주자: {1 if world.current_player is world.player1 else 2} / 2", WHITE)
+    drawn.append(surface.blit(runner_text, (20, 40)))
+    chapter_text = render_text(font_small, f"챕터: {world.chapter}", WHITE)
+    drawn.append(surface.blit(chapter_text, (20, 70)))
+    time_text = render_text(font_small, f"시간: {elapsed_seconds} 초", WHITE)
+    drawn.append(surface.blit(time_text, (20, 100)))
+    if not world.current_player.skill_used_this_chapter:
+        skill_text = render_text(font_small, "SKILL READY (SPACE)", GREEN)
+    else:
+        skill_text = render_text(font_small, "SKILL USED", RED)
+    drawn.append(surface.blit(skill_text, (20, 130)))
+    if rects is not None:
+        rects.extend(drawn)
+
+
+class GameplayRenderer:
+    """PLAYING 화면을 매 프레임 배경부터 통째로 그리고 flip()합니다. (기본)"""
+    name = "full"
+
+    def invalidate(self):
+        pass
+
+    def draw(self, surface, world, background, alpha, profiler):
+        # 물리 틱 사이에 그리는 프레임은 직전 틱과 현재 틱 사이를 보간합니다. (배경도 같은 카메라로)
+        camera_x = world.render_camera(alpha)
+        if background:
+            background.draw(surface, camera_x)
+        else:
+            surface.fill(BLACK)
+        profiler.mark("background")
+        self.draw_scene(surface, world, camera_x, alpha, profiler)
+
+    def draw_scene(self, surface, world, camera_x, alpha, profiler, rects=None):
+        """배경 위 레이어를 순서대로(땅/구멍/발판 -> 플레이어 -> 장애물/아이템/젤리/속도선 -> HUD) 그립니다."""
+        draw_scrolling(surface, world.ground_group, camera_x, rects)
+        draw_scrolling(surface, world.pit_group, camera_x, rects)
+        draw_scrolling(surface, world.platform_group, camera_x, rects)
+        for player in (world.player1, world.player2):
+            drawn = player.draw(surface, camera_x, alpha)
+            if rects is not None and drawn is not None:
+                rects.append(drawn)
+        draw_scrolling(surface, world.obstacle_group, camera_x, rects)
+        draw_scrolling(surface, world.item_group, camera_x, rects)
+        draw_scrolling(surface, world.collectible_group, camera_x, rects)
+        draw_speed_lines(surface, world.speed_line_group, camera_x, rects)
+        profiler.mark("sprites")
+        draw_hud(surface, world, rects)
+        profiler.mark("hud")
+
+    def present(self):
+        pygame.display.flip()
+
+
+class DirtyGameplayRenderer(GameplayRenderer):
+    """
+    PLAYING 화면에서 바뀐 영역만 display.update(rects)로 보냅니다. (LayeredDirty와 같은 방식)
+    배경은 clean 버퍼에 그려 두고, 매 프레임 지난 프레임에 그린 영역만 clean으로 지운 뒤 레이어를 다시 그립니다.
+    그래서 프레임 비용이 해상도가 아니라 화면에서 움직이는 것(스프라이트, 땅, HUD)의 면적을 따라갑니다.
+    배경이 움직이면 화면 전체가 바뀌므로, 배경 레이어는 DIRTY_PARALLAX_STEP px 단위로만 움직이고
+    그 오프셋이 바뀐 프레임만 화면 전체를 다시 그립니다.
+    """
+    name = "dirty"
+
+    def __init__(self):
+        self.clean = None
+        self.background_key = None
+        self.last_rects = []
+        self.dirty = []
+        self.full = True
+
+    def invalidate(self):
+        self.background_key = None
+
+    def draw(self, surface, world, background, alpha, profiler):
+        camera_x = world.render_camera(alpha)
+        key = (background, background.offsets(camera_x, DIRTY_PARALLAX_STEP) if background else ())
+        self.full = key != self.background_key
+        if self.full:
+            self.background_key = key
+            if self.clean is None:
+                self.clean = surface.copy()
+            if background:
+                background.draw(self.clean, camera_x, DIRTY_PARALLAX_STEP)
+            else:
+                self.clean.fill(BLACK)
+            surface.blit(self.clean, (0, 0))
+        else:
+            for rect in self.last_rects:
+                surface.blit(self.clean, rect, rect)
+        profiler.mark("background")
+        rects = []
+        self.draw_scene(surface, world, camera_x, alpha, profiler, rects)
+        # 지난 프레임과 같은 자리(땅, HUD 등)는 한 번만 보냅니다.
+        drawn = {tuple(rect) for rect in rects}
+        self.dirty = rects + [rect for rect in self.last_rects if tuple(rect) not in drawn]
+        self.last_rects = rects
+
+    def present(self):
+        if self.full or sum(r.w * r.h for r in self.dirty) > SCREEN_WIDTH * SCREEN_HEIGHT * DIRTY_FULL_RATIO:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.dirty)
+
+
+GAMEPLAY_RENDERERS = {"full": GameplayRenderer, "dirty": DirtyGameplayRenderer}
+
+
+# --- 14. 메인 게임 루프 ---
+def main_game(render_fps=RENDER_FPS, record=False, replay_path=None, driver=None, trace_path=None, renderer="full"):
+    """
+    메인 루프. 물리는 SIM_STEP_MS 고정 간격으로 돌고, 화면은 render_fps로 그립니다.
+    프레임마다 clock.tick()이 돌려준 시간을 누적해 그만큼 world.step()을 실행하고,
+    남은 시간(alpha)으로 직전 틱과 현재 틱 사이를 보간해 그립니다.
+
+    record=True이면 판마다 replays/ 폴더에 리플레이를 저장하고,
+    replay_path를 주면 그 판을 바로 불러와 기록된 입력으로 재생합니다. (재생이 끝나면 직접 조작)
+
+    driver는 벤치마크 같은 자동 실행용입니다. 매 프레임
+        frame_ms = driver.begin_frame(game_state, world, frame_ms, events)  # events에 입력을 덧붙일 수 있음
+        driver.end_frame(game_state, profiler)                             # False를 돌려주면 종료
+    순서로 불립니다. driver에 renderer 속성이 있으면 게임 화면을 그 렌더러로 그립니다.
+
+    renderer는 PLAYING 화면 그리기 방식입니다. "full"은 매 프레임 전체를 그려 flip()하고,
+    "dirty"는 바뀐 영역만 display.update(rects)로 보냅니다. (GAMEPLAY_RENDERERS)
+
+    F3은 성능 오버레이를 켜고 끕니다. trace_path를 주면 프레임마다 구간별 시간을
+    CSV(.csv) 또는 JSONL(그 외) 파일로 남깁니다.
+    """
+    global max_unlocked_chapter, character_roster
+
+    STARTUP_TIMINGS["import"] = (time.perf_counter() - PROCESS_START_TIME) * 1000
+    init_display()
+    init_fonts()
+
+    # PLAYING 로직은 World가 담당하고, 이 루프는 입력 수집과 화면 그리기만 합니다.
+    world = None
+
+    game_state = "TITLE_SCREEN"
+
+    try:
+        music_path = find_asset_path("open.wav")
+        if os.path.exists(music_path):
+            HITCH_MONITOR.note("sound")
+            pygame.mixer.music.load(music_path)
+            pygame.mixer.music.play(-1)
+    except:
+        pass
+
+    score = 0
+    relay_prompt_start_time = 0
+    selected_chapter = 0
+    current_chapter = 1
+    final_grade = ""
+    selected_char_index = 0
+    selected_button_index = 0
+    transition_start_time = 0
+
+    current_background = None
+
+    # 에셋은 백그라운드에서 불러옵니다. 타이틀을 먼저, 공용 에셋은 그다음, 챕터 에셋은 챕터 시작 직전에.
+    asset_loader = init_assets()
+    first_frame_shown = False
+    startup_logged = False
+
+    # 고정 간격 물리용 누적 시간. 점프/스킬은 다음 틱에 한 번만 반영되도록 따로 쌓아 둡니다.
+    sim_accumulator = 0.0
+    render_alpha = 1.0
+    jump_pressed = False
+    skill_pressed = False
+    pause_pressed = False
+    profiler = FrameProfiler()
+    perf_overlay = PerfOverlay()
+    menu_screen = RetainedScreen()
+    gameplay_renderer = GAMEPLAY_RENDERERS[renderer]()
+    last_game_state = game_state
+    apply_gameplay_gc_policy()
+    HITCH_MONITOR.budget_ms = 1000 / (render_fps or FPS)
+    HITCH_MONITOR.install()
+    frame_trace = FrameTrace(trace_path) if trace_path else None
+
+    # 다음 챕터 코스 (LOADING_TRANSITION 동안 로딩 스레드에서 만듦)
+    pending_course = None
+    pending_seed = None
+
+    # 리플레이 기록/재생
+    recording = None
+    playback = None
+    replay_pause_tick = -1
+    if replay_path:
+        playback = Replay.load(replay_path)
+        asset_loader.wait("common")
+        character_roster = list(playback.roster)
+        selected_chapter = playback.chapter
+        game_state = "LOADING_TRANSITION"
+        transition_start_time = pygame.time.get_ticks()
+        print(f"[리플레이] 재생: {replay_path} (챕터 {playback.chapter}, seed {playback.seed}, {len(playback)} 틱)")
+
+    running = True
+    while running:
+        frame_ms = min(clock.tick(render_fps), MAX_FRAME_MS)
+        profiler.begin()
+        current_time_ticks = pygame.time.get_ticks()
+        mouse_pos = pygame.mouse.get_pos()
+
+        asset_loader.pump()
+        if not startup_logged and asset_loader.is_ready("common"):
+            startup_logged = True
+            print(f"[시작] 공용 에셋 준비까지 {(time.perf_counter() - PROCESS_START_TIME) * 1000:.0f} ms")
+            freeze_loaded_assets()
+
+        events = pygame.event.get()
+        if driver is not None:
+            frame_ms = driver.begin_frame(game_state, world, frame_ms, events)
+            if getattr(driver, "renderer", gameplay_renderer.name) != gameplay_renderer.name:
+                gameplay_renderer = GAMEPLAY_RENDERERS[driver.renderer]()  # 벤치마크가 렌더러를 바꿔 가며 잼
+
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                perf_overlay.visible = not perf_overlay.visible
+            if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                menu_screen.invalidate()  # 창이 가려졌다 다시 보이면 캐시된 화면을 통째로 다시 보냄
+
+            if game_state == "TITLE_SCREEN":
+                # 공용 에셋(캐릭터 등)이 준비되기 전에는 넘어가지 않습니다.
+                if (event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN) \
+                        and asset_loader.is_ready("common"):
+                    if not character_roster:
+                        game_state = "CHARACTER_SELECT"
+                    else:
+                        game_state = "CHAPTER_SELECT"
+
+            elif game_state == "CHAPTER_SELECT":
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    for chapter, rect in chapter_buttons.items():
+                        if chapter == 2 and max_unlocked_chapter < 2: continue
+                        if rect.collidepoint(event.pos):
+                            if chapter <= max_unlocked_chapter:
+                                selected_chapter = chapter
+                                selected_button_index = 0
+                                game_state = "CONFIRM_START"
+
+            elif game_state == "CONFIRM_START":
+                if event.type == pygame.KEYDOWN:
+                    if event.key in (pygame.K_LEFT, pygame.K_UP):
+                        selected_button_index = 0
+                    elif event.key in (pygame.K_RIGHT, pygame.K_DOWN):
+                        selected_button_index = 1
+                    elif event.key in (pygame.K_SPACE, pygame.K_RETURN):
+                        if selected_button_index == 0:
+                            game_state = "LOADING_TRANSITION"
+                            transition_start_time = current_time_ticks
+                        else:
+                            game_state = "CHAPTER_SELECT"
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    if confirm_yes_button.collidepoint(event.pos):
+                        game_state = "LOADING_TRANSITION"
+                        transition_start_time = current_time_ticks
+                    elif confirm_no_button.collidepoint(event.pos):
+                        game_state = "CHAPTER_SELECT"
+
+            elif game_state == "CHARACTER_SELECT":
+                if event.type == pygame.KEYDOWN:
+                    if event.key in (pygame.K_LEFT, pygame.K_UP):
+                        selected_char_index = (selected_char_index - 1) % 6
+                    elif event.key in (pygame.K_RIGHT, pygame.K_DOWN):
+                        selected_char_index = (selected_char_index + 1) % 6
+                    elif event.key in (pygame.K_SPACE, pygame.K_RETURN):
+                        char_id = CHARACTER_IDS[selected_char_index]
+                        if len(character_roster) < 2 and char_id not in character_roster:
+                            character_roster.append(char_id)
+                            if len(character_roster) == 2:
+                                game_state = "CHAPTER_SELECT"
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    for i, rect in enumerate(character_buttons.values()):
+                        if rect.collidepoint(event.pos):
+                            char_id = CHARACTER_IDS[i]
+                            if len(character_roster) < 2 and char_id not in character_roster:
+                                character_roster.append(char_id)
+                                if len(character_roster) == 2:
+                                    game_state = "CHAPTER_SELECT"
+
+            elif game_state == "PLAYING":
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_UP: jump_pressed = True
+                    if event.key == pygame.K_SPACE: skill_pressed = True
+                    if event.key == pygame.K_p:
+                        game_state = "PAUSED"
+                        pause_pressed = True
+                    if event.key == pygame.K_ESCAPE: running = False
+
+            elif game_state == "PAUSED":
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_p: game_state = "PLAYING"
+                    if event.key == pygame.K_ESCAPE: running = False
+
+            elif game_state == "RELAY_PROMPT":
+                if event.type == pygame.KEYDOWN:
+                    if event.key in (pygame.K_LEFT, pygame.K_UP):
+                        selected_button_index = 0
+                    elif event.key in (pygame.K_RIGHT, pygame.K_DOWN):
+                        selected_button_index = 1
+                    elif event.key in (pygame.K_SPACE, pygame.K_RETURN):
+                        if selected_button_index == 0:
+                            world.start_relay()
+                            game_state = "PLAYING"
+                        else:
+                            game_state = "GAME_OVER"
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    if relay_yes_button_rect.collidepoint(event.pos):
+                        world.start_relay()
+                        game_state = "PLAYING"
+                    elif relay_no_button_rect.collidepoint(event.pos):
+                        game_state = "GAME_OVER"
+
+            elif game_state == "GAME_OVER":
+                if (event.type == pygame.KEYDOWN and event.key in (pygame.K_SPACE, pygame.K_RETURN)) or \
+                        (event.type == pygame.MOUSEBUTTONDOWN and restart_button_rect.collidepoint(event.pos)):
+                    game_state = "TITLE_SCREEN"
+                    max_unlocked_chapter = 1
+                    character_roster = []
+                    world.dispose()
+                    world = None
+
+            elif game_state == "GAME_CLEAR":
+                if final_grade != "A+":
+                    if (event.type == pygame.KEYDOWN and event.key in (pygame.K_SPACE, pygame.K_RETURN)) or \
+                            (event.type == pygame.MOUSEBUTTONDOWN and restart_button_rect.collidepoint(event.pos)):
+                        game_state = "CHAPTER_SELECT"
+                        world.dispose()
+                        world = None
+                else:
+                    if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
+                        game_state = "HIDDEN_CREDIT"
+
+            elif game_state == "HIDDEN_CREDIT":
+                if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
+                    game_state = "TITLE_SCREEN"
+                    character_roster = []
+
+        profiler.mark("events")
+
+        if game_state != "PLAYING":
+            # 일시정지/메뉴에서 보낸 시간은 물리에 쌓지 않습니다.
+            sim_accumulator = 0.0
+            jump_pressed = skill_pressed = False
+
+        if game_state == "PLAYING":
+            keys = pygame.key.get_pressed()
+            sim_accumulator += frame_ms
+            spawn_serial = world.spawn_serial
+            profiler.mark("update")
+            while sim_accumulator >= SIM_STEP_MS and world.outcome is None:
+                if playback is not None:
+                    frame, paused = playback.frame(world.tick)
+                    if paused and replay_pause_tick != world.tick:
+                        # 기록할 때 여기서 일시정지했습니다. P를 누르면 이어서 재생합니다.
+                        replay_pause_tick = world.tick
+                        game_state = "PAUSED"
+                        break
+                else:
+                    frame = InputFrame(jump=jump_pressed, slide=keys[pygame.K_DOWN], skill=skill_pressed)
+                    if recording is not None:
+                        recording.record(frame, paused=pause_pressed)
+                jump_pressed = skill_pressed = pause_pressed = False
+                world.step(frame)
+                sim_accumulator -= SIM_STEP_MS
+                if playback is not None and world.tick >= len(playback):
+                    match = "일치" if world_checksum(world) == playback.checksum else "불일치"
+                    print(f"[리플레이] 재생 끝 ({world.tick} 틱, 상태 {match}) - 이제 직접 조작합니다.")
+                    playback = None
+                for sound_event in world.events:
+                    GAME_SOUNDS.play(sound_event)
+            render_alpha = sim_accumulator / SIM_STEP_MS
+            if world.spawn_serial != spawn_serial:
+                HITCH_MONITOR.note("spawn", world.spawn_serial - spawn_serial)
+
+            if world.outcome is not None:
+                final_grade = world.final_grade
+                score = world.score
+            if world.outcome == "relay" and playback is not None:
+                # 기록에 입력이 더 남아 있으면 이어달리기를 한 판입니다.
+                world.start_relay()
+            elif world.outcome == "relay":
+                game_state = "RELAY_PROMPT"
+                relay_prompt_start_time = current_time_ticks
+                selected_button_index = 0
+            elif world.outcome == "game_over":
+                game_state = "GAME_OVER"
+            elif world.outcome == "chapter_clear":
+                if world.chapter == max_unlocked_chapter:
+                    max_unlocked_chapter = min(max_unlocked_chapter + 1, 3)
+                game_state = "CHAPTER_SELECT"
+            elif world.outcome == "game_clear":
+                game_state = "GAME_CLEAR"
+
+        elif game_state == "RELAY_PROMPT":
+            if current_time_ticks - relay_prompt_start_time > 10000:
+                game_state = "GAME_OVER"
+
+        elif game_state == "LOADING_TRANSITION":
+            # 챕터 에셋은 전환 애니메이션이 도는 동안 불러옵니다. (이미 불러온 챕터는 바로 준비됨)
+            chapter_group = f"chapter{selected_chapter}"
+            background_group = f"background{selected_chapter}"
+            asset_loader.request(chapter_group)
+            asset_loader.request(background_group)
+            if pending_course is None:
+                # 전환 애니메이션이 도는 동안 챕터 코스를 통째로 만들고 검사해 둡니다. (검사가 수백 ms 걸려 스레드에서)
+                pending_seed = playback.seed if playback else random.randrange(2 ** 32)
+                pending_course = asset_loader.executor.submit(timed_generate_course, selected_chapter, pending_seed)
+            elapsed = current_time_ticks - transition_start_time
+            radius = int((elapsed / 1500) * SCREEN_WIDTH * 0.7)
+            if radius > SCREEN_WIDTH * 0.7 and asset_loader.is_ready(chapter_group) \
+                    and asset_loader.is_ready(background_group) and pending_course.done():
+                course, course_ms = pending_course.result()
+                print(f"[로딩] 챕터 {selected_chapter} 전환: {elapsed} ms "
+                      f"(애니메이션 1500 ms, 에셋 {asset_loader.timings[chapter_group] * 1000:.0f} ms, "
+                      f"배경 {asset_loader.timings[background_group] * 1000:.0f} ms, "
+                      f"코스 {len(course)}개 {course_ms:.1f} ms)")
+                game_state = "PLAYING"
+                if world:
+                    world.dispose()
+                world = World(character_roster, selected_chapter, seed=pending_seed, course=course)
+                pending_course = None
+                replay_pause_tick = -1
+                world.profiler = profiler
+                if record:
+                    recording = Replay(world.seed, world.chapter, world.roster)
+                current_chapter = selected_chapter
+                score = 0
+                final_grade = ""
+
+                # 배경은 지금 챕터 것만 메모리에 둡니다.
+                current_background = GAME_ASSETS["backgrounds"].get(current_chapter)
+                for chapter in CHAPTER_SPEEDS:
+                    if chapter != current_chapter:
+                        asset_loader.release(f"background{chapter}")
+
+        profiler.mark("update")
+        if game_state != last_game_state:
+            # 게임 중에 미뤄 둔 2세대 GC를 화면 전환 순간에 몰아서 돌립니다.
+            if game_state in GC_COLLECT_STATES:
+                gc.collect()
+                profiler.mark("gc")
+            last_game_state = game_state
+
+        # 판이 끝나 결과/메뉴 화면으로 넘어가면 리플레이를 저장합니다.
+        if recording is not None and game_state not in ("PLAYING", "PAUSED", "RELAY_PROMPT"):
+            recording.checksum = world_checksum(world)
+            print(f"[리플레이] 저장: {recording.save()}")
+            recording = None
+
+        # --- 화면 그리기 ---
+        # 메뉴/모달 화면은 바탕을 한 번 그려 두고, 바탕에 영향을 주는 값이 바뀔 때만 다시 그립니다.
+        # (게임 중, 로딩 전환, F3 오버레이가 켜져 있을 때는 매 프레임 전부 그림)
+        if game_state in RETAINED_STATES and not perf_overlay.visible:
+            redraw = menu_screen.begin((game_state, max_unlocked_chapter, selected_chapter, final_grade, score,
+                                        GAME_ASSETS["title_screen"] is not None))
+        else:
+            redraw = menu_screen.begin(None)
+
+        if game_state == "PLAYING":
+            gameplay_renderer.draw(screen, world, current_background, render_alpha, profiler)
+        elif redraw:
+            screen.fill(BLACK)
+            profiler.mark("background")
+
+            # 물리 틱 사이에 그리는 프레임은 직전 틱과 현재 틱 사이를 보간합니다.
+            camera_x = world.render_camera(render_alpha) if world else 0.0
+            if world and game_state in ["RELAY_PROMPT", "PAUSED", "HIDDEN_CREDIT"]:
+                draw_scrolling(screen, world.ground_group, camera_x)
+            if world and game_state in ["RELAY_PROMPT", "PAUSED"]:
+                draw_scrolling(screen, world.pit_group, camera_x)
+                draw_scrolling(screen, world.platform_group, camera_x)
+
+            if game_state == "TITLE_SCREEN":
+                if GAME_ASSETS["title_screen"]:
+                    screen.blit(GAME_ASSETS["title_screen"], (0, 0))
+                else:
+                    screen.fill(BLUE)
+
+            elif game_state == "CHAPTER_SELECT":
+                title_text = render_text(font_large, "챕터를 선택하세요", WHITE)
+                title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 100))
+                screen.blit(title_text, title_rect)
+                for chapter, rect in chapter_buttons.items():
+                    if chapter == 3 and max_unlocked_chapter < 3: continue
+                    if chapter > max_unlocked_chapter:
+                        chapter_num_text = render_text(font_xl, str(chapter), WHITE)
+                        chapter_num_rect = chapter_num_text.get_rect(center=rect.center)
+                        pygame.draw.rect(screen, GREY, rect, border_radius=15)
+                        pygame.draw.rect(screen, BLACK, rect, 4, border_radius=15)
+                        screen.blit(chapter_num_text, chapter_num_rect)
+                        locked_text = render_text(font_large, "LOCKED", RED)
+                        locked_rect = locked_text.get_rect(center=rect.center)
+                        screen.blit(locked_text, locked_rect)
+
+            elif game_state == "CONFIRM_START":
+                screen.blit(modal_overlay(), (0, 0))
+                confirm_text = render_text(font_large, f"Chapter {selected_chapter}을(를) 시작하시겠습니까?", WHITE)
+                confirm_rect = confirm_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
+                screen.blit(confirm_text, confirm_rect)
+
+            elif game_state == "CHARACTER_SELECT":
+                title_text = render_text(font_large, "이어달리기 2명 선택", WHITE)
+                title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 150))
+                screen.blit(title_text, title_rect)
+
+            elif game_state == "PAUSED":
+                world.player1.draw(screen, camera_x, render_alpha)
+                world.player2.draw(screen, camera_x, render_alpha)
+                draw_scrolling(screen, world.obstacle_group, camera_x)
+                draw_scrolling(screen, world.item_group, camera_x)
+                draw_scrolling(screen, world.collectible_group, camera_x)
+                draw_speed_lines(screen, world.speed_line_group, camera_x)
+                screen.blit(modal_overlay(), (0, 0))
+                pause_text = render_text(font_large, "일시 정지", WHITE)
+                pause_rect = pause_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
+                screen.blit(pause_text, pause_rect)
+                resume_text = render_text(font_small, "계속하려면 P를 누르세요", WHITE)
+                resume_rect = resume_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20))
+                screen.blit(resume_text, resume_rect)
+
+            elif game_state == "RELAY_PROMPT":
+                world.player1.draw(screen, camera_x, render_alpha)
+                draw_scrolling(screen, world.obstacle_group, camera_x)
+                draw_scrolling(screen, world.item_group, camera_x)
+                draw_scrolling(screen, world.collectible_group, camera_x)
+                draw_speed_lines(screen, world.speed_line_group, camera_x)
+                screen.blit(modal_overlay(), (0, 0))
+
+            elif game_state == "GAME_OVER":
+                if world:
+                    world.player1.draw(screen, camera_x, render_alpha)
+                    world.player2.draw(screen, camera_x, render_alpha)
+                if final_grade == "F":
+                    grade_message = "학점: F. 다음 학기에 뵙겠습니다."
+                elif final_grade == "D":
+                    grade_message = "학점: D. 재수강 위기입니다."
+                elif final_grade == "C":
+                    grade_message = "학점: C. 분발하세요."
+                elif final_grade == "B":
+                    grade_message = "학점: B. 를 놓쳤습니다!"
+                elif final_grade == "A (Fail)":
+                    grade_message = "학점: A (Fail). 아깝게 클리어 실패!"
+                text = render_text(font_large, "GAME OVER", WHITE)
+                text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 80))
+                screen.blit(text, text_rect)
+                grade_text = render_text(font_medium, grade_message, RED)
+                grade_rect = grade_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 20))
+                screen.blit(grade_text, grade_rect)
+                score_text = render_text(font_small, f"최종 점수: {score}", WHITE)
+                score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30))
+                screen.blit(score_text, score_rect)
+
+            elif game_state == "GAME_CLEAR":
+                if final_grade == "A+":
+                    text = render_text(font_large, "!! CHAPTER 3 CLEAR !!", YELLOW)
+                    text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 80))
+                    screen.blit(text, text_rect)
+                    grade_text = render_text(font_xl, "A+학점 달성!", GREEN)
+                    grade_rect = grade_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+                    screen.blit(grade_text, grade_rect)
+                    score_text = render_text(font_small, f"최종 점수: {score}", WHITE)
+                    score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 60))
+                    screen.blit(score_text, score_rect)
+                    credit_hint_text = render_text(font_medium, "아무 키나 눌러 히든 크레딧 보기", WHITE)
+                    credit_hint_rect = credit_hint_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 120))
+                    screen.blit(credit_hint_text, credit_hint_rect)
+                else:
+                    text = render_text(font_large, f"!! CHAPTER {current_chapter} CLEAR !!", YELLOW)
+                    text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 80))
+                    screen.blit(text, text_rect)
+                    grade_text = render_text(font_large, f"축하합니다! {final_grade}학점으로 클리어!", GREEN)
+                    grade_rect = grade_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+                    screen.blit(grade_text, grade_rect)
+                    score_text = render_text(font_small, f"최종 점수: {score}", WHITE)
+                    score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 60))
+                    screen.blit(score_text, score_rect)
+
+            elif game_state == "HIDDEN_CREDIT":
+                credit_text = render_text(font_large, "대학원 입학을 축하합니다!", WHITE)
+                credit_rect = credit_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 200))
+                screen.blit(credit_text, credit_rect)
+                press_key_text = render_text(font_small, "아무 키나 눌러 시작 화면으로", WHITE)
+                press_key_rect = press_key_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50))
+                screen.blit(press_key_text, press_key_rect)
+
+            elif game_state == "LOADING_TRANSITION":
+                elapsed = current_time_ticks - transition_start_time
+                radius = int((elapsed / 1500) * SCREEN_WIDTH * 0.7)
+                if radius < SCREEN_WIDTH * 0.7:
+                    pygame.draw.circle(screen, BLACK, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2), radius)
+                else:
+                    progress = asset_loader.progress(f"chapter{selected_chapter}", f"background{selected_chapter}")
+                    loading_text = render_text(font_small, f"로딩 중... {int(progress * 100)}%", WHITE)
+                    screen.blit(loading_text, loading_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)))
+
+            if game_state in RETAINED_STATES:
+                menu_screen.snapshot(screen)
+
+        # --- 바탕 위에서 바뀌는 부분 (바뀐 프레임에만 그 영역을 지우고 다시 그림) ---
+        if game_state == "TITLE_SCREEN":
+            if not GAME_ASSETS["title_screen"]:
+                # --- [추가] 번쩍이는 효과 구현 ---
+
+                # 현재 시간을 기준으로 깜빡임 주기 설정 (1000ms = 1초)
+                # 500ms 동안 켜지고, 500ms 동안 꺼짐
+                flash_on = (current_time_ticks % 1000) < 500
+
+                # [효과 1] 눈 번쩍임 (빨간색 원 그리기)
+                # ★중요★: 아래 좌표(X, Y)와 반지름 숫자들을 실행해보면서 눈 위치에 맞게 조절해야 합니다.
+                eye_center_x = 625  # 눈의 중심 X 좌표 (추정치)
+                eye_center_y = 265  # 눈의 중심 Y 좌표 (추정치)
+                eye_radius = 18  # 빨간 눈의 크기
+                eye_rect = pygame.Rect(0, 0, eye_radius * 2, eye_radius * 2)
+                eye_rect.center = (eye_center_x, eye_center_y)
+                if menu_screen.widget(screen, "eye", flash_on, eye_rect) and flash_on:
+                    # 바깥쪽 진한 빨강
+                    pygame.draw.circle(screen, (200, 0, 0), (eye_center_x, eye_center_y), eye_radius)
+                    # 안쪽 밝은 빨강 (더 빛나는 느낌)
+                    pygame.draw.circle(screen, (255, 50, 50), (eye_center_x, eye_center_y), eye_radius - 5)
+
+                # [효과 2] 글씨 번쩍임 (검은색으로 덮기)
+                # flash_on이 False일 때(꺼진 타임일 때) 검은 박스로 글씨를 가립니다.
+                # ★중요★: 아래 사각형 좌표(Left, Top, Width, Height)를 글씨를 딱 가릴 만큼 조절해야 합니다.
+                text_cover_rect = pygame.Rect(350, 480, 500, 70)
+                if menu_screen.widget(screen, "text_cover", flash_on, text_cover_rect) and not flash_on:
+                    # 디버깅용: 위치 잡을 때는 BLACK 대신 RED로 바꿔서 영역을 확인해보세요.
+                    pygame.draw.rect(screen, BLACK, text_cover_rect)
+
+            # 공용 에셋 로딩 진행 막대 (다 불러오면 지움)
+            loading_rect = pygame.Rect(0, SCREEN_HEIGHT - 8, SCREEN_WIDTH, 8)
+            loaded_width = None
+            if not asset_loader.is_ready("common"):
+                loaded_width = int(SCREEN_WIDTH * asset_loader.progress("title", "common"))
+            if menu_screen.widget(screen, "loading", loaded_width, loading_rect) and loaded_width is not None:
+                pygame.draw.rect(screen, GREY, loading_rect)
+                pygame.draw.rect(screen, WHITE, (0, SCREEN_HEIGHT - 8, loaded_width, 8))
+
+        elif game_state == "CHAPTER_SELECT":
+            for chapter, rect in chapter_buttons.items():
+                if chapter > max_unlocked_chapter: continue
+                is_hovered = rect.collidepoint(mouse_pos)
+                if not menu_screen.widget(screen, f"chapter{chapter}", is_hovered, rect.inflate(20, 20)):
+                    continue
+                if chapter == 3:
+                    chapter_num_text = render_text(font_large, "BOSS", WHITE)
+                else:
+                    chapter_num_text = render_text(font_xl, str(chapter), WHITE)
+                chapter_num_rect = chapter_num_text.get_rect(center=rect.center)
+                if is_hovered:
+                    hover_rect = rect.inflate(20, 20)
+                    pygame.draw.rect(screen, LIGHT_BLUE, hover_rect, border_radius=15)
+                else:
+                    pygame.draw.rect(screen, BLUE, rect, border_radius=15)
+                pygame.draw.rect(screen, WHITE, rect, 4, border_radius=15)
+                screen.blit(chapter_num_text, chapter_num_rect)
+
+        elif game_state == "CONFIRM_START":
+            is_hovered = confirm_yes_button.collidepoint(mouse_pos)
+            if menu_screen.widget(screen, "yes", (is_hovered, selected_button_index), confirm_yes_button.inflate(10, 10)):
+                pygame.draw.rect(screen, GREEN, confirm_yes_button.inflate(10, 10) if is_hovered else confirm_yes_button,
+                                 border_radius=10)
+                if selected_button_index == 0: pygame.draw.rect(screen, WHITE, confirm_yes_button.inflate(10, 10), 5,
+                                                                border_radius=10)
+                yes_text = render_text(font_small, "예", BLACK)
+                yes_rect = yes_text.get_rect(center=confirm_yes_button.center)
+                screen.blit(yes_text, yes_rect)
+            is_hovered = confirm_no_button.collidepoint(mouse_pos)
+            if menu_screen.widget(screen, "no", (is_hovered, selected_button_index), confirm_no_button.inflate(10, 10)):
+                pygame.draw.rect(screen, RED, confirm_no_button.inflate(10, 10) if is_hovered else confirm_no_button,
+                                 border_radius=10)
+                if selected_button_index == 1: pygame.draw.rect(screen, WHITE, confirm_no_button.inflate(10, 10), 5,
+                                                                border_radius=10)
+                no_text = render_text(font_small, "아니오", WHITE)
+                no_rect = no_text.get_rect(center=confirm_no_button.center)
+                screen.blit(no_text, no_rect)
+
+        elif game_state == "CHARACTER_SELECT":
+            for i, (char_id, rect) in enumerate(character_buttons.items()):
+                if not menu_screen.widget(screen, char_id, (i == selected_char_index, char_id in character_roster),
+                                          rect.inflate(10, 10)):
+                    continue
+                if i == selected_char_index:
+                    pygame.draw.rect(screen, WHITE, rect.inflate(10, 10), 3)
+                if char_id in character_roster:
+                    pygame.draw.rect(screen, GREEN, rect.inflate(10, 10), 3)
+                char_img = GAME_ASSETS["characters"][char_id]["portraits"][PORTRAIT_SIZE]
+                img_rect = char_img.get_rect(center=rect.center)
+                screen.blit(char_img, img_rect)
+            selected_text = render_text(font_small, f"선택: {', '.join(character_roster)} (방향키, 스페이스)", WHITE)
+            selected_rect = selected_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT / 2 + 150))
+            if menu_screen.widget(screen, "selected", tuple(character_roster), selected_rect):
+                screen.blit(selected_text, selected_rect)
+
+        elif game_state == "RELAY_PROMPT":
+            elapsed_prompt_time = current_time_ticks - relay_prompt_start_time
+            time_left = max(0, 10 - (elapsed_prompt_time // 1000))
+            confirm_text = render_text(font_large, f"이어달리기 하시겠습니까? ({time_left})", WHITE)
+            confirm_rect = confirm_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
+            if menu_screen.widget(screen, "countdown", time_left, confirm_rect):
+                screen.blit(confirm_text, confirm_rect)
+            is_hovered = relay_yes_button_rect.collidepoint(mouse_pos)
+            if menu_screen.widget(screen, "yes", (is_hovered, selected_button_index), relay_yes_button_rect.inflate(10, 10)):
+                pygame.draw.rect(screen, GREEN, relay_yes_button_rect.inflate(10, 10) if is_hovered
+                                 else relay_yes_button_rect, border_radius=10)
+                if selected_button_index == 0: pygame.draw.rect(screen, WHITE, relay_yes_button_rect.inflate(10, 10), 5,
+                                                                border_radius=10)
+                yes_text = render_text(font_small, "예", BLACK)
+                yes_rect = yes_text.get_rect(center=relay_yes_button_rect.center)
+                screen.blit(yes_text, yes_rect)
+            is_hovered = relay_no_button_rect.collidepoint(mouse_pos)
+            if menu_screen.widget(screen, "no", (is_hovered, selected_button_index), relay_no_button_rect.inflate(10, 10)):
+                pygame.draw.rect(screen, RED, relay_no_button_rect.inflate(10, 10) if is_hovered
+                                 else relay_no_button_rect, border_radius=10)
+                if selected_button_index == 1: pygame.draw.rect(screen, WHITE, relay_no_button_rect.inflate(10, 10), 5,
+                                                                border_radius=10)
+                no_text = render_text(font_small, "아니오", WHITE)
+                no_rect = no_text.get_rect(center=relay_no_button_rect.center)
+                screen.blit(no_text, no_rect)
+
+        elif game_state == "GAME_OVER":
+            is_hovered = restart_button_rect.collidepoint(mouse_pos)
+            if menu_screen.widget(screen, "restart", is_hovered, restart_button_rect.inflate(10, 10)):
+                pygame.draw.rect(screen, RED, restart_button_rect.inflate(10, 10) if is_hovered
+                                 else restart_button_rect, border_radius=10)
+                btn_text = render_text(font_small, "재수강", WHITE)
+                btn_text_rect = btn_text.get_rect(center=restart_button_rect.center)
+                screen.blit(btn_text, btn_text_rect)
+
+        elif game_state == "GAME_CLEAR" and final_grade != "A+":
+            is_hovered = restart_button_rect.collidepoint(mouse_pos)
+            if menu_screen.widget(screen, "restart", is_hovered, restart_button_rect.inflate(10, 10)):
+                if is_hovered:
+                    pygame.draw.rect(screen, BLUE, restart_button_rect.inflate(10, 10), border_radius=10)
+                else:
+                    pygame.draw.rect(screen, BLUE, restart_button_rect, border_radius=10)
+                btn_text = render_text(font_small, "챕터 선택", WHITE)
+                btn_text_rect = btn_text.get_rect(center=restart_button_rect.center)
+                screen.blit(btn_text, btn_text_rect)
+
+        profiler.mark("draw")
+        if perf_overlay.visible:
+            perf_overlay.draw(screen, current_time_ticks, world.group_counts() if world else {})
+            profiler.mark("overlay")
+        if game_state == "PLAYING" and not perf_overlay.visible:
+            gameplay_renderer.present()
+        else:
+            gameplay_renderer.invalidate()  # 다른 화면이 덮어 그렸으므로 다음 게임 프레임은 통째로
+            menu_screen.present()
+        profiler.mark("flip")
+        perf_overlay.record(profiler)
+        HITCH_MONITOR.end_frame(game_state, profiler)
+        if frame_trace is not None:
+            frame_trace.write(game_state, profiler, world.group_counts() if world else {})
+        if driver is not None and not driver.end_frame(game_state, profiler):
+            running = False
+        if not first_frame_shown:
+            first_frame_shown = True
+            phases = " / ".join(f"{name} {ms:.0f} ms" for name, ms in STARTUP_TIMINGS.items())
+            print(f"[시작] 첫 화면까지 {(time.perf_counter() - PROCESS_START_TIME) * 1000:.0f} ms ({phases})")
+
+    if recording is not None:
+        recording.checksum = world_checksum(world)
+        print(f"[리플레이] 저장: {recording.save()}")
+    HITCH_MONITOR.uninstall()
+    print(HITCH_MONITOR.summary())
+    if frame_trace is not None:
+        frame_trace.close()
+        print(f"[프레임 기록] {trace_path} ({frame_trace.frames} 프레임)")
+    asset_loader.shutdown()
+
+    stats = TEXT_CACHE.stats()
+    print(f"[텍스트 캐시] 적중 {stats['hits']} / 미스 {stats['misses']} "
+          f"(적중률 {stats['hit_rate']:.1%}, 보관 {stats['entries']}개)")
+    for name, pool in ENTITY_POOLS.items():
+        stats = pool.stats()
+        print(f"[오브젝트 풀] {name}: 생성 {stats['allocated']} / 사용 중 {stats['live']} / 최대 {stats['high_water']}")
+    pygame.quit()
+    sys.exit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="이어달리기 러너 게임")
+    parser.add_argument("--fps", type=int, default=RENDER_FPS,
+                        help="화면 프레임 상한 (물리 속도와 무관, 0이면 제한 없음)")
+    parser.add_argument("--record", action="store_true", help="판마다 replays/ 폴더에 리플레이 저장")
+    parser.add_argument("--replay", metavar="PATH", help="저장된 리플레이를 재생")
+    parser.add_argument("--trace", metavar="PATH", help="프레임별 구간 시간을 CSV(.csv) 또는 JSONL로 기록")
+    parser.add_argument("--renderer", choices=tuple(GAMEPLAY_RENDERERS), default="full",
+                        help="게임 화면 그리기 방식 (full: 매 프레임 전체 flip, dirty: 바뀐 영역만 갱신)")
+    parser.add_argument("--build-bundle", action="store_true",
+                        help="이미지를 미리 줄여 .cache/assets.bundle로 묶고 종료 (낡으면 게임이 알아서 다시 만듦)")
+    args = parser.parse_args()
+    if args.build_bundle:
+        sys.exit(0 if build_asset_bundle() else 1)
+    main_game(render_fps=args.fps, record=args.record, replay_path=args.replay, trace_path=args.trace,
+              renderer=args.renderer)
\ No newline at end of file
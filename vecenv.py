@@ -0,0 +1,346 @@
+"""
+여러 판을 한꺼번에 진행하는 벡터 환경 (봇 학습/회귀 테스트용)
+
+N개의 독립된 판을 같은 틱에 맞춰 한 번에 진행합니다. 입력은 판마다 행동 번호 하나(배열),
+출력은 관찰/보상/종료 배열입니다. 판마다 Sprite/Group을 만들지 않고, 플레이어 상태는
+NumPy 배열(판 수 길이) 묶음으로, 코스는 미리 펼쳐 둔 물체 배열([코스, 물체])로 들고 있습니다.
+
+물리와 스폰은 게임과 같습니다. Player.update() / jump() / slide()와 World.step()의 순서를
+그대로 따르고, 코스는 generate_course() + course_layout()으로 만듭니다. check_course()와 마찬가지로
+아이템/스킬/젤리는 없는 판입니다. (카메라는 명목 속도로 움직임)
+
+    python vecenv.py --envs 256 --steps 2000              # 한 프로세스 처리량
+    python vecenv.py --envs 256 --steps 2000 --workers 4  # 작업 프로세스 4개
+
+    env = VecEnv(256, chapter=2)
+    obs = env.reset()
+    obs, reward, done, info = env.step(actions)          # actions: 0~3 (ACTION_JUMP | ACTION_SLIDE)
+"""
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import game
+
+# 행동은 리플레이 입력 비트와 같습니다. (점프 누름 | 슬라이드 누르고 있음)
+ACTION_JUMP = game.INPUT_JUMP
+ACTION_SLIDE = game.INPUT_SLIDE
+NUM_ACTIONS = 4
+
+WINDOW = 12        # 커서부터 살펴보는 코스 물체 수 (플레이어와 겹칠 수 있는 물체가 모두 들어가는 크기)
+OBS_OBJECTS = 4    # 관찰에 넣는 앞쪽 물체 수
+OBJECT_FEATURES = 7
+OBS_SIZE = 6 + OBS_OBJECTS * OBJECT_FEATURES
+FAR = 1 << 30      # 물체 배열을 채우는 빈 칸의 x (어떤 플레이어와도 겹치지 않음)
+
+STEP_REWARD = game.SIM_STEP_MS / 1000  # 버틴 1초마다 1
+CLEAR_REWARD = 10.0
+DEATH_REWARD = -1.0
+
+
+class CoursePool:
+    """
+    같은 챕터의 코스 여러 개를 월드 좌표 물체 배열로 펼쳐 둡니다.
+    모든 배열은 [코스, 물체] 모양이고 물체는 왼쪽 x 순서입니다. 끝은 FAR로 채워 창(WINDOW)이 넘쳐도 안전합니다.
+    """
+
+    def __init__(self, chapter, courses):
+        self.chapter = chapter
+        layouts = []
+        camera = None
+        for course in courses:
+            camera, objects = game.course_layout(course, chapter)
+            layouts.append(objects)
+        width = max(len(objects) for objects in layouts) + WINDOW + 1
+        shape = (len(layouts), width)
+        self.left = np.full(shape, FAR, dtype=np.int32)
+        self.right = np.full(shape, FAR + 1, dtype=np.int32)
+        self.top = np.zeros(shape, dtype=np.int32)
+        self.bottom = np.zeros(shape, dtype=np.int32)
+        self.kind = np.full(shape, -1, dtype=np.int8)
+        self.tick = np.zeros(shape, dtype=np.int32)
+        for row, objects in enumerate(layouts):
+            for col, o in enumerate(objects):
+                self.left[row, col] = o.left
+                self.right[row, col] = o.right
+                self.top[row, col] = o.top
+                self.bottom[row, col] = o.bottom
+                self.kind[row, col] = o.kind
+                self.tick[row, col] = o.tick
+
+        # 틱 -> 플레이어 rect.x / 스크롤 속도 (대시/젤리가 없으니 챕터마다 하나)
+        camera = np.asarray(camera)
+        self.player_left = camera.astype(np.int64).astype(np.int32) + game.PLAYER_START_X
+        self.speed = np.diff(camera, prepend=0.0).astype(np.float32)
+        self.clear_tick = next(t for t in range(len(camera))
+                               if int(t * game.SIM_STEP_MS // 1000) > game.CHAPTER_DURATION_SECONDS)
+
+    def __len__(self):
+        return len(self.left)
+
+    @classmethod
+    def generate(cls, chapter, seeds, validate=True):
+        return cls(chapter, [game.generate_course(chapter, seed, validate=validate) for seed in seeds])
+
+
+class VecEnv:
+    """
+    num_envs개의 판을 한꺼번에 진행합니다. 끝난 판(죽음 또는 클리어)은 step() 안에서 바로 새 판으로 바뀌고,
+    그 판의 마지막 결과는 info에 남습니다.
+    """
+
+    def __init__(self, num_envs, chapter=1, seed=0, pool_size=32, validate=True, pool=None):
+        self.num_envs = num_envs
+        self.pool = pool or CoursePool.generate(chapter, range(seed * pool_size, (seed + 1) * pool_size), validate)
+        self.rng = np.random.default_rng(seed)
+        self.offsets = np.arange(WINDOW)
+        self.rows = np.arange(num_envs)
+
+        self.course = np.zeros(num_envs, dtype=np.int64)
+        self.ticks = np.zeros(num_envs, dtype=np.int32)
+        self.cursor = np.zeros(num_envs, dtype=np.int64)
+        self.bottom = np.zeros(num_envs, dtype=np.int32)
+        self.vel = np.zeros(num_envs, dtype=np.int32)
+        self.jumps = np.zeros(num_envs, dtype=np.int32)
+        self.jumping = np.zeros(num_envs, dtype=bool)
+        self.sliding = np.zeros(num_envs, dtype=bool)
+        self.reset()
+
+    def reset(self, mask=None):
+        """mask에 해당하는 판(없으면 전부)을 새 코스로 처음부터 시작하고 전체 관찰을 돌려줍니다."""
+        if mask is None:
+            mask = np.ones(self.num_envs, dtype=bool)
+        count = int(mask.sum())
+        self.course[mask] = self.rng.integers(len(self.pool), size=count)
+        self.ticks[mask] = 0
+        self.cursor[mask] = 0
+        # Player.__init__과 같은 시작 상태: 바닥에 서 있고 공중 판정, 점프 0회
+        self.bottom[mask] = game.PLAYER_START_Y
+        self.vel[mask] = 0
+        self.jumps[mask] = 0
+        self.jumping[mask] = True
+        self.sliding[mask] = False
+        return self.observe()
+
+    def window(self):
+        """판마다 커서부터 WINDOW개 물체의 (left, right, top, bottom, kind, tick) 배열 ([판, WINDOW])"""
+        pool = self.pool
+        row = self.course[:, None]
+        col = self.cursor[:, None] + self.offsets
+        return (pool.left[row, col], pool.right[row, col], pool.top[row, col],
+                pool.bottom[row, col], pool.kind[row, col], pool.tick[row, col])
+
+    def step(self, actions):
+        pool = self.pool
+        actions = np.asarray(actions)
+        press_jump = (actions & ACTION_JUMP) != 0
+        hold_slide = (actions & ACTION_SLIDE) != 0
+        self.ticks += 1
+        ticks = self.ticks
+        bottom, vel, jumps = self.bottom, self.vel, self.jumps
+
+        # 1. 입력: Player.jump() (2단 점프까지)
+        can_jump = press_jump & (jumps < 2)
+        vel[can_jump] = game.JUMP_STRENGTH
+        jumping = self.jumping | can_jump
+        jumps += can_jump
+
+        # 2. Player.slide(): 바닥이거나 이미 슬라이드 중일 때만, 발 위치(bottom)는 그대로
+        sliding = hold_slide & (~jumping | self.sliding)
+        height = np.where(sliding, game.SLIDE_HEIGHT, game.PLAYER_HEIGHT).astype(np.int32)
+
+        # 3. 중력
+        vel += int(game.GRAVITY)
+        bottom += vel
+        top = bottom - height
+
+        # 지나간 물체는 커서를 넘겨 창에서 뺍니다. (카메라를 따라가기 전 x 기준, World.step()의 update와 같음)
+        left = pool.player_left[ticks - 1]
+        for _ in range(WINDOW):
+            passed = pool.right[self.course, self.cursor] < left
+            if not passed.any():
+                break
+            self.cursor += passed
+        o_left, o_right, o_top, o_bottom, o_kind, o_tick = self.window()
+        left_ = left[:, None]
+        spawned = o_tick < ticks[:, None]
+        overlap = (o_left < left_ + game.PLAYER_WIDTH) & (o_right > left_)
+        vertical = (o_top < bottom[:, None]) & (o_bottom > top[:, None])
+
+        # 4. 발판 착지: 조건을 만족하는 첫 발판 윗면으로
+        landing = ((o_kind == game.SPAWN_PLATFORM) & spawned & vertical
+                   & (left_ + game.PLAYER_WIDTH > o_left + 10) & (left_ < o_right - 10)
+                   & (vel[:, None] >= 0) & (bottom[:, None] <= o_top + vel[:, None] + 15))
+        landed = landing.any(axis=1)
+        surface = o_top[self.rows, landing.argmax(axis=1)]
+        bottom[landed] = surface[landed]
+        vel[landed] = 0
+        jumps[landed] = 0
+        top = bottom - height
+
+        # 5. 바닥 / 구멍
+        fell = top > game.GROUND_Y
+        vertical = (o_top < bottom[:, None]) & (o_bottom > top[:, None])
+        in_pit = ((o_kind == game.SPAWN_PIT) & spawned & overlap & vertical).any(axis=1)
+        snap = ~landed & ~in_pit & (bottom >= game.GROUND_Y)
+        bottom[snap] = game.GROUND_Y
+        vel[snap] = 0
+        jumps[snap] = 0
+        self.jumping = ~(snap | landed)
+        self.sliding = sliding
+
+        # 6. 카메라 이동 후: 챕터 클리어가 먼저, 그다음 장애물 충돌
+        left_ = pool.player_left[ticks][:, None]
+        cleared = ticks >= pool.clear_tick
+        hit = ((o_kind == game.SPAWN_OBSTACLE) & (o_tick <= ticks[:, None])
+               & (o_left < left_ + game.PLAYER_WIDTH) & (o_right > left_) & vertical).any(axis=1)
+        died = ~cleared & (fell | hit)
+        done = cleared | died
+
+        reward = np.where(died, DEATH_REWARD, STEP_REWARD).astype(np.float32)
+        reward[cleared] += CLEAR_REWARD
+        info = {"cleared": cleared, "died": died, "seconds": ticks * (game.SIM_STEP_MS / 1000)}
+        if done.any():
+            obs = self.reset(done)
+        else:
+            obs = self.observe()
+        return obs, reward, done, info
+
+    def observe(self):
+        """
+        판마다 OBS_SIZE개의 float32:
+        [발 높이, vel_y, 사용한 점프 수, 슬라이드, 바닥에 있음, 스크롤 속도]
+        + 앞쪽 물체 OBS_OBJECTS개마다 [거리, 너비, 윗면 높이, 아랫면 높이, 장애물, 구멍, 발판] (없으면 거리 1)
+        """
+        pool = self.pool
+        ticks = self.ticks
+        left = pool.player_left[ticks]
+        obs = np.zeros((self.num_envs, OBS_SIZE), dtype=np.float32)
+        obs[:, 0] = (game.GROUND_Y - self.bottom) / 100
+        obs[:, 1] = self.vel / 16
+        obs[:, 2] = self.jumps / 2
+        obs[:, 3] = self.sliding
+        obs[:, 4] = ~self.jumping
+        obs[:, 5] = pool.speed[ticks] / 10
+
+        o_left, o_right, o_top, o_bottom, o_kind, o_tick = self.window()
+        ahead = (o_right > left[:, None]) & (o_tick <= ticks[:, None])
+        order = np.argsort(np.where(ahead, o_left, FAR), axis=1, kind="stable")[:, :OBS_OBJECTS]
+        rows = self.rows[:, None]
+        valid = ahead[rows, order]
+        features = obs[:, 6:].reshape(self.num_envs, OBS_OBJECTS, OBJECT_FEATURES)
+        features[:, :, 0] = np.where(valid, (o_left[rows, order] - left[:, None] - game.PLAYER_WIDTH)
+                                     / game.SCREEN_WIDTH, 1.0)
+        features[:, :, 1] = valid * (o_right[rows, order] - o_left[rows, order]) / game.SCREEN_WIDTH
+        features[:, :, 2] = valid * (game.GROUND_Y - o_top[rows, order]) / 100
+        features[:, :, 3] = valid * (game.GROUND_Y - o_bottom[rows, order]) / 100
+        kind = np.where(valid, o_kind[rows, order], -1)
+        features[:, :, 4] = kind == game.SPAWN_OBSTACLE
+        features[:, :, 5] = kind == game.SPAWN_PIT
+        features[:, :, 6] = kind == game.SPAWN_PLATFORM
+        return obs
+
+
+# --- 작업 프로세스로 나눠 돌리기 ---
+def _worker(conn, kwargs):
+    env = VecEnv(**kwargs)
+    try:
+        while True:
+            command, data = conn.recv()
+            if command == "step":
+                conn.send(env.step(data))
+            elif command == "reset":
+                conn.send(env.reset())
+            elif command == "close":
+                break
+    finally:
+        conn.close()
+
+
+class ParallelVecEnv:
+    """
+    VecEnv 여러 개를 작업 프로세스에 하나씩 띄우고, 행동 배열을 나눠 보내 결과를 이어 붙입니다.
+    프로세스마다 seed가 달라 서로 다른 코스 묶음을 씁니다.
+    """
+
+    def __init__(self, workers, envs_per_worker, chapter=1, seed=0, pool_size=32, validate=True):
+        self.num_envs = workers * envs_per_worker
+        self.envs_per_worker = envs_per_worker
+        context = multiprocessing.get_context("spawn")
+        self.conns = []
+        self.processes = []
+        for index in range(workers):
+            parent, child = context.Pipe()
+            kwargs = {"num_envs": envs_per_worker, "chapter": chapter, "seed": seed * workers + index,
+                      "pool_size": pool_size, "validate": validate}
+            process = context.Process(target=_worker, args=(child, kwargs), daemon=True)
+            process.start()
+            child.close()
+            self.conns.append(parent)
+            self.processes.append(process)
+
+    def reset(self):
+        for conn in self.conns:
+            conn.send(("reset", None))
+        return np.concatenate([conn.recv() for conn in self.conns])
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        for index, conn in enumerate(self.conns):
+            start = index * self.envs_per_worker
+            conn.send(("step", actions[start:start + self.envs_per_worker]))
+        results = [conn.recv() for conn in self.conns]
+        obs, reward, done = (np.concatenate([r[i] for r in results]) for i in range(3))
+        info = {key: np.concatenate([r[3][key] for r in results]) for key in results[0][3]}
+        return obs, reward, done, info
+
+    def close(self):
+        for conn in self.conns:
+            conn.send(("close", None))
+        for process in self.processes:
+            process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 환경 처리량 측정 (무작위 입력)")
+    parser.add_argument("--envs", type=int, default=256, help="프로세스 하나가 맡는 판 수")
+    parser.add_argument("--steps", type=int, default=2000, help="진행할 틱 수")
+    parser.add_argument("--workers", type=int, default=0, help="작업 프로세스 수 (0이면 이 프로세스에서 직접)")
+    parser.add_argument("--chapter", type=int, default=1, choices=(1, 2, 3))
+    parser.add_argument("--pool", type=int, default=32, help="프로세스마다 미리 만들어 둘 코스 수")
+    parser.add_argument("--unchecked", action="store_true", help="코스 풀이 가능성 검사를 건너뜀 (준비가 빠름)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.workers:
+        env = ParallelVecEnv(args.workers, args.envs, args.chapter, pool_size=args.pool, validate=not args.unchecked)
+    else:
+        env = VecEnv(args.envs, args.chapter, pool_size=args.pool, validate=not args.unchecked)
+    env.reset()
+    print(f"[벡터 환경] 판 {env.num_envs}개 준비 {time.perf_counter() - started:.1f}초")
+
+    rng = np.random.default_rng(0)
+    episodes = clears = 0
+    started = time.perf_counter()
+    for _ in range(args.steps):
+        # 가끔 점프, 가끔 슬라이드하는 무작위 입력
+        actions = (rng.random(env.num_envs) < 0.05) * ACTION_JUMP | (rng.random(env.num_envs) < 0.2) * ACTION_SLIDE
+        _, _, done, info = env.step(actions)
+        episodes += int(done.sum())
+        clears += int(info["cleared"].sum())
+    elapsed = time.perf_counter() - started
+    if args.workers:
+        env.close()
+    print(f"[벡터 환경] {args.steps * env.num_envs / elapsed:,.0f} 판-틱/초 "
+          f"({args.steps}틱 x {env.num_envs}판, {elapsed:.2f}초), 끝난 판 {episodes}개, 클리어 {clears}개")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())